@@ -0,0 +1,60 @@
+"""
+Tune the inference runtime for this machine and write a runtime profile
+Run from src/:
+    python -m autotune                          # full sweep, writes AI_RUNTIME_PROFILE
+    python -m autotune --quick --max-p99-ms 25  # shorter runs, tighter latency target
+    python -m autotune --check                  # is the saved profile valid here?
+
+Sweeps preforked workers, torch intra-op and inter-op threads and the
+largest micro-batch against the real YieldPredictionModel (see
+autotune.sweep), and keeps the layout with the highest throughput whose
+p99 forward-pass latency meets --max-p99-ms. The service applies the
+profile at startup until the hardware, torch version, inference backend or
+model version changes
+"""
+import argparse
+import sys
+
+
+def _ints(value: str):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    import config
+    from autotune.sweep import DEFAULT_BATCH_SIZES, tune
+    from services import runtime_profile
+
+    parser = argparse.ArgumentParser(description="Tune torch threads, batch size and workers for this machine")
+    parser.add_argument('--out', default=config.RUNTIME_PROFILE_PATH, help="Runtime profile to write")
+    parser.add_argument('--max-p99-ms', type=float, default=config.RUNTIME_PROFILE_MAX_P99_MS,
+                        help="Latency target for one micro-batch")
+    parser.add_argument('--batch-sizes', type=_ints, default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument('--workers', type=_ints, default=None, help="Worker counts to try (default: powers of two)")
+    parser.add_argument('--threads', type=_ints, default=None, help="Intra-op threads to try per worker")
+    parser.add_argument('--duration', type=float, default=1.0, help="Seconds per batch size and layout")
+    parser.add_argument('--quick', action='store_true', help="0.25s per measurement")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true', help="Only validate the existing profile")
+    args = parser.parse_args(argv)
+
+    profile = runtime_profile.RuntimeProfile(args.out)
+    if args.check:
+        profile.load()
+        print(f"{args.out}: {profile.state}" + (f" ({profile.reason})" if profile.reason else ""))
+        return 0 if profile.state == 'valid' else 1
+
+    result = tune(args.max_p99_ms, args.batch_sizes, 0.25 if args.quick else args.duration, args.workers,
+                  args.threads, args.seed)
+    runtime_profile.save(result, args.out)
+    settings, measured = result['settings'], result['result']
+    print(f"🏁 workers={settings['workers']} threads={settings['torch_num_threads']} "
+          f"interop={settings['torch_interop_threads'] or 'default'} batch={settings['batch_max_size']}: "
+          f"{measured['throughput_per_s']:,.0f} vaults/s, p99 {measured['p99_ms']} ms "
+          f"(tuned in {result['tune_seconds']}s)")
+    print(f"📝 Runtime profile written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
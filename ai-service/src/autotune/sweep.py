@@ -0,0 +1,268 @@
+"""
+Runtime sweep: workers x torch threads x inter-op threads x batch size
+
+One trial is a worker layout (W processes, T intra-op and I inter-op
+threads each). It runs in freshly spawned processes, because inter-op
+threads can only be set once per process, pinned to the cores the
+preforking supervisor would give them. Each process loads the real
+YieldPredictionModel behind the configured inference backend, then all W
+run forward passes over the same synthetic vault windows at the same time,
+one batch size after another, for `duration` seconds each. Throughput is
+vaults per second over all W; latency is per forward pass (the time a
+micro-batch of that size keeps its requests waiting)
+
+A layout whose processes fail (backend build, affinity) or stall past a
+time limit is stopped and recorded with an 'error' instead of results;
+the sweep carries on with the other layouts
+"""
+import os
+import queue
+import time
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_BATCH_SIZES = (8, 16, 32, 64, 128, 256)
+# Seconds a trial process may take to start, import torch and build the
+# backend, and per batch size beyond its measuring time
+_STARTUP_SECONDS = 120.0
+_BATCH_SLACK_SECONDS = 30.0
+# Seconds an exited trial process gets for its queued result to arrive
+_EXIT_GRACE_SECONDS = 2.0
+
+
+def _powers_of_two(limit: int) -> List[int]:
+    values, value = [], 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    if limit not in values:
+        values.append(limit)
+    return values
+
+
+def trial_grid(cpus: int, workers: Optional[Sequence[int]] = None,
+               threads: Optional[Sequence[int]] = None) -> List[Dict]:
+    """
+    Layouts that do not oversubscribe cores (W x T <= cpus), plus torch's
+    defaults (every worker using all cores) for comparison
+    """
+    grid = []
+    for count in workers or _powers_of_two(cpus):
+        per_worker = max(1, cpus // count)
+        for intra in threads or _powers_of_two(per_worker):
+            if intra > per_worker:
+                continue
+            for interop in sorted({1, intra}):
+                grid.append({'workers': count, 'torch_num_threads': intra, 'torch_interop_threads': interop})
+        if per_worker < cpus and not threads:
+            grid.append({'workers': count, 'torch_num_threads': cpus, 'torch_interop_threads': 0,
+                         'torch_defaults': True})
+    return grid
+
+
+def _windows(count: int, seed: int) -> np.ndarray:
+    """[count, 10, 10] normalized feature windows of synthetic vaults"""
+    from benchmarks.micro import random_vaults
+    from services.pytorch_predictor import SEQUENCE_LENGTH, feature_matrix
+
+    features, _ = feature_matrix(random_vaults(count, seed))
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 0.01, (count, SEQUENCE_LENGTH, features.shape[1])).astype(np.float32)
+    return features[:, None, :] + noise
+
+
+def _load_backend():
+    import torch
+
+    import config
+    from services.inference_backend import build_backend
+    from services.model_registry import model_registry
+    from services.pytorch_predictor import NUM_FEATURES, SEQUENCE_LENGTH, YieldPredictionModel, initial_weights
+
+    model = YieldPredictionModel()
+    try:
+        path, _ = initial_weights(model_registry.active_version())
+        model.load_state_dict(torch.load(path, map_location='cpu'))
+    except Exception:
+        pass  # Untrained weights cost the same per forward pass
+    model.eval()
+    if config.INFERENCE_BACKEND != 'eager':
+        try:
+            return build_backend(model, config.INFERENCE_BACKEND, SEQUENCE_LENGTH, NUM_FEATURES)
+        except Exception:
+            pass
+    return model
+
+
+def _trial_process(index: int, cpus: Optional[List[int]], threads: int, interop: int,
+                   batch_sizes: Sequence[int], duration: float, seed: int, barrier, results):
+    """Puts (index, latencies), or (index, error message) after breaking the barrier"""
+    try:
+        if cpus and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+        import torch
+
+        torch.set_num_threads(threads)
+        if interop > 0:
+            torch.set_num_interop_threads(interop)
+        backend = _load_backend()
+        windows = torch.from_numpy(_windows(max(batch_sizes), seed))
+        latencies = {}
+        with torch.inference_mode():
+            for size in batch_sizes:
+                batch = windows[:size].contiguous()
+                for _ in range(3):
+                    backend(batch)
+                barrier.wait()
+                samples = []
+                deadline = time.perf_counter() + duration
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    backend(batch)
+                    samples.append(time.perf_counter() - started)
+                latencies[size] = samples
+    except Exception as e:
+        barrier.abort()  # Siblings waiting at the barrier fail instead of hanging
+        results.put((index, f"{type(e).__name__}: {e}"))
+        return
+    results.put((index, latencies))
+
+
+def _collect(processes: List, results, timeout: float) -> Dict[int, object]:
+    """
+    Latencies per process index; raises RuntimeError when a process fails,
+    exits without a result or the trial runs past timeout
+    """
+    collected: Dict[int, object] = {}
+    exited_at: Dict[int, float] = {}
+    deadline = time.monotonic() + timeout
+    while len(collected) < len(processes):
+        try:
+            index, payload = results.get(timeout=0.2)
+        except queue.Empty:
+            now = time.monotonic()
+            if now > deadline:
+                raise RuntimeError(f"timed out after {timeout:.0f}s")
+            for index, process in enumerate(processes):
+                if index in collected or process.exitcode is None:
+                    continue
+                # An exited process's result may still be in the queue's pipe
+                if now - exited_at.setdefault(index, now) > _EXIT_GRACE_SECONDS:
+                    raise RuntimeError(f"trial process {index} exited with code {process.exitcode}")
+            continue
+        if isinstance(payload, str):
+            raise RuntimeError(payload)
+        collected[index] = payload
+    return collected
+
+
+def run_trial(layout: Dict, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, duration: float = 1.0,
+              seed: int = 0) -> Dict:
+    """
+    Throughput and latency per batch size for one worker layout; a failed
+    layout comes back with an 'error' and no batches
+    """
+    from services.worker_supervisor import core_plan
+
+    context = get_context('spawn')
+    workers = layout['workers']
+    plan = core_plan(workers) if not layout.get('torch_defaults') else [None] * workers
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_trial_process, daemon=True, args=(
+            i, plan[i], layout['torch_num_threads'], layout['torch_interop_threads'], list(batch_sizes),
+            duration, seed, barrier, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        collected = list(_collect(processes, results, _STARTUP_SECONDS +
+                                  len(batch_sizes) * (duration + _BATCH_SLACK_SECONDS)).values())
+    except RuntimeError as e:
+        barrier.abort()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        return {**layout, 'error': str(e), 'batches': {}}
+    for process in processes:
+        process.join()
+
+    measured = {}
+    for size in batch_sizes:
+        samples = np.concatenate([np.asarray(worker[size]) for worker in collected]) * 1000
+        passes = sum(len(worker[size]) for worker in collected)
+        measured[size] = {
+            'throughput_per_s': round(passes * size / duration, 1),
+            'p50_ms': round(float(np.percentile(samples, 50)), 3),
+            'p99_ms': round(float(np.percentile(samples, 99)), 3),
+            'passes': passes,
+        }
+    return {**layout, 'batches': measured}
+
+
+def best(trials: List[Dict], max_p99_ms: float) -> Dict:
+    """
+    Highest throughput among (layout, batch size) points whose p99 meets
+    the target; the lowest p99 when none does
+    """
+    points = [
+        {**{key: value for key, value in trial.items() if key != 'batches'}, 'batch_max_size': size, **result}
+        for trial in trials for size, result in trial['batches'].items()
+    ]
+    within = [point for point in points if point['p99_ms'] <= max_p99_ms]
+    if within:
+        return max(within, key=lambda point: (point['throughput_per_s'], -point['p99_ms']))
+    return min(points, key=lambda point: point['p99_ms'])
+
+
+def tune(max_p99_ms: float = 50.0, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, duration: float = 1.0,
+         workers: Optional[Sequence[int]] = None, threads: Optional[Sequence[int]] = None, seed: int = 0,
+         log=print) -> Dict:
+    """Run the whole sweep on this machine and return a runtime profile"""
+    from services import runtime_profile
+    from services.worker_supervisor import usable_cpus
+
+    started = time.time()
+    current = runtime_profile.fingerprint()
+    grid = trial_grid(len(usable_cpus()), workers, threads)
+    log(f"🎛️  {len(grid)} layouts x {len(batch_sizes)} batch sizes on {current['cpus']} CPUs "
+        f"({current['cpu_model']}), model {current['model']}")
+    trials = []
+    for layout in grid:
+        trial = run_trial(layout, batch_sizes, duration, seed)
+        trials.append(trial)
+        if 'error' in trial:
+            log(f"   workers={layout['workers']} threads={layout['torch_num_threads']} "
+                f"interop={layout['torch_interop_threads'] or 'default'}: failed ({trial['error']})")
+            continue
+        top = max(trial['batches'].items(), key=lambda item: item[1]['throughput_per_s'])
+        log(f"   workers={layout['workers']} threads={layout['torch_num_threads']} "
+            f"interop={layout['torch_interop_threads'] or 'default'}: "
+            f"{top[1]['throughput_per_s']:,.0f} vaults/s at batch {top[0]} (p99 {top[1]['p99_ms']} ms)")
+
+    if all('error' in trial for trial in trials):
+        raise RuntimeError(f"Every layout failed, e.g. {trials[0]['error']}")
+    chosen = best(trials, max_p99_ms)
+    defaults = [trial for trial in trials if 'error' not in trial and trial['workers'] == 1 and
+                trial['torch_num_threads'] == current['cpus'] and trial['torch_interop_threads'] in (0, current['cpus'])]
+    return {
+        'format': runtime_profile.PROFILE_FORMAT,
+        'created_at': started,
+        'tune_seconds': round(time.time() - started, 1),
+        'fingerprint': current,
+        'objective': {'max_p99_ms': max_p99_ms, 'duration_s': duration},
+        'settings': {
+            'workers': chosen['workers'],
+            'torch_num_threads': chosen['torch_num_threads'],
+            'torch_interop_threads': chosen['torch_interop_threads'],
+            'batch_max_size': chosen['batch_max_size'],
+        },
+        'result': {key: chosen[key] for key in ('throughput_per_s', 'p50_ms', 'p99_ms')},
+        'baseline': defaults[0]['batches'] if defaults else None,
+        'trials': trials,
+    }
@@ -0,0 +1,130 @@
+"""
+Backtest rebalance/strategy policies on historical vault series
+Run from src/:
+    python -m backtest data/shards
+    python -m backtest data/shards --sweep rebalance_threshold=2,5,10 --sweep sell_apy=3,5 --workers 4
+    python -m backtest data/shards --weights models/a.pth --out backtest.json
+
+The shards are replayed through the model once into --cache (reused while
+shards and model are unchanged); every policy of the sweep (the grid product
+of the --sweep values over the live parameters) is then evaluated on the
+cached predictions, in parallel processes. Buy-and-hold and the live policy
+are always included for comparison
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def _sweep(value: str):
+    name, _, values = value.partition('=')
+    return name.strip(), [float(item) for item in values.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    from backtest import engine, replay
+    from services import model_registry
+    from services.policy import DEFAULT_POLICY
+    from services.pytorch_predictor import initial_weights
+
+    parser = argparse.ArgumentParser(description="Backtest rebalance policies on replayed model predictions")
+    parser.add_argument('data', help="Shard directory (or a single .npy file)")
+    parser.add_argument('--weights', default=None,
+                        help="Model weights (default: the registry's active version, else AI_MODEL_PATH)")
+    parser.add_argument('--cache', default=None, help="Replay cache directory (default: <data>/.replay)")
+    parser.add_argument('--rebuild', action='store_true', help="Replay even when the cache is current")
+    parser.add_argument('--batch-size', type=int, default=1024, help="Windows per model call")
+    parser.add_argument('--sweep', type=_sweep, action='append', default=[],
+                        help=f"name=v1,v2,... over the policy parameters ({', '.join(DEFAULT_POLICY)})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processes for replay and sweep")
+    parser.add_argument('--threads', type=int, default=0, help="Torch threads per replay process (0 = share cores)")
+    parser.add_argument('--steps-per-year', type=float, default=engine.DEFAULT_SETTINGS['steps_per_year'],
+                        help="Snapshots per year (8760 = hourly)")
+    parser.add_argument('--initial-exposure', type=float, default=engine.DEFAULT_SETTINGS['initial_exposure'])
+    parser.add_argument('--cost-bps', type=float, default=engine.DEFAULT_SETTINGS['cost_bps'],
+                        help="Cost per unit of exposure traded")
+    parser.add_argument('--cash-apy', type=float, default=engine.DEFAULT_SETTINGS['cash_apy'],
+                        help="APY earned by capital out of the vault")
+    parser.add_argument('--no-price-returns', action='store_true', help="Yield only, ignore price_change_24h")
+    parser.add_argument('--out', default=None, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    for name, values in args.sweep:
+        if name not in DEFAULT_POLICY:
+            parser.error(f"Unknown policy parameter {name} (one of {', '.join(DEFAULT_POLICY)})")
+        if not values:
+            parser.error(f"No values to sweep for {name}")
+    weights = args.weights or initial_weights(model_registry.active_version())[0]
+    if not os.path.exists(weights):
+        parser.error(f"No model weights at {weights}; train one (python -m training.train) or pass --weights")
+    cache_dir = args.cache or os.path.join(args.data if os.path.isdir(args.data) else
+                                           os.path.dirname(os.path.abspath(args.data)), '.replay')
+    settings = {
+        'steps_per_year': args.steps_per_year,
+        'initial_exposure': args.initial_exposure,
+        'cost_bps': args.cost_bps,
+        'cash_apy': args.cash_apy,
+        'price_returns': not args.no_price_returns,
+    }
+
+    started = time.time()
+    cache, replayed = replay.build(args.data, weights, cache_dir, batch_size=args.batch_size,
+                                   workers=args.workers, threads=args.threads, force=args.rebuild)
+    if replayed['reused']:
+        print(f"♻️  Reusing replay cache {cache_dir} ({cache.num_vaults:,} vaults, {cache.num_samples:,} steps)")
+    else:
+        print(f"🎞️  Replayed {replayed['samples']:,} windows of {replayed['vaults']:,} vaults in "
+              f"{replayed['replay_seconds']}s ({replayed['windows_per_sec']:,} windows/s) into {cache_dir}")
+
+    policies = [('buy_and_hold', None), ('live', dict(DEFAULT_POLICY))]
+    names = [name for name, _ in args.sweep]
+    for values in itertools.product(*[values for _, values in args.sweep]):
+        if names:
+            policies.append((','.join(f'{name}={value:g}' for name, value in zip(names, values)),
+                             dict(DEFAULT_POLICY, **dict(zip(names, values)))))
+
+    evaluated = time.perf_counter()
+    workers = max(1, min(args.workers, len(policies)))
+    jobs = ([cache_dir] * len(policies), [name for name, _ in policies], [policy for _, policy in policies],
+            [settings] * len(policies))
+    if workers == 1:
+        results = list(map(engine.run_policy, *jobs))
+    else:
+        with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as pool:
+            results = list(pool.map(engine.run_policy, *jobs))
+    eval_seconds = time.perf_counter() - evaluated
+
+    width = max(len(result['name']) for result in results)
+    print(f"{'policy':<{width}}  {'APY %':>8}  {'p10':>8}  {'turnover/y':>10}  {'rebal/vault':>11}  "
+          f"{'max DD %':>8}  {'exposure':>8}")
+    for result in results:
+        print(f"{result['name']:<{width}}  {result['realized_apy']:>8.3f}  {result['realized_apy_p10']:>8.3f}  "
+              f"{result['turnover']:>10.2f}  {result['rebalances_per_vault']:>11.1f}  "
+              f"{result['max_drawdown']:>8.3f}  {result['mean_exposure']:>8.3f}")
+    print(f"🏁 {len(results)} policies × {cache.num_samples:,} steps in {eval_seconds:.1f}s "
+          f"({len(results) * cache.num_samples / eval_seconds:,.0f} policy-steps/s, {workers} workers)")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump({
+                'model_version': cache.model_version,
+                'weights': os.path.abspath(weights),
+                'data': os.path.abspath(args.data),
+                'settings': settings,
+                'replay': replayed,
+                'eval_seconds': round(eval_seconds, 3),
+                'total_seconds': round(time.time() - started, 3),
+                'policies': results,
+            }, f, indent=2)
+        print(f"📝 Report written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
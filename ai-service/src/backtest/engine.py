@@ -0,0 +1,159 @@
+"""
+Vectorized policy evaluation over a replay cache
+
+A policy is a set of services.policy parameters. At every step of every
+vault it gets the replayed prediction, current APY and risk score, and acts
+like the service: when should_rebalance fires, the recommended action sets
+the vault's target exposure (TARGET_EXPOSURE; HOLD keeps the current one),
+otherwise the position stays as it is. Exposure earns the vault's APY and
+price move over the step, the rest earns cash_apy, and every change of
+exposure pays cost_bps. Snapshots carry a trailing 24h price change, so
+the price return of one step is that change compounded down to the step
+length (exact for daily steps; for hourly ones it assumes the day's move
+was spread evenly over its hours). All of it is array arithmetic over whole chunks of
+vaults: the position path is a forward fill (running maximum of the last
+decision's index), per-vault totals are reduceat over the vault offsets
+"""
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from backtest.replay import ReplayCache
+from services import policy as rules
+
+# Exposure (fraction of the position's capital in the vault) each action moves to
+TARGET_EXPOSURE = np.full(len(rules.ACTIONS), np.nan)
+TARGET_EXPOSURE[rules.STRONG_BUY] = 1.0
+TARGET_EXPOSURE[rules.BUY] = 0.75
+TARGET_EXPOSURE[rules.REDUCE_POSITION] = 0.5
+TARGET_EXPOSURE[rules.SELL] = 0.0
+
+DEFAULT_SETTINGS = {
+    'steps_per_year': 8760,  # Hourly snapshots
+    'initial_exposure': 1.0,
+    'cost_bps': 10.0,  # Paid on each unit of exposure traded
+    'cash_apy': 0.0,
+    'price_returns': True,  # Include the next step's price move (from price_change_24h) in returns
+}
+
+# Samples evaluated at once (bounds the temporaries to a few hundred MB)
+CHUNK_SAMPLES = 1 << 22
+
+
+def _segment_ids(starts: np.ndarray, total: int) -> np.ndarray:
+    ids = np.zeros(total, dtype=np.int64)
+    ids[starts[1:]] = 1
+    return np.cumsum(ids)
+
+
+def step_price_return(change_24h: np.ndarray, steps_per_year: float) -> np.ndarray:
+    """Price return over one step from a trailing 24h change (fractions)"""
+    days_per_step = 365.0 / steps_per_year
+    return np.expm1(np.log1p(np.maximum(change_24h.astype(np.float64), -0.999999)) * days_per_step)
+
+
+def evaluate_chunk(columns: Dict[str, np.ndarray], starts: np.ndarray, policy: Optional[Dict],
+                   settings: Dict) -> Dict[str, np.ndarray]:
+    """
+    Per-vault results for consecutive vaults whose samples start at `starts`
+    (relative to the column slices). policy None is buy-and-hold
+    """
+    total = len(columns['predicted_apy'])
+    lengths = np.diff(np.append(starts, total))
+    segment = _segment_ids(starts, total)
+    positions = np.arange(total)
+    initial = float(settings['initial_exposure'])
+
+    # Exposure held over each step, after that step's decision
+    if policy is None:
+        exposure = np.full(total, initial)
+    else:
+        predicted = columns['predicted_apy'].astype(np.float64)
+        change = np.abs(predicted - columns['current_apy'])
+        target = TARGET_EXPOSURE[rules.action_codes(predicted, columns['risk_score'], policy)]
+        decided = rules.should_rebalance(change, policy) & ~np.isnan(target)
+        values = np.where(decided, target, initial)
+        # Every vault's first step is a fill point too, so fills never cross vaults
+        anchor = decided.copy()
+        anchor[starts] = True
+        source = np.maximum.accumulate(np.where(anchor, positions, 0))
+        exposure = values[source]
+
+    previous = np.empty(total)
+    previous[1:] = exposure[:-1]
+    previous[starts] = initial
+    traded = np.abs(exposure - previous)
+
+    per_step = 1.0 / settings['steps_per_year']
+    asset = columns['next_apy'] / 100 * per_step
+    if settings['price_returns']:
+        asset = asset + step_price_return(columns['price_change'], settings['steps_per_year'])
+    step_return = (exposure * asset + (1 - exposure) * settings['cash_apy'] / 100 * per_step
+                   - settings['cost_bps'] / 10000 * traded)
+    growth = np.log1p(np.maximum(step_return, -0.999999))
+
+    # Log wealth since each vault's start, and its running peak (starting at 0)
+    wealth = np.cumsum(growth)
+    wealth -= (wealth - growth)[starts][segment]
+    spread = float(wealth.max() - wealth.min()) + 1.0 if total else 1.0
+    lifted = wealth + segment * spread  # Later vaults sit above every earlier peak
+    peak = np.maximum(np.maximum.accumulate(lifted) - segment * spread, 0.0)
+    drawdown = -np.expm1(wealth - peak)
+
+    log_growth = np.add.reduceat(growth, starts)
+    years = lengths * per_step
+    return {
+        'realized_apy': np.expm1(log_growth / years) * 100,
+        'total_return': np.expm1(log_growth) * 100,
+        'turnover': np.add.reduceat(traded, starts) / years,
+        'rebalances': np.add.reduceat((traded > 1e-12).astype(np.int64), starts),
+        'max_drawdown': np.maximum.reduceat(drawdown, starts) * 100,
+        'mean_exposure': np.add.reduceat(exposure, starts) / lengths,
+        'steps': lengths,
+    }
+
+
+def evaluate(cache, policy: Optional[Dict], settings: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """Per-vault results of one policy over every vault in a ReplayCache"""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    columns = {name: cache.column(name) for name in
+               ('predicted_apy', 'current_apy', 'risk_score', 'next_apy', 'price_change')}
+    offsets = cache.offsets
+    parts = []
+    first = 0
+    while first < cache.num_vaults:
+        # Whole vaults up to CHUNK_SAMPLES (at least one vault)
+        last = max(first + 1, int(np.searchsorted(offsets, offsets[first] + CHUNK_SAMPLES, side='right')) - 1)
+        last = min(last, cache.num_vaults)
+        rows = slice(int(offsets[first]), int(offsets[last]))
+        chunk = {name: np.asarray(column[rows]) for name, column in columns.items()}
+        parts.append(evaluate_chunk(chunk, offsets[first:last] - offsets[first], policy, settings))
+        first = last
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def summarize(results: Dict[str, np.ndarray]) -> Dict:
+    """Across-vault summary (equal weight per vault)"""
+    apy = results['realized_apy']
+    return {
+        'realized_apy': round(float(apy.mean()), 4),
+        'realized_apy_p10': round(float(np.percentile(apy, 10)), 4),
+        'realized_apy_p50': round(float(np.percentile(apy, 50)), 4),
+        'turnover': round(float(results['turnover'].mean()), 4),
+        'rebalances': int(results['rebalances'].sum()),
+        'rebalances_per_vault': round(float(results['rebalances'].mean()), 2),
+        'max_drawdown': round(float(results['max_drawdown'].mean()), 4),
+        'worst_drawdown': round(float(results['max_drawdown'].max()), 4),
+        'mean_exposure': round(float(results['mean_exposure'].mean()), 4),
+        'vaults': int(len(apy)),
+        'steps': int(results['steps'].sum()),
+    }
+
+
+def run_policy(cache_dir: str, name: str, policy: Optional[Dict], settings: Dict) -> Dict:
+    """Summary of one named policy (process pool entry point)"""
+    started = time.perf_counter()
+    summary = summarize(evaluate(ReplayCache(cache_dir), policy, settings))
+    summary['eval_seconds'] = round(time.perf_counter() - started, 3)
+    return {'name': name, 'policy': policy, **summary}
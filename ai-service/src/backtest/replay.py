@@ -0,0 +1,190 @@
+"""
+Replay cache: the model's prediction for every historical decision point
+
+Each shard (see training.shards) is one vault's normalized feature series.
+At step t the service would see the window of rows (t - 9 .. t), predict,
+and act until step t + 1. For every such t the cache stores, as flat
+float32 .npy columns concatenated vault after vault:
+  predicted_apy  model output (APY points, clipped like the service)
+  current_apy    APY at t
+  risk_score     risk_engine score at t
+  next_apy       APY at t + 1, the yield earned over the step
+  price_change   trailing 24h price change at t + 1 (fraction); the
+                 engine scales it to the step length
+Windows are fed to the model straight from the memory-mapped shards in
+batches, split across processes by shard, each writing its own slice of
+the output. index.json records the shards, the model version and the
+per-vault offsets; a cache whose index matches is reused as is
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services import risk_engine
+from services.pytorch_predictor import FEATURE_SCALES, FEATURE_SPEC, SEQUENCE_LENGTH
+from training.dataset import APY_COLUMN, list_shards, shard_length
+
+COLUMNS = ('predicted_apy', 'current_apy', 'risk_score', 'next_apy', 'price_change')
+INDEX_FILE = 'index.json'
+_FEATURES = {name: i for i, (name, _, _) in enumerate(FEATURE_SPEC)}
+
+
+def _raw(rows: np.ndarray, name: str) -> np.ndarray:
+    """One feature of normalized rows back in service units"""
+    column = _FEATURES[name]
+    return rows[:, column].astype(np.float64) * FEATURE_SCALES[column]
+
+
+def _fingerprint(path: str) -> List:
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _load_model(weights: str, threads: int):
+    import torch
+    from services.pytorch_predictor import PyTorchPredictor, YieldPredictionModel
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    state_dict = torch.load(weights, map_location='cpu')
+    model = YieldPredictionModel()
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model, PyTorchPredictor._state_dict_version(state_dict)
+
+
+def _replay_shards(cache_dir: str, weights: str, jobs: List[Tuple[str, int]], batch_size: int,
+                   threads: int) -> int:
+    """Fill the rows of (shard, offset) jobs in every column; returns windows replayed"""
+    import torch
+
+    model, _ = _load_model(weights, threads)
+    outputs = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r+') for name in COLUMNS}
+    replayed = 0
+    with torch.inference_mode():
+        for shard, offset in jobs:
+            series = np.load(shard, mmap_mode='r')
+            count = len(series) - SEQUENCE_LENGTH
+            # [count, window, features] view over the mapped rows; only each batch is copied
+            windows = np.lib.stride_tricks.sliding_window_view(series, SEQUENCE_LENGTH, axis=0)
+            windows = windows[:count].transpose(0, 2, 1)
+            for first in range(0, count, batch_size):
+                batch = np.ascontiguousarray(windows[first:first + batch_size], dtype=np.float32)
+                raw = model(torch.from_numpy(batch)).numpy()[:, 0]
+                rows = slice(offset + first, offset + first + len(batch))
+                outputs['predicted_apy'][rows] = np.clip(raw * 100, 0, 100)
+
+            now = series[SEQUENCE_LENGTH - 1:-1]
+            after = series[SEQUENCE_LENGTH:]
+            rows = slice(offset, offset + count)
+            outputs['current_apy'][rows] = _raw(now, 'current_apy')
+            outputs['risk_score'][rows] = risk_engine.score_risk(
+                _raw(now, 'tvl'), _raw(now, 'volatility'), _raw(now, 'liquidity'), _raw(now, 'user_count'),
+            )['risk_score']
+            outputs['next_apy'][rows] = after[:, APY_COLUMN] * FEATURE_SCALES[APY_COLUMN]
+            outputs['price_change'][rows] = _raw(after, 'price_change_24h') / 100
+            replayed += count
+    for column in outputs.values():
+        column.flush()
+    return replayed
+
+
+class ReplayCache:
+    """Read side of a replay cache directory"""
+
+    def __init__(self, cache_dir: str):
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.cache_dir = cache_dir
+        self.offsets = np.asarray(self.index['offsets'], dtype=np.int64)
+        self.vaults = [os.path.splitext(os.path.basename(path))[0] for path, _, _ in self.index['shards']]
+
+    @property
+    def num_vaults(self) -> int:
+        return len(self.vaults)
+
+    @property
+    def num_samples(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def model_version(self) -> str:
+        return self.index['model_version']
+
+    def column(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.cache_dir, f'{name}.npy'), mmap_mode='r')
+
+
+def build(data: str, weights: str, cache_dir: str, batch_size: int = 1024, workers: int = 1,
+          threads: int = 0, force: bool = False) -> Tuple[ReplayCache, Dict]:
+    """
+    Replay every shard under `data` through the model in `weights`
+    Returns the cache and a summary; reuses the cache when shards and
+    model version are unchanged (unless force)
+    """
+    shards, skipped = [], []
+    for path in list_shards(data):
+        # One window plus the step it is evaluated on
+        (shards if shard_length(path) > SEQUENCE_LENGTH else skipped).append(path)
+    if not shards:
+        raise ValueError(f"No shard under {data} is longer than {SEQUENCE_LENGTH} steps")
+    _, version = _load_model(weights, threads)
+    index = {
+        'model_version': version,
+        'weights': os.path.abspath(weights),
+        'sequence_length': SEQUENCE_LENGTH,
+        'columns': list(COLUMNS),
+        'shards': [_fingerprint(path) for path in shards],
+    }
+
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    if not force and os.path.exists(index_path):
+        with open(index_path) as f:
+            existing = json.load(f)
+        if all(existing.get(key) == index[key] for key in ('model_version', 'sequence_length', 'columns', 'shards')):
+            cache = ReplayCache(cache_dir)
+            return cache, {'reused': True, 'vaults': cache.num_vaults, 'samples': cache.num_samples,
+                           'skipped': len(skipped), 'replay_seconds': 0.0, 'windows_per_sec': None}
+
+    started = time.perf_counter()
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.exists(index_path):
+        os.remove(index_path)  # Stale until the new columns are complete
+    counts = np.array([shard_length(path) - SEQUENCE_LENGTH for path in shards], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    for name in COLUMNS:
+        np.lib.format.open_memmap(os.path.join(cache_dir, f'{name}.npy'), mode='w+', dtype=np.float32,
+                                  shape=(int(offsets[-1]),)).flush()
+
+    # Deal shards round-robin, largest first, so workers get similar amounts of work
+    jobs = [[] for _ in range(max(1, min(workers, len(shards))))]
+    for rank, i in enumerate(np.argsort(-counts, kind='stable')):
+        jobs[rank % len(jobs)].append((shards[i], int(offsets[i])))
+    if len(jobs) == 1:
+        replayed = _replay_shards(cache_dir, weights, jobs[0], batch_size, threads)
+    else:
+        threads = threads or max(1, (os.cpu_count() or 1) // len(jobs))
+        with ProcessPoolExecutor(len(jobs), mp_context=get_context('spawn')) as pool:
+            replayed = sum(pool.map(_replay_shards, [cache_dir] * len(jobs), [weights] * len(jobs), jobs,
+                                    [batch_size] * len(jobs), [threads] * len(jobs)))
+    seconds = time.perf_counter() - started
+
+    index['offsets'] = offsets.tolist()
+    index['built_at'] = time.time()
+    temporary = index_path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(index, f)
+    os.replace(temporary, index_path)
+    return ReplayCache(cache_dir), {
+        'reused': False,
+        'vaults': len(shards),
+        'samples': replayed,
+        'skipped': len(skipped),
+        'replay_seconds': round(seconds, 3),
+        'windows_per_sec': round(replayed / seconds) if seconds > 0 else None,
+    }
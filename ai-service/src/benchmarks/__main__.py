@@ -0,0 +1,151 @@
+"""
+Offline benchmark suite for the AI service
+Run from src/:
+    python -m benchmarks --out benchmarks/results/latest.json
+    python -m benchmarks --baseline benchmarks/baseline.json --fail-on-regression
+    python -m benchmarks --suite workers --worker-counts 1,2,4   (server subprocesses; not in "all")
+    python -m benchmarks --suite overload --deadline-ms 100      (floods past capacity; not in "all")
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+import numpy as np
+
+
+def _ints(value: str):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark predictor internals and /api/ai routes")
+    parser.add_argument('--suite', default='all',
+                        choices=('all', 'micro', 'load', 'bulk', 'mc', 'portfolio', 'enrich', 'workers',
+                                 'overload'))
+    parser.add_argument('--iterations', type=int, default=500, help="Calls per microbenchmark")
+    parser.add_argument('--batch-sizes', type=_ints, default=[1, 8, 64, 256])
+    parser.add_argument('--requests', type=int, default=200, help="Requests per route and concurrency level")
+    parser.add_argument('--concurrency', type=_ints, default=[1, 8, 32])
+    parser.add_argument('--bulk-sizes', type=_ints, default=[1000, 10000], help="Vaults per bulk request")
+    parser.add_argument('--bulk-repeats', type=int, default=5)
+    parser.add_argument('--mc-samples', type=_ints, default=[4, 8, 16, 32, 64, 128],
+                        help="Monte Carlo dropout samples per vault")
+    parser.add_argument('--mc-batch-sizes', type=_ints, default=[1, 64])
+    parser.add_argument('--portfolio-sizes', type=_ints, default=[100, 1000, 5000], help="Vaults per allocation")
+    parser.add_argument('--enrich-requests', type=int, default=1000, help="Single-vault enrich calls per pass")
+    parser.add_argument('--enrich-concurrency', type=int, default=32)
+    parser.add_argument('--enrich-budget-ms', type=float, default=25, help="Enrichment latency budget")
+    parser.add_argument('--source-latency-ms', type=float, default=5, help="Stub market-data source latency")
+    parser.add_argument('--worker-counts', type=_ints, default=[1, 2, 4])
+    parser.add_argument('--worker-modes', default='prefork,uvicorn', help="prefork and/or uvicorn")
+    parser.add_argument('--worker-requests', type=int, default=1000, help="Requests per worker configuration")
+    parser.add_argument('--worker-concurrency', type=int, default=16)
+    parser.add_argument('--overload-requests', type=int, default=2000, help="Requests per overload run")
+    parser.add_argument('--overload-concurrency', type=int, default=256)
+    parser.add_argument('--deadline-ms', type=float, default=100, help="X-Deadline-Ms budget of the overload runs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help="Write the JSON report here")
+    parser.add_argument('--baseline', default=None, help="Compare against this JSON report")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Regression threshold (0.1 = 10%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help="Ignore p50 shifts smaller than this")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    import torch
+    from benchmarks import report
+    from benchmarks.load import run_bulk, run_load, run_overload
+    from benchmarks.micro import run_mc_dropout, run_micro, run_portfolio
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+
+    started = time.time()
+    results = {}
+    if args.suite in ('all', 'load'):
+        # The app's lifespan builds and warms the shared predictor
+        from main import app
+        results.update(asyncio.run(run_load(app, args.requests, args.concurrency, seed=args.seed)))
+    if args.suite in ('all', 'bulk'):
+        from main import app
+        results.update(asyncio.run(run_bulk(app, args.bulk_sizes, args.bulk_repeats, seed=args.seed)))
+    if args.suite == 'overload':
+        from main import app
+        results.update(asyncio.run(run_overload(app, args.overload_requests, args.overload_concurrency,
+                                                args.deadline_ms, seed=args.seed)))
+    if args.suite == 'workers':
+        from benchmarks.workers import run_workers
+        modes = [mode.strip() for mode in args.worker_modes.split(',') if mode.strip()]
+        results.update(run_workers(args.worker_counts, args.worker_requests, args.worker_concurrency,
+                                   modes, seed=args.seed))
+    if args.suite in ('all', 'micro'):
+        from services.model_loader import model_loader
+        if not model_loader.wait():
+            print(f"❌ Model failed to load: {model_loader.error}")
+            return 1
+        results.update(run_micro(model_loader.get(), args.iterations, args.batch_sizes, args.seed))
+    if args.suite in ('all', 'mc'):
+        from services.model_loader import model_loader
+        if not model_loader.wait():
+            print(f"❌ Model failed to load: {model_loader.error}")
+            return 1
+        results.update(run_mc_dropout(model_loader.get(), args.mc_samples, args.mc_batch_sizes,
+                                      max(5, args.iterations // 10), args.seed))
+
+    if args.suite in ('all', 'portfolio'):
+        results.update(run_portfolio(args.portfolio_sizes, max(3, args.iterations // 50), args.seed))
+    if args.suite in ('all', 'enrich'):
+        from benchmarks.enrich import run_enrich
+        results.update(run_enrich(args.enrich_requests, args.enrich_concurrency, args.source_latency_ms,
+                                  args.enrich_budget_ms, seed=args.seed))
+
+    output = {
+        'started_at': started,
+        'duration_seconds': round(time.time() - started, 2),
+        'environment': report.environment(),
+        'parameters': {
+            'suite': args.suite,
+            'iterations': args.iterations,
+            'batch_sizes': args.batch_sizes,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'bulk_sizes': args.bulk_sizes,
+            'bulk_repeats': args.bulk_repeats,
+            'mc_samples': args.mc_samples,
+            'mc_batch_sizes': args.mc_batch_sizes,
+            'portfolio_sizes': args.portfolio_sizes,
+            'enrich_requests': args.enrich_requests,
+            'enrich_concurrency': args.enrich_concurrency,
+            'enrich_budget_ms': args.enrich_budget_ms,
+            'source_latency_ms': args.source_latency_ms,
+            'worker_counts': args.worker_counts,
+            'worker_modes': args.worker_modes,
+            'worker_requests': args.worker_requests,
+            'worker_concurrency': args.worker_concurrency,
+            'overload_requests': args.overload_requests,
+            'overload_concurrency': args.overload_concurrency,
+            'deadline_ms': args.deadline_ms,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    report.print_results(results)
+    if args.out:
+        report.save(output, args.out)
+        print(f"\nSaved {args.out}")
+
+    if args.baseline:
+        rows = report.compare(output, report.load(args.baseline), args.threshold, args.min_delta_ms)
+        report.print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row['regression']]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
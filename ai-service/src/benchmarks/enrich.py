@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Dict, List, Sequence
+
+from benchmarks.market_stub import StubMarketData, stub_record
+from benchmarks.report import summarize
+
+
+def _vaults(count: int, distinct: int, seed: int) -> List[Dict]:
+    # VaultData-shaped: only the fields requests carry, so every feature is looked up
+    return [{'address': f'0x{seed:04x}{i % distinct:036x}', 'tvl': 1e6, 'current_apy': 8.0} for i in range(count)]
+
+
+async def _closed_loop(client, vaults: List[Dict], concurrency: int) -> Dict:
+    """enrich() one vault per call from `concurrency` callers; latency per call"""
+    samples, filled, wrong = [], 0, 0
+    cursor = iter(vaults)
+
+    async def caller():
+        nonlocal filled, wrong
+        for vault in cursor:
+            started = time.perf_counter()
+            enriched = (await client.enrich([vault]))[0]
+            samples.append(time.perf_counter() - started)
+            if 'volume_24h' in enriched:
+                filled += 1
+                wrong += enriched['volume_24h'] != stub_record(vault['address'])['volume_24h']
+
+    started = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(concurrency)])
+    result = summarize(samples, wall_seconds=time.perf_counter() - started)
+    result['filled'] = round(filled / len(vaults), 4)
+    result['mismatched'] = wrong
+    return result
+
+
+async def _scenario(name: str, stub: StubMarketData, vaults: List[Dict], concurrency: int, budget_ms: float,
+                    bulk_size: int, passes: Sequence[str] = ('cold', 'warm')) -> Dict[str, Dict]:
+    from services.market_data import MarketDataClient
+
+    client = MarketDataClient(stub.url, budget_ms=budget_ms, bulk_size=bulk_size)
+    await client.start()
+    results = {}
+    try:
+        for label in passes:
+            requests_before, coalesced_before = stub.requests, client.coalesced
+            result = await _closed_loop(client, vaults, concurrency)
+            result['source_requests'] = stub.requests - requests_before
+            result['coalesced'] = client.coalesced - coalesced_before
+            results[f'enrich/{name}/{label}[c={concurrency}]'] = result
+            await asyncio.sleep(stub.latency + 0.05)  # Let late fetches land before the next pass
+    finally:
+        await client.close()
+    return results
+
+
+async def _bulk(stub: StubMarketData, sizes: Sequence[int], budget_ms: float, bulk_size: int, seed: int):
+    from services.market_data import MarketDataClient
+
+    results = {}
+    for size in sizes:
+        client = MarketDataClient(stub.url, budget_ms=budget_ms, bulk_size=bulk_size)
+        await client.start()
+        vaults = _vaults(size, size, seed)
+        try:
+            for label in ('cold', 'warm'):
+                requests_before = stub.requests
+                started = time.perf_counter()
+                enriched = await client.enrich(vaults)
+                result = summarize([time.perf_counter() - started], items_per_sample=size)
+                result['filled'] = round(sum('volume_24h' in vault for vault in enriched) / size, 4)
+                result['source_requests'] = stub.requests - requests_before
+                results[f'enrich/bulk/{label}[n={size}]'] = result
+        finally:
+            await client.close()
+    return results
+
+
+async def _run(requests: int, concurrency: int, latency_ms: float, budget_ms: float, bulk_size: int,
+               bulk_sizes: Sequence[int], seed: int) -> Dict[str, Dict]:
+    # A quarter as many addresses as requests, so concurrent callers overlap
+    vaults = _vaults(requests, max(1, requests // 4), seed)
+    results = {}
+    with StubMarketData(latency_ms=latency_ms) as stub:
+        results.update(await _scenario('source', stub, vaults, concurrency, budget_ms, bulk_size))
+        results.update(await _bulk(stub, bulk_sizes, max(budget_ms, 1000), bulk_size, seed))
+    with StubMarketData(latency_ms=budget_ms * 4) as stub:
+        results.update(await _scenario('slow_source', stub, vaults, concurrency, budget_ms, bulk_size))
+    with StubMarketData(failing=True) as stub:
+        results.update(await _scenario('source_down', stub, vaults, concurrency, budget_ms, bulk_size,
+                                       passes=('cold',)))
+    return results
+
+
+def run_enrich(requests: int = 1000, concurrency: int = 32, latency_ms: float = 5, budget_ms: float = 25,
+               bulk_size: int = 500, bulk_sizes: Sequence[int] = (10000,), seed: int = 0) -> Dict[str, Dict]:
+    """
+    Latency added by market-data enrichment against a local stub source:
+    single-vault calls from concurrent callers (cold, then warm cache), a
+    source slower than the budget, a failing source, and bulk lookups
+    """
+    return asyncio.run(_run(requests, concurrency, latency_ms, budget_ms, bulk_size, bulk_sizes, seed))
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from benchmarks.micro import random_vaults
+from benchmarks.report import summarize
+
+# Route -> payload builder for one vault snapshot
+ROUTES = {
+    'predict-apy': lambda vault: vault,
+    'analyze-risk': lambda vault: vault,
+    'generate-strategy': lambda vault: {
+        'vault_data': vault,
+        'user_preferences': {'risk_tolerance': 'medium', 'auto_rebalance': True, 'max_slippage': 1.0},
+    },
+    'should-rebalance': lambda vault: {
+        'vault_data': vault,
+        'user_preferences': {'risk_tolerance': 'medium', 'auto_rebalance': True, 'max_slippage': 1.0},
+    },
+}
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b'',
+                       headers: Sequence[Tuple[bytes, bytes]] = (),
+                       content_type: bytes = b'application/json') -> Tuple[int, Dict, bytes]:
+    """
+    Call an ASGI app directly, without sockets or an HTTP client
+    Returns (status, response headers, body)
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', b'benchmark'),
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status, response_headers, chunks = 0, {}, []
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            response_headers.update((k.decode(), v.decode()) for k, v in message.get('headers', []))
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, response_headers, b''.join(chunks)
+
+
+async def wait_ready(app, timeout: float = 120):
+    """Poll /ready until the model finished loading"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, _, body = await asgi_request(app, 'GET', '/ready')
+        if status == 200:
+            return json.loads(body)
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"Model not ready after {timeout}s")
+
+
+async def _load_level(app, path: str, payloads: List[bytes], concurrency: int) -> Dict:
+    samples, statuses = [], Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(payloads):
+            body = payloads[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            status, _, _ = await asgi_request(app, 'POST', path, body)
+            samples.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    ok = statuses.get(200, 0)
+    result = summarize(samples, wall_seconds=wall)
+    result.update({
+        'concurrency': concurrency,
+        'errors': len(samples) - ok,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+    })
+    return result
+
+
+async def run_load(app, requests_per_level: int = 200, concurrency_levels: Sequence[int] = (1, 8, 32),
+                   routes: Sequence[str] = tuple(ROUTES), seed: int = 0) -> Dict[str, Dict]:
+    """
+    Closed-loop load test of the /api/ai routes through the ASGI app
+    Each level keeps `concurrency` requests in flight; payloads are distinct
+    so the prediction cache does not serve them
+    """
+    results = {}
+    async with app.router.lifespan_context(app):
+        await wait_ready(app)
+        for route_index, route in enumerate(routes):
+            path = f'/api/ai/{route}'
+            for level_index, concurrency in enumerate(concurrency_levels):
+                vaults = random_vaults(requests_per_level, seed=seed + 1 + route_index * 100 + level_index)
+                payloads = [json.dumps(ROUTES[route](vault)).encode() for vault in vaults]
+                results[f'load/{route}[c={concurrency}]'] = await _load_level(app, path, payloads, concurrency)
+    return results
+
+
+# Bulk routes covered by the wire-format benchmark
+BULK_ROUTES = ('predict-apy/batch', 'analyze-risk/batch', 'should-rebalance/batch')
+
+
+async def run_bulk(app, sizes: Sequence[int] = (1000, 10000), repeats: int = 5,
+                   routes: Sequence[str] = BULK_ROUTES, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Bulk route latency and response size per wire format: JSON rows in and
+    out, then MessagePack / Arrow columns in and out (when installed)
+    """
+    import numpy as np
+    from services import columnar
+
+    formats = [media for media in columnar.available_formats() if media != columnar.JSON]
+    results = {}
+    async with app.router.lifespan_context(app):
+        await wait_ready(app)
+        for route in routes:
+            path = f'/api/ai/{route}'
+            for size in sizes:
+                vaults = random_vaults(size, seed=seed + size)
+                bodies = {columnar.JSON: (json.dumps({'vaults': vaults}).encode(), columnar.JSON)}
+                if columnar.MSGPACK in formats:
+                    import msgpack
+                    request = msgpack.packb({'columns': {
+                        'address': [vault['address'] for vault in vaults],
+                        'tvl': columnar.numeric_column(np.array([vault['tvl'] for vault in vaults])),
+                        'current_apy': columnar.numeric_column(np.array([vault['current_apy'] for vault in vaults])),
+                    }}, use_bin_type=True)
+                    for media in formats:
+                        bodies[media] = (request, columnar.MSGPACK)
+
+                for media, (body, content_type) in bodies.items():
+                    samples, response_bytes, statuses = [], 0, Counter()
+                    for _ in range(repeats):
+                        started = time.perf_counter()
+                        status, _, content = await asgi_request(
+                            app, 'POST', path, body, [(b'accept', media.encode())], content_type.encode())
+                        samples.append(time.perf_counter() - started)
+                        response_bytes = len(content)
+                        statuses[status] += 1
+                    result = summarize(samples, items_per_sample=size)
+                    result.update({
+                        'request_bytes': len(body),
+                        'response_bytes': response_bytes,
+                        'errors': repeats - statuses.get(200, 0),
+                    })
+                    results[f'bulk/{route}[n={size},{media.rsplit("/", 1)[-1]}]'] = result
+    return results
+
+
+# Routes the backend floods during market spikes
+OVERLOAD_ROUTES = ('should-rebalance', 'generate-strategy')
+
+
+async def run_overload(app, requests: int = 2000, concurrency: int = 256, deadline_ms: float = 100,
+                       routes: Sequence[str] = OVERLOAD_ROUTES, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Closed-loop flood past the pool's capacity, without and with an
+    X-Deadline-Ms budget: latency of the answers, how many were model
+    answers, degraded answers or rejections, and how many arrived after
+    the deadline (work nobody was waiting for any more)
+    """
+    results = {}
+    async with app.router.lifespan_context(app):
+        await wait_ready(app)
+        for route_index, route in enumerate(routes):
+            path = f'/api/ai/{route}'
+            for mode, headers in (('no-deadline', []), (f'deadline={deadline_ms:g}ms',
+                                                         [(b'x-deadline-ms', str(deadline_ms).encode())])):
+                vaults = random_vaults(requests, seed=seed + 1 + route_index * 100 + len(headers))
+                payloads = [json.dumps(ROUTES[route](vault)).encode() for vault in vaults]
+                samples, statuses, degraded = [], Counter(), 0
+                next_index = 0
+
+                async def worker():
+                    nonlocal next_index, degraded
+                    while next_index < len(payloads):
+                        body = payloads[next_index]
+                        next_index += 1
+                        started = time.perf_counter()
+                        status, _, content = await asgi_request(app, 'POST', path, body, headers)
+                        samples.append(time.perf_counter() - started)
+                        statuses[status] += 1
+                        if status == 200 and b'"degraded"' in content:
+                            degraded += 1
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                wall = time.perf_counter() - started
+
+                result = summarize(samples, wall_seconds=wall)
+                result.update({
+                    'concurrency': concurrency,
+                    'model_answers': statuses.get(200, 0) - degraded,
+                    'degraded': degraded,
+                    'rejected': len(samples) - statuses.get(200, 0),
+                    'late': sum(1 for sample in samples if sample * 1000 > deadline_ms),
+                    'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+                })
+                results[f'overload/{route}[{mode}]'] = result
+                print(f"  {route} {mode}: {result['model_answers']} model, {degraded} degraded, "
+                      f"{result['rejected']} rejected, {result['late']} late")
+    return results
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+def stub_record(address: str) -> Dict:
+    """Deterministic market data for an address (same values on every call)"""
+    digest = hashlib.sha256(address.strip().lower().encode()).digest()
+    unit = [byte / 255 for byte in digest[:7]]
+    return {
+        'volume_24h': round(unit[0] * 5e6, 2),
+        'volatility': round(1 + unit[1] * 59, 4),
+        'user_count': int(1 + unit[2] * 4999),
+        'total_shares': round(unit[3] * 5e7, 2),
+        'price_change_24h': round((unit[4] - 0.5) * 20, 4),
+        'liquidity': round(1e3 + unit[5] * 2e7, 2),
+        'fee_bps': int(unit[6] * 300),
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like a real source behind a pooled client
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('content-length', 0)))
+        addresses = json.loads(body or b'{}').get('addresses', [])
+        with stub['requests'].get_lock():
+            stub['requests'].value += 1
+            stub['addresses'].value += len(addresses)
+        if stub['latency']:
+            time.sleep(stub['latency'])
+        if stub['failing']:
+            self._reply(503, {'detail': 'unavailable'})
+            return
+        prefix = stub['unknown_prefix']
+        self._reply(200, {'vaults': {
+            address: stub_record(address) for address in addresses
+            if not (prefix and address.startswith(prefix))
+        }})
+
+    def _reply(self, status: int, payload: Dict):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Bulk lookups open a pool's worth of connections at once
+
+
+def _serve(stub: Dict, ready):
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.stub = stub
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+class StubMarketData:
+    """
+    Local market-data source speaking the bulk protocol of
+    services.market_data, for benchmarks and manual tests. Runs in its own
+    process, so serving does not compete with the client's event loop
+    Every request sleeps latency_ms; addresses starting with unknown_prefix
+    are left out of responses, and failing=True answers 503
+        with StubMarketData(latency_ms=5) as stub:
+            client = MarketDataClient(stub.url)
+    """
+    def __init__(self, latency_ms: float = 0, unknown_prefix: Optional[str] = None, failing: bool = False):
+        self.latency = latency_ms / 1000
+        context = multiprocessing.get_context('spawn')
+        self._stub = {
+            'latency': self.latency,
+            'unknown_prefix': unknown_prefix,
+            'failing': failing,
+            'requests': context.Value('q', 0),
+            'addresses': context.Value('q', 0),
+        }
+        self._receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_serve, args=(self._stub, sender), name='market-data-stub',
+                                         daemon=True)
+        self.port = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/vaults/batch'
+
+    @property
+    def requests(self) -> int:
+        return self._stub['requests'].value
+
+    @property
+    def addresses(self) -> int:
+        return self._stub['addresses'].value
+
+    def __enter__(self) -> 'StubMarketData':
+        self._process.start()
+        self.port = self._receiver.recv()
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
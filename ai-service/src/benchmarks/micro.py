@@ -0,0 +1,152 @@
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from benchmarks.report import summarize
+
+
+def random_vaults(count: int, seed: int = 0) -> List[Dict]:
+    """Deterministic vault snapshots with realistic value ranges"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'address': f'0x{seed:04x}{i:036x}',
+            'tvl': float(rng.uniform(1e4, 5e7)),
+            'current_apy': float(rng.uniform(0.5, 40)),
+            'volume_24h': float(rng.uniform(0, 5e6)),
+            'volatility': float(rng.uniform(1, 60)),
+            'user_count': int(rng.integers(1, 5000)),
+            'liquidity': float(rng.uniform(1e3, 2e7)),
+            'asset_symbol': 'ETH',
+        }
+        for i in range(count)
+    ]
+
+
+def _time_calls(fn: Callable[[int], object], iterations: int, warmup: int) -> List[float]:
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(warmup + i)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run_micro(predictor, iterations: int = 500, batch_sizes: Sequence[int] = (1, 8, 64, 256),
+              seed: int = 0) -> Dict[str, Dict]:
+    """
+    Microbenchmarks of the predictor internals
+    Every call gets a distinct vault, so the prediction cache never hits
+    """
+    import torch
+    from services.pytorch_predictor import SEQUENCE_LENGTH, NUM_FEATURES
+    from services.reasoning_engine import ReasoningEngine
+
+    warmup = max(1, iterations // 10)
+    vaults = random_vaults(iterations + warmup, seed)
+    reasoning_engine = ReasoningEngine()
+    results = {}
+
+    results['micro/preprocess_data'] = summarize(
+        _time_calls(lambda i: predictor.preprocess_data(vaults[i]), iterations, warmup)
+    )
+
+    generator = torch.Generator().manual_seed(seed)
+    for size in batch_sizes:
+        batch = torch.rand(size, SEQUENCE_LENGTH, NUM_FEATURES, generator=generator)
+        # Large batches are slow enough that fewer repeats are stable
+        repeats = max(20, iterations * 8 // max(size, 8))
+        results[f'micro/forward[b={size}]'] = summarize(
+            _time_calls(lambda i: predictor._forward(batch), repeats, max(1, repeats // 10)),
+            items_per_sample=size,
+        )
+
+    results['micro/predict_risk_score'] = summarize(
+        _time_calls(lambda i: predictor.predict_risk_score(vaults[i]), iterations, warmup)
+    )
+
+    predictions = [{'predicted_apy': vault['current_apy']} for vault in vaults]
+    risks = [predictor.predict_risk_score(vault) for vault in vaults[:64]]
+    results['micro/generate_reasoning[predict]'] = summarize(
+        _time_calls(lambda i: reasoning_engine.generate_reasoning('predict', predictions[i]), iterations, warmup)
+    )
+    results['micro/generate_reasoning[risk_analysis]'] = summarize(
+        _time_calls(lambda i: reasoning_engine.generate_reasoning('risk_analysis', risks[i % len(risks)]),
+                    iterations, warmup)
+    )
+    return results
+
+
+def run_mc_dropout(predictor, samples: Sequence[int] = (4, 8, 16, 32, 64, 128),
+                   batch_sizes: Sequence[int] = (1, 64), iterations: int = 50, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Monte Carlo dropout cost as K grows: one expanded [B*K] pass per call
+    (throughput in vaults/s), plus K sequential [B] passes at the largest K
+    for comparison
+    """
+    import torch
+    from services.pytorch_predictor import SEQUENCE_LENGTH, NUM_FEATURES
+    from services.uncertainty import MonteCarloDropout
+
+    sampler = predictor.active.sampler
+    uncertainty = predictor.uncertainty or MonteCarloDropout()
+    forward = lambda batch: uncertainty.forward(sampler, batch)
+    generator = torch.Generator().manual_seed(seed)
+    results = {}
+    for size in batch_sizes:
+        batch = torch.rand(size, SEQUENCE_LENGTH, NUM_FEATURES, generator=generator)
+        for k in samples:
+            repeats = max(5, iterations * 32 // max(k * size // 8, 32))
+            result = summarize(
+                _time_calls(lambda i: uncertainty.sample(batch, k, forward), repeats, max(1, repeats // 10)),
+                items_per_sample=size,
+            )
+            result['ms_per_vault'] = round(result['p50_ms'] / size, 4)
+            results[f'mc_dropout/batched[b={size},k={k}]'] = result
+
+        k = max(samples)
+
+        def sequential(i):
+            with torch.no_grad():
+                for _ in range(k):
+                    sampler(batch)
+
+        repeats = max(5, iterations * 32 // max(k * size // 8, 32))
+        result = summarize(_time_calls(sequential, repeats, 1), items_per_sample=size)
+        result['ms_per_vault'] = round(result['p50_ms'] / size, 4)
+        results[f'mc_dropout/sequential[b={size},k={k}]'] = result
+    return results
+
+
+def run_portfolio(sizes: Sequence[int] = (100, 1000, 5000), repeats: int = 10, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Portfolio solver time per vault-universe size and risk tolerance, on
+    synthetic APYs, risk scores and a covariance estimated from 10-step APY
+    histories for half of the vaults (throughput in vaults/s)
+    """
+    from services import portfolio
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    for size in sizes:
+        apy = rng.uniform(2, 25, size)
+        risk = rng.uniform(10, 90, size)
+        histories = [apy[i] + np.cumsum(rng.normal(0, 1, 10)) if i % 2 == 0 else None for i in range(size)]
+        covariance = portfolio.estimate_covariance(rng.uniform(1, 15, size), histories, rng.uniform(0, 2, size))
+        depth = rng.uniform(1e5, 5e7, size)
+        current = np.zeros(size)
+        for tolerance in portfolio.RISK_PROFILES:
+            solved = {}
+
+            def solve(i):
+                solved.update(portfolio.optimize(apy, risk, covariance, current, depth, 1e6, tolerance, 1.0,
+                                                 time_budget_ms=10000))
+
+            result = summarize(_time_calls(solve, repeats, 1), items_per_sample=size)
+            result['iterations'] = solved['iterations']
+            result['converged'] = solved['converged']
+            results[f'portfolio/{tolerance}[n={size}]'] = result
+    return results
@@ -0,0 +1,114 @@
+import json
+import os
+import platform
+import subprocess
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def summarize(samples: List[float], items_per_sample: int = 1, wall_seconds: Optional[float] = None) -> Dict:
+    """
+    Latency percentiles (ms) and throughput for per-call durations in seconds
+    wall_seconds overrides the throughput denominator for concurrent runs,
+    where calls overlap and their durations do not add up
+    """
+    timings = np.asarray(samples, dtype=np.float64) * 1000
+    total = wall_seconds if wall_seconds is not None else float(np.sum(timings)) / 1000
+    return {
+        'samples': len(timings),
+        'mean_ms': round(float(np.mean(timings)), 4),
+        'p50_ms': round(float(np.percentile(timings, 50)), 4),
+        'p95_ms': round(float(np.percentile(timings, 95)), 4),
+        'p99_ms': round(float(np.percentile(timings, 99)), 4),
+        'throughput_per_s': round(len(timings) * items_per_sample / total, 2) if total > 0 else 0.0,
+    }
+
+
+def environment() -> Dict:
+    """Hardware and software context recorded next to the results"""
+    import torch
+    import config
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'numpy': np.__version__,
+        'torch_num_threads': torch.get_num_threads(),
+        'inference_backend': config.INFERENCE_BACKEND,
+        'batch_enabled': config.BATCH_ENABLED,
+        'cache_enabled': config.CACHE_ENABLED,
+        'executor_mode': config.EXECUTOR_MODE,
+    }
+
+
+def save(report: Dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.1, min_delta_ms: float = 0.05) -> List[Dict]:
+    """
+    Per-benchmark changes against a baseline report
+    A benchmark regresses when its p50 latency grows, or its throughput
+    drops, by more than threshold (0.1 = 10%). p50 shifts below
+    min_delta_ms are treated as timer noise
+    """
+    rows = []
+    for name, result in sorted(current['results'].items()):
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        latency_change = _change(result['p50_ms'], reference['p50_ms'])
+        throughput_change = _change(result['throughput_per_s'], reference['throughput_per_s'])
+        significant = abs(result['p50_ms'] - reference['p50_ms']) >= min_delta_ms
+        rows.append({
+            'benchmark': name,
+            'p50_ms': result['p50_ms'],
+            'baseline_p50_ms': reference['p50_ms'],
+            'p50_change': latency_change,
+            'throughput_per_s': result['throughput_per_s'],
+            'baseline_throughput_per_s': reference['throughput_per_s'],
+            'throughput_change': throughput_change,
+            'regression': significant and (latency_change > threshold or throughput_change < -threshold),
+        })
+    return rows
+
+
+def _change(value: float, reference: float) -> float:
+    if not reference:
+        return 0.0
+    return round((value - reference) / reference, 4)
+
+
+def print_results(results: Dict):
+    print(f"{'benchmark':<44} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>12}")
+    for name, result in results.items():
+        print(f"{name:<44} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+              f"{result['p99_ms']:>10.3f} {result['throughput_per_s']:>12.1f}")
+
+
+def print_comparison(rows: List[Dict], threshold: float):
+    print(f"\nAgainst baseline (regression threshold {threshold:.0%}):")
+    for row in rows:
+        flag = '❌' if row['regression'] else '  '
+        print(f"{flag} {row['benchmark']:<44} p50 {row['p50_change']:+8.1%}   "
+              f"throughput {row['throughput_change']:+8.1%}")
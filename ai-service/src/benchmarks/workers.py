@@ -0,0 +1,196 @@
+"""
+Memory and throughput per worker count, over real HTTP
+Each configuration is started as a server subprocess:
+    prefork  python main.py --workers N (shared weights, see services.worker_supervisor)
+    uvicorn  python -m uvicorn main:app --workers N (every worker imports and loads on its own)
+Memory is summed over the whole process tree: RSS counts shared pages once
+per process, PSS splits them between the processes mapping them, so PSS is
+what the workers actually cost together
+"""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Sequence
+
+from benchmarks.micro import random_vaults
+from benchmarks.report import summarize
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('prefork', 'uvicorn')
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _command(mode: str, workers: int, port: int) -> List[str]:
+    if mode == 'prefork':
+        return [sys.executable, 'main.py', '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)]
+    return [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning']
+
+
+def _descendants(pid: int) -> List[int]:
+    found, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        found.append(current)
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return found
+
+
+def process_tree_memory(pid: int) -> Dict:
+    """RSS, PSS and USS (private) of a process and its descendants, in MB (Linux)"""
+    totals = Counter()
+    processes = 0
+    for member in _descendants(pid):
+        try:
+            with open(f'/proc/{member}/smaps_rollup') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+        except OSError:
+            continue
+        kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith('kB')}
+        totals['rss'] += kb.get('Rss', 0)
+        totals['pss'] += kb.get('Pss', 0)
+        totals['uss'] += kb.get('Private_Clean', 0) + kb.get('Private_Dirty', 0)
+        processes += 1
+    return {
+        'processes': processes,
+        'rss_mb': round(totals['rss'] / 1024, 1),
+        'pss_mb': round(totals['pss'] / 1024, 1),
+        'uss_mb': round(totals['uss'] / 1024, 1),
+    }
+
+
+def _get_json(port: int, path: str, timeout: float = 5):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        connection.close()
+
+
+def wait_workers_ready(port: int, workers: int, timeout: float = 180) -> float:
+    """
+    Poll /ready on fresh connections until `workers` distinct processes
+    answered ready; returns the seconds waited
+    """
+    started = time.monotonic()
+    ready = set()
+    while len(ready) < workers:
+        if time.monotonic() - started > timeout:
+            raise TimeoutError(f"{len(ready)}/{workers} workers ready after {timeout}s")
+        try:
+            status, body = _get_json(port, '/ready')
+            if status == 200:
+                ready.add(body['pid'])
+                continue
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(0.05)
+    return time.monotonic() - started
+
+
+def drive(port: int, path: str, payloads: List[bytes], concurrency: int) -> Dict:
+    """Closed-loop HTTP load, one keep-alive connection per client thread"""
+    samples, statuses = [], Counter()
+    lock = threading.Lock()
+    next_index = [0]
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        headers = {'Content-Type': 'application/json'}
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= len(payloads):
+                break
+            started = time.perf_counter()
+            try:
+                connection.request('POST', path, payloads[index], headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = 0
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+                statuses[status] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    result = summarize(samples, wall_seconds=wall)
+    result['errors'] = len(samples) - statuses.get(200, 0)
+    return result
+
+
+def run_workers(worker_counts: Sequence[int] = (1, 2, 4), requests: int = 1000, concurrency: int = 16,
+                modes: Sequence[str] = MODES, route: str = 'predict-apy', seed: int = 0) -> Dict[str, Dict]:
+    """
+    Startup time, process-tree memory and predict throughput per launch
+    mode and worker count
+    """
+    results = {}
+    for mode in modes:
+        for workers in worker_counts:
+            port = _free_port()
+            # The scanner is per process, which multi-worker mode rejects
+            server = subprocess.Popen(_command(mode, workers, port), cwd=SRC_DIR,
+                                      env={**os.environ, 'AI_SCANNER_ENABLED': 'false'},
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                startup = wait_workers_ready(port, workers)
+                idle = process_tree_memory(server.pid)
+                vaults = random_vaults(requests, seed=seed + workers)
+                payloads = [json.dumps(vault).encode() for vault in vaults]
+                result = drive(port, f'/api/ai/{route}', payloads, concurrency)
+                loaded = process_tree_memory(server.pid)
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=60)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+                    server.wait()
+
+            result.update({
+                'workers': workers,
+                'startup_seconds': round(startup, 2),
+                'idle_rss_mb': idle['rss_mb'],
+                'idle_pss_mb': idle['pss_mb'],
+                'rss_mb': loaded['rss_mb'],
+                'pss_mb': loaded['pss_mb'],
+                'uss_mb': loaded['uss_mb'],
+                'pss_mb_per_worker': round(loaded['pss_mb'] / workers, 1),
+                'throughput_per_worker': round(result['throughput_per_s'] / workers, 2),
+            })
+            results[f'workers/{mode}[n={workers}]'] = result
+            print(f"  {mode:<8} n={workers}: ready in {startup:.1f}s, PSS {loaded['pss_mb']:.0f} MB "
+                  f"(RSS {loaded['rss_mb']:.0f} MB), {result['throughput_per_s']:.0f} req/s")
+    return results
@@ -0,0 +1,77 @@
+"""
+Import-time budget check for main.py
+Importing main must stay fast and must not pull in torch; the model is
+loaded in the background by the FastAPI lifespan hook (services.model_loader)
+
+Usage (from src/): python check_import_time.py [--budget-ms 1500] [--repeats 3]
+Exits non-zero when the budget is exceeded
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import config
+
+# Modules that belong to the background model load, never the import path
+FORBIDDEN_MODULES = ('torch',)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+
+def _measure(src_dir: str) -> dict:
+    # Fresh interpreter each time so nothing is already imported
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE], cwd=src_dir, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _slowest_imports(src_dir: str, limit: int = 10) -> list:
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=src_dir, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check that importing main.py stays within budget")
+    parser.add_argument('--budget-ms', type=float, default=config.IMPORT_BUDGET_MS)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    runs = [_measure(src_dir) for _ in range(max(1, args.repeats))]
+    best_ms = min(run['ms'] for run in runs)  # Least noisy estimate
+    modules = set(runs[0]['modules'])
+    loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+
+    print(f"import main: {best_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if loaded:
+        print(f"❌ Heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print("❌ Import time over budget; slowest imports (cumulative ms):")
+        for ms, name in _slowest_imports(src_dir):
+            print(f"  {ms:8.1f}  {name}")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
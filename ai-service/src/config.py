@@ -0,0 +1,135 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Model
+MODEL_PATH = os.getenv('AI_MODEL_PATH', 'models/yield_predictor.pth')
+# Forward passes run after loading so first requests skip one-off costs
+MODEL_WARMUP_BATCH_SIZES = [
+    int(size) for size in os.getenv('AI_MODEL_WARMUP_BATCH_SIZES', '1,8,64,256').split(',') if size.strip()
+]
+# Versioned weights (see services.model_registry); a registry with an
+# ACTIVE version takes precedence over MODEL_PATH. Each process polls ACTIVE
+# and hot-swaps when it changes (0 = no polling)
+MODEL_REGISTRY_PATH = os.getenv('AI_MODEL_REGISTRY_PATH', 'models/registry')
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv('AI_MODEL_REGISTRY_POLL_SECONDS', '5'))
+
+# Micro-batching scheduler
+BATCH_ENABLED = _env_bool('AI_BATCH_ENABLED', True)
+BATCH_MAX_SIZE = int(os.getenv('AI_BATCH_MAX_SIZE', '64'))
+BATCH_MAX_WAIT_MS = float(os.getenv('AI_BATCH_MAX_WAIT_MS', '2'))
+
+# Bulk endpoints
+BULK_MAX_VAULTS = int(os.getenv('AI_BULK_MAX_VAULTS', '10000'))
+BULK_CHUNK_SIZE = int(os.getenv('AI_BULK_CHUNK_SIZE', '256'))
+
+# Inference executor: "thread" pool or "process" pool of model replicas
+EXECUTOR_MODE = os.getenv('AI_EXECUTOR_MODE', 'thread').strip().lower()
+EXECUTOR_WORKERS = int(os.getenv('AI_EXECUTOR_WORKERS', '0'))  # 0 = auto
+EXECUTOR_QUEUE_SIZE = int(os.getenv('AI_EXECUTOR_QUEUE_SIZE', '64'))
+EXECUTOR_QUEUE_TIMEOUT_MS = float(os.getenv('AI_EXECUTOR_QUEUE_TIMEOUT_MS', '50'))
+TORCH_NUM_THREADS = int(os.getenv('AI_TORCH_NUM_THREADS', '0'))  # 0 = auto
+TORCH_INTEROP_THREADS = int(os.getenv('AI_TORCH_INTEROP_THREADS', '0'))  # 0 = torch default
+
+# Admission control: priority queue in front of the pool, deadlines from X-Deadline-Ms
+ADMISSION_MAX_QUEUE = int(os.getenv('AI_ADMISSION_MAX_QUEUE', '256'))
+ADMISSION_DEFAULT_DEADLINE_MS = float(os.getenv('AI_ADMISSION_DEFAULT_DEADLINE_MS', '0'))  # 0 = none
+ADMISSION_DEGRADED = _env_bool('AI_ADMISSION_DEGRADED', True)
+
+# Multi-worker serving: preforked processes sharing one copy of the weights
+WORKERS = int(os.getenv('AI_WORKERS', '1'))
+WORKER_PIN_CORES = _env_bool('AI_WORKER_PIN_CORES', True)
+WORKER_GRACEFUL_TIMEOUT = float(os.getenv('AI_WORKER_GRACEFUL_TIMEOUT', '30'))
+
+# Monte Carlo dropout uncertainty (default samples per vault, 0 = heuristic
+# confidence unless a request asks for ?samples=)
+MC_SAMPLES = int(os.getenv('AI_MC_SAMPLES', '0'))
+MC_MAX_SAMPLES = int(os.getenv('AI_MC_MAX_SAMPLES', '256'))  # Cap for the ?samples= override; 0 = sampling off
+MC_LATENCY_BUDGET_MS = float(os.getenv('AI_MC_LATENCY_BUDGET_MS', '25'))  # Per request; 0 = unbounded
+MC_BULK_LATENCY_BUDGET_MS = float(os.getenv('AI_MC_BULK_LATENCY_BUDGET_MS', '1000'))
+MC_MIN_SAMPLES = int(os.getenv('AI_MC_MIN_SAMPLES', '4'))
+MC_INTERVAL = float(os.getenv('AI_MC_INTERVAL', '0.9'))
+MC_CONFIDENCE_SCALE = float(os.getenv('AI_MC_CONFIDENCE_SCALE', '2'))  # APY std points -> 37% confidence
+
+# Portfolio optimizer (/optimize-portfolio)
+PORTFOLIO_TIME_BUDGET_MS = float(os.getenv('AI_PORTFOLIO_TIME_BUDGET_MS', '250'))  # Solver time per request
+PORTFOLIO_MAX_ITERATIONS = int(os.getenv('AI_PORTFOLIO_MAX_ITERATIONS', '1000'))
+PORTFOLIO_TOLERANCE = float(os.getenv('AI_PORTFOLIO_TOLERANCE', '1e-7'))  # Max weight change at convergence
+PORTFOLIO_SHRINKAGE = float(os.getenv('AI_PORTFOLIO_SHRINKAGE', '0.5'))  # Sample covariance -> diagonal
+
+# Market-data enrichment of features requests leave out (empty URL = off).
+# A request waits at most BUDGET_MS for the source; lookups are cached for
+# TTL_SECONDS and misses within COALESCE_MS share one bulk request
+MARKET_DATA_URL = os.getenv('AI_MARKET_DATA_URL', '')
+MARKET_DATA_API_KEY = os.getenv('AI_MARKET_DATA_API_KEY', '')
+MARKET_DATA_TIMEOUT_MS = float(os.getenv('AI_MARKET_DATA_TIMEOUT_MS', '1000'))  # Per bulk HTTP request
+MARKET_DATA_BUDGET_MS = float(os.getenv('AI_MARKET_DATA_BUDGET_MS', '25'))
+MARKET_DATA_TTL_SECONDS = float(os.getenv('AI_MARKET_DATA_TTL_SECONDS', '60'))
+MARKET_DATA_MAX_ENTRIES = int(os.getenv('AI_MARKET_DATA_MAX_ENTRIES', '100000'))
+MARKET_DATA_MAX_CONNECTIONS = int(os.getenv('AI_MARKET_DATA_MAX_CONNECTIONS', '20'))
+MARKET_DATA_BULK_SIZE = int(os.getenv('AI_MARKET_DATA_BULK_SIZE', '500'))  # Addresses per request
+MARKET_DATA_COALESCE_MS = float(os.getenv('AI_MARKET_DATA_COALESCE_MS', '2'))
+
+# Prediction cache (quantize < 0 keys on exact features)
+CACHE_ENABLED = _env_bool('AI_CACHE_ENABLED', True)
+CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '10000'))
+CACHE_TTL_SECONDS = float(os.getenv('AI_CACHE_TTL_SECONDS', '30'))
+CACHE_QUANTIZE_DECIMALS = int(os.getenv('AI_CACHE_QUANTIZE_DECIMALS', '-1'))
+
+# Per-vault feature history (empty path keeps it in memory only)
+FEATURE_STORE_ENABLED = _env_bool('AI_FEATURE_STORE_ENABLED', True)
+FEATURE_STORE_MAX_VAULTS = int(os.getenv('AI_FEATURE_STORE_MAX_VAULTS', '10000'))
+FEATURE_STORE_PATH = os.getenv('AI_FEATURE_STORE_PATH', '')
+# Observations needed before the history replaces the request's snapshot
+FEATURE_STORE_MIN_HISTORY = int(os.getenv('AI_FEATURE_STORE_MIN_HISTORY', '10'))
+
+# Streaming one-step inference over the feature store
+STREAMING_ENABLED = _env_bool('AI_STREAMING_ENABLED', True)
+STREAMING_MAX_VAULTS = int(os.getenv('AI_STREAMING_MAX_VAULTS', '2000'))
+STREAMING_IDLE_SECONDS = float(os.getenv('AI_STREAMING_IDLE_SECONDS', '3600'))
+# Streaming steps are an approximation of the full-window pass: a sample is
+# checked every VERIFY_EVERY steps, states drifting past TOLERANCE (model
+# output, APY / 100) are dropped, and every state is rebuilt exactly after
+# REFRESH_EVERY steps
+STREAMING_TOLERANCE = float(os.getenv('AI_STREAMING_TOLERANCE', '1e-3'))
+STREAMING_VERIFY_EVERY = int(os.getenv('AI_STREAMING_VERIFY_EVERY', '64'))  # 0 = off
+STREAMING_REFRESH_EVERY = int(os.getenv('AI_STREAMING_REFRESH_EVERY', '100'))  # 0 = never
+
+# Scheduled should_rebalance scan over registered vaults, pushed over SSE.
+# Actionable decisions are re-pushed when predicted APY moves this many
+# points (interval 0 = scan only on demand). Registered vaults and
+# subscribers live in one process, so multi-worker serving needs it off
+SCANNER_ENABLED = _env_bool('AI_SCANNER_ENABLED', True)
+SCANNER_INTERVAL_SECONDS = float(os.getenv('AI_SCANNER_INTERVAL_SECONDS', '30'))
+SCANNER_BATCH_SIZE = int(os.getenv('AI_SCANNER_BATCH_SIZE', '1024'))
+SCANNER_MAX_VAULTS = int(os.getenv('AI_SCANNER_MAX_VAULTS', '10000'))
+SCANNER_MIN_APY_CHANGE = float(os.getenv('AI_SCANNER_MIN_APY_CHANGE', '0.5'))
+SCANNER_MAX_SUBSCRIBERS = int(os.getenv('AI_SCANNER_MAX_SUBSCRIBERS', '100'))
+SCANNER_SUBSCRIBER_QUEUE = int(os.getenv('AI_SCANNER_SUBSCRIBER_QUEUE', '1000'))
+SCANNER_HEARTBEAT_SECONDS = float(os.getenv('AI_SCANNER_HEARTBEAT_SECONDS', '15'))
+
+# Inference backend: eager, script, trace (frozen TorchScript) or int8
+# (dynamic quantization); falls back to eager if drift exceeds the tolerance
+INFERENCE_BACKEND = os.getenv('AI_INFERENCE_BACKEND', 'eager').strip().lower()
+BACKEND_TOLERANCE = float(os.getenv('AI_BACKEND_TOLERANCE', '1e-3'))
+
+# Runtime profile written by `python -m autotune` (empty path = ignore it).
+# A profile measured on other hardware, torch, backend or model is stale;
+# `python main.py` then re-tunes before serving when RETUNE is on
+RUNTIME_PROFILE_PATH = os.getenv('AI_RUNTIME_PROFILE', 'models/runtime_profile.json')
+RUNTIME_PROFILE_RETUNE = _env_bool('AI_RUNTIME_PROFILE_RETUNE', True)
+RUNTIME_PROFILE_MAX_P99_MS = float(os.getenv('AI_RUNTIME_PROFILE_MAX_P99_MS', '50'))
+
+# Startup budget for `import main` (checked by check_import_time.py)
+IMPORT_BUDGET_MS = float(os.getenv('AI_IMPORT_BUDGET_MS', '1500'))
+
+# Per-stage latency metrics at /metrics, and the sampling profiler
+METRICS_ENABLED = _env_bool('AI_METRICS_ENABLED', True)
+PROFILER_ENABLED = _env_bool('AI_PROFILER_ENABLED', False)
+PROFILER_INTERVAL_MS = float(os.getenv('AI_PROFILER_INTERVAL_MS', '20'))
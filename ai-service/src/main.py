@@ -1,8 +1,89 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+import config
+from services.runtime_profile import runtime_profile
+
+# Tuned threads, batch size and workers, before anything reads them
+# (spawned children re-import this module as __mp_main__; warn only once)
+runtime_profile.apply(warn=__name__ != '__mp_main__')
+
 from routes import ai_routes
+from services.admission import AdmissionMiddleware
+from services.inference_executor import inference_executor
+from services.market_data import market_data
+from services.metrics import metrics, MetricsMiddleware
+from services.model_loader import model_loader
+from services.sampling_profiler import profiler
+from services.vault_scanner import vault_scanner
+from services.worker_supervisor import current_worker
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records serialization time as a stage"""
+    def render(self, content) -> bytes:
+        with metrics.stage('serialize'):
+            return super().render(content)
+
+def _runtime_gauges():
+    # Read at scrape time from the components' own counters
+    executor = inference_executor.stats()
+    gauges = {
+        'ai_inference_in_flight': ('Predictor calls running or queued on the inference pool', executor['in_flight']),
+        'ai_inference_rejected': ('Predictor calls rejected because the pool was saturated', executor['rejected']),
+        'ai_inference_waiting': ('Predictor calls waiting in the admission queue', executor['admission']['waiting']),
+        'ai_inference_degraded': ('Requests answered by the degraded fast path', executor['admission']['degraded']),
+        'ai_model_ready': ('1 once the model is loaded and warmed up', int(model_loader.ready)),
+        'ai_scanner_vaults': ('Vaults in the scanned universe', vault_scanner.vault_count()),
+        'ai_scanner_events_published': ('Rebalance decisions pushed to subscribers', vault_scanner.events_published),
+    }
+    if market_data.enabled:
+        enrichment = market_data.stats()
+        gauges['ai_market_data_requests'] = ('Bulk requests sent to the market-data source', enrichment['requests'])
+        gauges['ai_market_data_failures'] = ('Failed market-data requests', enrichment['failures'])
+        gauges['ai_market_data_late'] = ('Lookups not answered within the enrichment budget', enrichment['late'])
+    if model_loader.ready:
+        predictor = model_loader.get()
+        if predictor.cache is not None:
+            cache = predictor.cache.stats()
+            gauges['ai_cache_hits'] = ('Prediction cache hits', cache['hits'])
+            gauges['ai_cache_misses'] = ('Prediction cache misses', cache['misses'])
+            gauges['ai_cache_entries'] = ('Prediction cache entries', cache['entries'])
+        if predictor.batcher is not None:
+            gauges['ai_batch_queue_depth'] = ('Sequences waiting for the batch scheduler',
+                                              predictor.batcher.queue_depth())
+    return gauges
 
-app = FastAPI(title="DelegateVault AI Service", version="1.0.0")
+metrics.register_collector(_runtime_gauges)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm the model in the background; /health answers right away
+    model_loader.start()
+    if config.EXECUTOR_MODE == 'process' and config.FEATURE_STORE_ENABLED:
+        print("⚠️  Feature store and streaming inference are off: AI_EXECUTOR_MODE=process replicas "
+              "cannot see history ingested through /features/ingest (use AI_EXECUTOR_MODE=thread)")
+    if config.PROFILER_ENABLED:
+        profiler.start()
+    if config.SCANNER_ENABLED:
+        vault_scanner.start()
+    await market_data.start()
+    yield
+    await vault_scanner.stop()
+    await market_data.close()
+    profiler.stop()
+    inference_executor.shutdown()
+    if model_loader.ready and model_loader.get().feature_store is not None:
+        model_loader.get().feature_store.flush()
+
+app = FastAPI(
+    title="DelegateVault AI Service",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
+)
 
 # CORS
 app.add_middleware(
@@ -13,6 +94,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Priority and deadline headers for the admission queue
+app.add_middleware(AdmissionMiddleware, prefix="/api/ai",
+                   default_deadline_ms=config.ADMISSION_DEFAULT_DEADLINE_MS)
+
+# Request latency by route (outermost, so it also covers CORS)
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
 # Routes
 app.include_router(ai_routes.router, prefix="/api/ai", tags=["AI"])
 
@@ -24,6 +112,63 @@ def root():
 def health():
     return {"status": "ok", "service": "ai-service"}
 
+@app.get("/ready")
+def ready():
+    # 503 until the model is loaded and warmed up
+    status = {**model_loader.status(), "pid": os.getpid()}
+    if current_worker:
+        status["worker"] = dict(current_worker)
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Run the AI service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Preforked worker processes sharing one copy of the model weights")
+    args = parser.parse_args()
+
+    if runtime_profile.state == 'stale' and config.RUNTIME_PROFILE_RETUNE:
+        # Hardware, torch, backend or model changed since the last tune
+        from autotune.sweep import tune
+        from services.runtime_profile import save
+
+        print("🎛️  Re-tuning the inference runtime for this machine...")
+        try:
+            profile = tune(config.RUNTIME_PROFILE_MAX_P99_MS, duration=0.25)
+        except RuntimeError as e:
+            print(f"⚠️  Re-tune failed ({e}); serving with the defaults")
+        else:
+            save(profile, runtime_profile.path)
+            runtime_profile.apply(profile)
+            # The pool was sized from the settings in force at import
+            inference_executor.resize()
+            print(f"✅ Runtime profile updated: {runtime_profile.applied}")
+    if args.workers is None:
+        args.workers = config.WORKERS
+        if args.workers > 1 and config.SCANNER_ENABLED and 'workers' in runtime_profile.applied:
+            print(f"⚠️  Runtime profile suggests {args.workers} workers, but the vault scanner needs a "
+                  f"single process; serving with 1 (set AI_SCANNER_ENABLED=false to use the profile)")
+            args.workers = 1
+
+    if args.workers > 1:
+        from services.worker_supervisor import WorkerSupervisor
+        supervisor = WorkerSupervisor(
+            app, args.host, args.port, args.workers,
+            pin_cores=config.WORKER_PIN_CORES,
+            graceful_timeout=config.WORKER_GRACEFUL_TIMEOUT,
+        )
+        sys.exit(supervisor.run())
+
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import numpy as np
 import sys
 sys.path.append('..')
 
+import config
+
 from services.yield_predictor import YieldPredictor
 from services.reasoning_engine import ReasoningEngine
-from services.pytorch_predictor import pytorch_predictor
+from services.model_loader import model_loader, ModelNotReady
+from services.model_registry import model_registry
+from services.inference_executor import inference_executor, ExecutorSaturated
+from services.market_data import market_data
+from services.runtime_profile import runtime_profile
+from services import columnar, risk_engine
+from services.metrics import metrics
+from services.sampling_profiler import profiler
+from services.vault_scanner import vault_scanner
 
 router = APIRouter()
 
@@ -30,13 +43,115 @@ class RebalanceRequest(BaseModel):
     vault_data: VaultData
     user_preferences: UserPreferences
 
+class PortfolioVault(VaultData):
+    volatility: float = 10
+    liquidity: float = 0  # Depth trades move against; 0 = use TVL
+    current_weight: float = 0  # Fraction of the capital held today
+
+class PortfolioRequest(BaseModel):
+    vaults: List[PortfolioVault]
+    user_preferences: UserPreferences
+    capital: float
+    covariance: Optional[List[List[float]]] = None  # APY points², [N, N]; estimated when omitted
+    time_budget_ms: Optional[float] = None
+
+class BatchVaultRequest(BaseModel):
+    # Items are validated one by one so a bad vault only fails its own slot
+    vaults: List[Any]
+
+class IngestRequest(BaseModel):
+    # Vault snapshots: address plus any model feature fields
+    observations: List[Any]
+
+class ActivateModelRequest(BaseModel):
+    version: str
+    wait: bool = False  # Block until the new version serves (or failed)
+
+def _validate_batch(items: List[Any]) -> Tuple[List[Tuple[int, Dict]], List[Optional[Dict]]]:
+    """Validate bulk items; returns (index, vault dict) pairs and pre-filled error slots"""
+    if len(items) > config.BULK_MAX_VAULTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.BULK_MAX_VAULTS} vaults per request",
+        )
+    
+    valid, results = [], [None] * len(items)
+    with metrics.stage('bulk_validation'):
+        for i, item in enumerate(items):
+            try:
+                valid.append((i, VaultData(**item).dict()))
+            except (ValidationError, TypeError) as e:
+                address = item.get('address') if isinstance(item, dict) else None
+                results[i] = _batch_error(i, address, str(e))
+    return valid, results
+
+def _batch_error(index: int, address: Optional[str], message: str) -> Dict:
+    return {"index": index, "vault_address": address, "status": "error", "error": message}
+
+def _batch_response(results: List[Dict]) -> Dict:
+    errors = sum(1 for item in results if item["status"] == "error")
+    return {"results": results, "count": len(results), "errors": errors}
+
+def _predictor():
+    """The loaded predictor, or 503 while the model is still loading"""
+    try:
+        return model_loader.get()
+    except ModelNotReady as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def _infer(method: str, *args):
+    """Run a predictor method on the inference pool, keeping the event loop free"""
+    _predictor()
+    try:
+        return await inference_executor.run(method, *args)
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def _infer_or_degrade(method: str, degraded, *args):
+    """
+    _infer, answering with degraded(predictor) instead (a cached or
+    risk-only result computed inline) when the pool turns the call away
+    """
+    predictor = _predictor()
+    try:
+        return await inference_executor.run(method, *args)
+    except ExecutorSaturated as e:
+        if not config.ADMISSION_DEGRADED:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+    inference_executor.record_degraded(method)
+    with metrics.stage('degraded'):
+        return degraded(predictor)
+
+async def _enrich(vault: Dict) -> Dict:
+    """A vault dict with the features it lacks filled from the market-data source"""
+    return (await market_data.enrich([vault]))[0]
+
+def _mc_samples(samples: Optional[int]) -> Optional[int]:
+    """Validated ?samples= override of the Monte Carlo dropout sample count"""
+    if samples is not None and not 0 <= samples <= config.MC_MAX_SAMPLES:
+        raise HTTPException(status_code=422, detail=f"samples must be between 0 and {config.MC_MAX_SAMPLES}")
+    return samples
+
 # Routes
 @router.post("/predict-apy")
-async def predict_apy(vault_data: VaultData):
+@metrics.endpoint
+async def predict_apy(vault_data: VaultData, samples: Optional[int] = None):
     """Predict APY for a vault using PyTorch ML model"""
     try:
         # Use PyTorch predictor for production-grade predictions
-        prediction = pytorch_predictor.predict_apy(vault_data.dict())
+        prediction = await _infer('predict_apy', await _enrich(vault_data.dict()), _mc_samples(samples))
         
         reasoning = reasoning_engine.generate_reasoning("predict", {
             "predicted_apy": prediction['predicted_apy']
@@ -48,15 +163,18 @@ async def predict_apy(vault_data: VaultData):
             "vault_address": vault_data.address,
             "ml_model": "PyTorch LSTM-Attention"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze-risk")
+@metrics.endpoint
 async def analyze_risk(vault_data: VaultData):
     """Analyze risk for a vault using PyTorch ML model"""
     try:
         # Use PyTorch predictor for risk analysis
-        risk_analysis = pytorch_predictor.predict_risk_score(vault_data.dict())
+        risk_analysis = await _infer('predict_risk_score', await _enrich(vault_data.dict()))
         
         reasoning = reasoning_engine.generate_reasoning("risk_analysis", risk_analysis)
         
@@ -64,43 +182,601 @@ async def analyze_risk(vault_data: VaultData):
             "risk_analysis": risk_analysis,
             "reasoning": reasoning,
             "vault_address": vault_data.address,
+            "model_version": _predictor().model_version,
             "ml_model": "PyTorch Ensemble"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate-strategy")
+@metrics.endpoint
 async def generate_strategy(request: RebalanceRequest):
     """Generate investment strategy using PyTorch ML model"""
     try:
+        vault_dict = await _enrich(request.vault_data.dict())
+        preferences = request.user_preferences.dict()
+        
         # Use PyTorch predictor for strategy generation
-        strategy = pytorch_predictor.generate_strategy(
-            request.vault_data.dict(),
-            request.user_preferences.dict()
+        strategy = await _infer_or_degrade(
+            'generate_strategy',
+            lambda predictor: predictor.degraded_generate_strategy(vault_dict, preferences),
+            vault_dict,
+            preferences
         )
         
         return {
             "strategy": strategy,
             "vault_address": request.vault_data.address,
             "user_preferences": request.user_preferences.dict(),
+            "model_version": strategy['model_version'],
             "ml_model": "PyTorch Strategy Generator"
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/optimize-portfolio")
+@metrics.endpoint
+async def optimize_portfolio(request: PortfolioRequest):
+    """Risk-adjusted, slippage-constrained allocation of capital across many vaults"""
+    try:
+        count = len(request.vaults)
+        if count > config.BULK_MAX_VAULTS:
+            raise HTTPException(status_code=413, detail=f"At most {config.BULK_MAX_VAULTS} vaults per request")
+        if count == 0 or request.capital <= 0:
+            raise HTTPException(status_code=422, detail="At least one vault and a positive capital are required")
+        weights = [vault.current_weight for vault in request.vaults]
+        if min(weights) < 0 or sum(weights) > 1 + 1e-6:
+            raise HTTPException(status_code=422, detail="current_weight values must be >= 0 and sum to at most 1")
+        if request.covariance is not None and (
+                len(request.covariance) != count or any(len(row) != count for row in request.covariance)):
+            raise HTTPException(status_code=422, detail=f"covariance must be a {count}x{count} matrix")
+        
+        result = await _infer(
+            'optimize_portfolio',
+            [vault.dict() for vault in request.vaults],
+            request.user_preferences.dict(),
+            request.capital,
+            request.covariance,
+            request.time_budget_ms,
+        )
+        return {**result, "capital": request.capital, "ml_model": "PyTorch Portfolio Optimizer"}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/should-rebalance")
+@metrics.endpoint
 async def should_rebalance(request: RebalanceRequest):
     """Determine if vault should be rebalanced using PyTorch ML model"""
     try:
-        vault_dict = request.vault_data.dict()
+        vault_dict = await _enrich(request.vault_data.dict())
         
         # Use PyTorch predictor for rebalancing decision
-        rebalance_decision = pytorch_predictor.should_rebalance(vault_dict, {})
+        rebalance_decision = await _infer_or_degrade(
+            'should_rebalance',
+            lambda predictor: predictor.degraded_should_rebalance(vault_dict),
+            vault_dict,
+            {}
+        )
         
         return {
             **rebalance_decision,
             "vault_address": request.vault_data.address,
             "ml_model": "PyTorch Rebalance Optimizer"
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/evaluate")
+@metrics.endpoint
+async def evaluate(request: RebalanceRequest):
+    """Prediction, risk, strategy and rebalance decision from a single model run"""
+    try:
+        evaluation = await _infer(
+            'evaluate_vault',
+            await _enrich(request.vault_data.dict()),
+            request.user_preferences.dict()
+        )
+        prediction = evaluation['prediction']
+        risk_analysis = evaluation['risk_analysis']
+        
+        return {
+            "prediction": {
+                **prediction,
+                "reasoning": reasoning_engine.generate_reasoning("predict", {
+                    "predicted_apy": prediction['predicted_apy']
+                }),
+            },
+            "risk_analysis": {
+                "risk_analysis": risk_analysis,
+                "reasoning": reasoning_engine.generate_reasoning("risk_analysis", risk_analysis),
+            },
+            "strategy": evaluation['strategy'],
+            "rebalance": evaluation['rebalance'],
+            "vault_address": request.vault_data.address,
+            "user_preferences": request.user_preferences.dict(),
+            "model_version": prediction['model_version'],
+            "ml_model": "PyTorch LSTM-Attention"
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+# Vault fields carried by columnar bulk requests (the numeric VaultData fields)
+BULK_NUMERIC_FIELDS = ['tvl', 'current_apy']
+
+def _response_format(request: Request) -> str:
+    media_type = columnar.negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Supported formats: {', '.join(columnar.available_formats())}",
+        )
+    return media_type
+
+async def _bulk_payload(request: Request) -> Dict:
+    """Decoded bulk request body: {"vaults": [...]} rows or {"columns": {...}}"""
+    body = await request.body()
+    try:
+        with metrics.stage('bulk_decode'):
+            payload = columnar.decode_body(body, request.headers.get("content-type"))
+    except columnar.UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Malformed request body: {e}")
+    if not isinstance(payload, dict) or not isinstance(payload.get("columns", payload.get("vaults")), (list, dict)):
+        raise HTTPException(status_code=422, detail="Expected a 'vaults' list or a 'columns' map")
+    return payload
+
+def _bulk_rows(payload: Dict) -> List[Any]:
+    """Bulk items as rows, converting columnar input for the JSON path"""
+    if "columns" not in payload:
+        return payload["vaults"]
+    columns, _ = _bulk_columns(payload)
+    fields = [(name, columns[name].tolist()) for name in BULK_NUMERIC_FIELDS if name in columns]
+    return [
+        {"address": address, **{name: values[i] for name, values in fields}}
+        for i, address in enumerate(columns["address"])
+    ]
+
+def _bulk_columns(payload: Dict) -> Tuple[Dict, Dict[int, str]]:
+    """Bulk items as columns plus {row: error}, converting row input"""
+    if "columns" in payload:
+        try:
+            columns, errors = columnar.vault_columns(payload["columns"], BULK_NUMERIC_FIELDS)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if len(columns["address"]) > config.BULK_MAX_VAULTS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {config.BULK_MAX_VAULTS} vaults per request",
+            )
+        return columns, errors
+    
+    valid, results = _validate_batch(payload["vaults"])
+    count = len(results)
+    columns = {"address": [""] * count}
+    for name in BULK_NUMERIC_FIELDS:
+        columns[name] = np.full(count, np.nan)
+    for i, vault in valid:
+        columns["address"][i] = vault["address"]
+        for name in BULK_NUMERIC_FIELDS:
+            if vault[name] is not None:
+                columns[name][i] = vault[name]
+    return columns, {i: item["error"] for i, item in enumerate(results) if item is not None}
+
+def _columnar_response(columns: Dict, addresses: List[str], errors: Dict[int, str],
+                       metadata: Dict, media_type: str) -> Response:
+    count = len(addresses)
+    ok = np.ones(count, dtype=bool)
+    ok[list(errors)] = False
+    with metrics.stage('serialize'):
+        content = columnar.encode({
+            "index": np.arange(count, dtype=np.int32),
+            "vault_address": [address or None for address in addresses],
+            "ok": ok,
+            **columns,
+            "error": [errors.get(i) for i in range(count)] if errors else [None] * count,
+        }, {"count": count, "errors": len(errors), **metadata}, media_type)
+    return Response(content=content, media_type=media_type)
+
+@router.post("/predict-apy/batch")
+@metrics.endpoint
+async def predict_apy_batch(request: Request, samples: Optional[int] = None):
+    """Predict APY for a list of vaults with batched model inference"""
+    media_type = _response_format(request)
+    samples = _mc_samples(samples)
+    payload = await _bulk_payload(request)
+    if media_type != columnar.JSON:
+        columns, errors = _bulk_columns(payload)
+        columns = await market_data.enrich_columns(columns)
+        result = await _infer('predict_apy_columns', columns, samples)
+        errors = {**result["errors"], **errors}
+        metadata = {"model_version": result["model_version"], "ml_model": "PyTorch LSTM-Attention"}
+        if "uncertainty" in result:
+            metadata["uncertainty_interval"] = config.MC_INTERVAL
+        return _columnar_response({
+            "predicted_apy": result["predicted_apy"],
+            "confidence": result["confidence"],
+            **result.get("uncertainty", {}),
+        }, columns["address"], errors, metadata, media_type)
+    
+    valid, results = _validate_batch(_bulk_rows(payload))
+    predictions = await _infer('predict_apy_batch', await market_data.enrich([vault for _, vault in valid]), samples)
+    
+    for (i, vault), prediction in zip(valid, predictions):
+        if 'error' in prediction:
+            results[i] = _batch_error(i, vault['address'], prediction['error'])
+            continue
+        results[i] = {
+            "index": i,
+            "status": "ok",
+            **prediction,
+            "reasoning": reasoning_engine.generate_reasoning("predict", {
+                "predicted_apy": prediction['predicted_apy']
+            }),
+            "vault_address": vault['address'],
+            "ml_model": "PyTorch LSTM-Attention",
+        }
+    
+    return _batch_response(results)
+
+@router.post("/analyze-risk/batch")
+@metrics.endpoint
+async def analyze_risk_batch(request: Request):
+    """Analyze risk for a list of vaults with the vectorized risk engine"""
+    media_type = _response_format(request)
+    payload = await _bulk_payload(request)
+    if media_type != columnar.JSON:
+        columns, errors = _bulk_columns(payload)
+        columns = await market_data.enrich_columns(columns)
+        result = await _infer('predict_risk_score_columns', columns)
+        errors = {**result.pop("errors"), **errors}
+        return _columnar_response(result, columns["address"], errors, {
+            "risk_levels": risk_engine.RISK_LEVELS.tolist(),
+            "model_version": _predictor().model_version,
+            "ml_model": "PyTorch Ensemble",
+        }, media_type)
+    
+    valid, results = _validate_batch(_bulk_rows(payload))
+    analyses = await _infer('predict_risk_score_batch', await market_data.enrich([vault for _, vault in valid]))
+    model_version = _predictor().model_version
+    
+    for (i, vault), risk_analysis in zip(valid, analyses):
+        if 'error' in risk_analysis:
+            results[i] = _batch_error(i, vault['address'], risk_analysis['error'])
+            continue
+        results[i] = {
+            "index": i,
+            "status": "ok",
+            "risk_analysis": risk_analysis,
+            "reasoning": reasoning_engine.generate_reasoning("risk_analysis", risk_analysis),
+            "vault_address": vault['address'],
+            "model_version": model_version,
+            "ml_model": "PyTorch Ensemble",
+        }
+    
+    return _batch_response(results)
+
+@router.post("/should-rebalance/batch")
+@metrics.endpoint
+async def should_rebalance_batch(request: Request):
+    """Rebalancing decisions for a list of vaults with batched model inference"""
+    media_type = _response_format(request)
+    payload = await _bulk_payload(request)
+    if media_type != columnar.JSON:
+        columns, errors = _bulk_columns(payload)
+        columns = await market_data.enrich_columns(columns)
+        result = await _infer('should_rebalance_columns', columns)
+        errors = {**result["errors"], **errors}
+        return _columnar_response({
+            name: result[name]
+            for name in ("should_rebalance", "current_apy", "predicted_apy", "apy_change", "confidence")
+        }, columns["address"], errors, {
+            "model_version": result["model_version"],
+            "ml_model": "PyTorch Rebalance Optimizer",
+        }, media_type)
+    
+    valid, results = _validate_batch(_bulk_rows(payload))
+    decisions = await _infer('should_rebalance_batch', await market_data.enrich([vault for _, vault in valid]))
+    
+    for (i, vault), decision in zip(valid, decisions):
+        if 'error' in decision:
+            results[i] = _batch_error(i, vault['address'], decision['error'])
+            continue
+        results[i] = {
+            "index": i,
+            "status": "ok",
+            **decision,
+            "vault_address": vault['address'],
+            "ml_model": "PyTorch Rebalance Optimizer",
+        }
+    
+    return _batch_response(results)
+
+@router.post("/features/ingest")
+def ingest_features(request: IngestRequest):
+    """Append vault observations to the rolling feature store"""
+    predictor = _predictor()
+    if predictor.feature_store is None:
+        detail = "Feature store is disabled"
+        if config.EXECUTOR_MODE == 'process':
+            detail += " (AI_EXECUTOR_MODE=process replicas cannot share ingested history)"
+        raise HTTPException(status_code=404, detail=detail)
+    if len(request.observations) > config.BULK_MAX_VAULTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.BULK_MAX_VAULTS} observations per request",
+        )
+    
+    observations = [item if isinstance(item, dict) else {} for item in request.observations]
+    results = []
+    for i, outcome in enumerate(predictor.ingest_observations(observations)):
+        if 'error' in outcome:
+            results.append(_batch_error(i, observations[i].get('address'), outcome['error']))
+        else:
+            results.append({"index": i, "status": "ok", **outcome})
+    
+    # Scanned vaults pick up the latest snapshot fields
+    vault_scanner.update([observations[i] for i, item in enumerate(results) if item["status"] == "ok"])
+    return _batch_response(results)
+
+@router.get("/features/stats")
+async def feature_store_stats():
+    """Feature store occupancy"""
+    predictor = _predictor()
+    if predictor.feature_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.feature_store.stats()}
+
+@router.get("/streaming/stats")
+async def streaming_stats():
+    """Streaming inference state occupancy and verification counters"""
+    predictor = _predictor()
+    if predictor.streaming is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.streaming.stats()}
+
+@router.get("/streaming/verify/{address}")
+def verify_streaming(address: str):
+    """Compare a vault's streaming output with a full-window forward pass"""
+    predictor = _predictor()
+    if predictor.streaming is None:
+        raise HTTPException(status_code=404, detail="Streaming inference is disabled")
+    if predictor.streaming.suspended is not None:
+        raise HTTPException(status_code=404,
+                            detail=f"Streaming inference is suspended: {predictor.streaming.suspended}")
+    try:
+        report = predictor.verify_streaming(address)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"No streaming state for {address}")
+    return report
+
+@router.get("/backend/stats")
+async def backend_stats():
+    """Active inference backend and its measured drift from eager mode"""
+    predictor = _predictor()
+    return {
+        "backend": predictor.backend_name,
+        "requested": config.INFERENCE_BACKEND,
+        "max_abs_drift": predictor.backend_drift,
+        "tolerance": config.BACKEND_TOLERANCE,
+    }
+
+@router.get("/batching/stats")
+async def batching_stats():
+    """Micro-batching metrics: batch sizes and queue wait"""
+    predictor = _predictor()
+    if predictor.batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.batcher.stats()}
+
+@router.get("/executor/stats")
+async def executor_stats():
+    """Inference pool occupancy and rejection counts"""
+    return inference_executor.stats()
+
+@router.get("/uncertainty/stats")
+async def uncertainty_stats():
+    """Monte Carlo dropout settings, cost model and budget reductions"""
+    predictor = _predictor()
+    if predictor.uncertainty is None:
+        return {"enabled": False}
+    stats = {"enabled": True, **predictor.uncertainty.stats()}
+    if predictor.mc_batcher is not None:
+        stats["batching"] = predictor.mc_batcher.stats()
+    return stats
+
+@router.get("/market-data/stats")
+async def market_data_stats():
+    """Enrichment source, cache and coalescing counters"""
+    return market_data.stats()
+
+@router.get("/runtime/profile")
+async def runtime_profile_stats():
+    """Autotuned runtime settings in effect, and why a saved profile was not applied"""
+    return {
+        **runtime_profile.stats(),
+        "effective": {
+            "workers": config.WORKERS,
+            "torch_num_threads": inference_executor.num_threads,
+            "torch_interop_threads": config.TORCH_INTEROP_THREADS or None,
+            "batch_max_size": config.BATCH_MAX_SIZE,
+        },
+    }
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Prediction cache hit/miss/eviction counters"""
+    predictor = _predictor()
+    if predictor.cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "model_version": predictor.model_version,
+        **predictor.cache.stats(),
+    }
+
+@router.get("/models")
+async def list_models():
+    """Active and previous model versions, registry contents and swap progress"""
+    predictor = _predictor()
+    return {
+        "active": predictor.active.describe(),
+        "previous": predictor.previous.describe() if predictor.previous else None,
+        "registry": {
+            "path": model_registry.path,
+            "active_version": model_registry.active_version(),
+            "versions": model_registry.versions(),
+        },
+        "swap": model_loader.swap_status,
+    }
+
+def _start_swap(action: str, version: Optional[str], wait: bool, response: Response) -> Dict:
+    try:
+        thread = model_loader.swap(action, version)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not wait:
+        response.status_code = 202
+        return model_loader.swap_status
+    thread.join()
+    if model_loader.swap_status['state'] == 'failed':
+        raise HTTPException(status_code=500, detail=model_loader.swap_status.get('error'))
+    return model_loader.swap_status
+
+@router.post("/models/activate")
+def activate_model(request: ActivateModelRequest, response: Response):
+    """Load, warm up and switch to a registry version without pausing inference"""
+    _predictor()
+    try:
+        model_registry.weights_path(request.version)
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _start_swap('activate', request.version, request.wait, response)
+
+@router.post("/models/rollback")
+def rollback_model(response: Response, wait: bool = False):
+    """Switch back to the previously active model version"""
+    _predictor()
+    return _start_swap('rollback', None, wait, response)
+
+def _scanner():
+    """The vault scanner, or 503 when it is disabled"""
+    if not config.SCANNER_ENABLED:
+        raise HTTPException(status_code=503, detail="Vault scanner is disabled (AI_SCANNER_ENABLED=false)")
+    return vault_scanner
+
+@router.post("/scanner/vaults")
+async def register_scanner_vaults(request: BatchVaultRequest):
+    """Add or replace vaults in the scanned universe"""
+    valid, results = _validate_batch(request.vaults)
+    try:
+        registered = _scanner().register([vault for _, vault in valid])
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    for i, vault in valid:
+        results[i] = {"index": i, "status": "ok", "vault_address": vault['address']}
+    return {**_batch_response(results), "registered": registered}
+
+@router.delete("/scanner/vaults/{address}")
+async def unregister_scanner_vault(address: str):
+    """Stop scanning a vault"""
+    if not _scanner().unregister(address):
+        raise HTTPException(status_code=404, detail=f"Vault {address} is not registered")
+    return {"registered": vault_scanner.vault_count()}
+
+@router.post("/scanner/scan")
+async def run_scan():
+    """Scan the registered vaults now and push notable decisions"""
+    _predictor()
+    try:
+        return await _scanner().scan()
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+@router.get("/scanner/decisions")
+async def scanner_decisions(actionable_only: bool = False):
+    """Latest decision per scanned vault (resync point for stream subscribers)"""
+    decisions = _scanner().decisions(actionable_only)
+    return {"decisions": decisions, "count": len(decisions), "last_event_id": vault_scanner.sequence}
+
+@router.get("/scanner/stats")
+async def scanner_stats():
+    """Scan cadence, last scan summary and per-subscriber queue counters"""
+    return _scanner().stats()
+
+def _sse_message(event: Dict) -> str:
+    lines = [f"id: {event['id']}"] if 'id' in event else []
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+@router.get("/scanner/stream")
+async def scanner_stream(addresses: Optional[str] = None, actionable_only: bool = False,
+                         min_apy_change: float = 0.0, min_confidence: float = 0.0):
+    """Server-Sent Events stream of rebalance decisions matching the filters"""
+    try:
+        subscription = _scanner().subscribe(
+            addresses=[a for a in addresses.split(',') if a.strip()] if addresses else None,
+            actionable_only=actionable_only,
+            min_apy_change=min_apy_change,
+            min_confidence=min_confidence,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    
+    async def events():
+        try:
+            yield ": subscribed\n\n"
+            while not subscription.closed:
+                event = await subscription.next(config.SCANNER_HEARTBEAT_SECONDS)
+                # Comment lines keep idle connections open through proxies
+                yield ": keepalive\n\n" if event is None else _sse_message(event)
+        finally:
+            vault_scanner.unsubscribe(subscription)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@router.get("/profiler")
+async def profiler_stats():
+    """Sampling profiler state and the hottest frames"""
+    return {**profiler.stats(), "top": profiler.top()}
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse)
+async def profiler_stacks():
+    """Collapsed stacks for flamegraph.pl / speedscope"""
+    return profiler.collapsed()
+
+@router.post("/profiler/start")
+async def start_profiler(reset: bool = False):
+    """Start sampling all threads (optionally dropping earlier samples)"""
+    if reset:
+        profiler.reset()
+    profiler.start()
+    return profiler.stats()
+
+@router.post("/profiler/stop")
+def stop_profiler():
+    """Stop sampling; collected stacks stay available"""
+    profiler.stop()
+    return profiler.stats()
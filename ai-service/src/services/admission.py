@@ -0,0 +1,249 @@
+"""
+Deadline-aware admission control for the inference pool
+
+Requests carry a priority and a deadline: AdmissionMiddleware reads them
+from the X-Priority (high / normal / low) and X-Deadline-Ms (time budget
+left, in ms) headers into a context variable, so every pool call a handler
+makes inherits them. When all pool slots are taken, callers wait in a
+bounded queue ordered by (priority, deadline, arrival) instead of FIFO, and
+are turned away as early as possible rather than after timing out:
+  - 429 when the queue is full; a better-ranked arrival evicts the worst waiter
+  - 503 when the estimated wait plus service time exceeds the time left
+    before the deadline, or the deadline passes while waiting
+Latency is estimated with Little's law: the pool's cost per call (call
+latency / calls in flight, EWMA) times the calls ahead of a new arrival.
+Until the first call completes there is no estimate, so calls are admitted
+one at a time rather than all slots at once
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+PRIORITIES = {'high': PRIORITY_HIGH, 'normal': PRIORITY_NORMAL, 'low': PRIORITY_LOW}
+PRIORITY_HEADER = 'x-priority'
+DEADLINE_HEADER = 'x-deadline-ms'
+
+# Weight of the newest call in the cost-per-call EWMA
+_COST_ALPHA = 0.2
+
+# (priority, monotonic deadline or None) of the request being handled
+_current: ContextVar[Optional[Tuple[int, Optional[float]]]] = ContextVar('admission_request', default=None)
+
+
+class AdmissionRejected(Exception):
+    """A call turned away by the admission queue"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int = 1):
+        super().__init__(f"Inference pool is saturated ({reason}), retry later")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def current_request() -> Tuple[int, Optional[float]]:
+    """Priority and deadline of the current request (normal, none outside one)"""
+    return _current.get() or (PRIORITY_NORMAL, None)
+
+
+def parse_headers(priority: Optional[str], deadline_ms: Optional[str], default_priority: int = PRIORITY_NORMAL,
+                  default_deadline_ms: float = 0) -> Tuple[int, Optional[float]]:
+    """(priority, monotonic deadline) from header values; ValueError when malformed"""
+    if priority is None:
+        level = default_priority
+    elif priority.strip().lower() in PRIORITIES:
+        level = PRIORITIES[priority.strip().lower()]
+    else:
+        raise ValueError(f"X-Priority must be one of {', '.join(PRIORITIES)}")
+
+    if deadline_ms is None:
+        budget = default_deadline_ms or None
+    else:
+        try:
+            budget = float(deadline_ms)
+        except ValueError:
+            raise ValueError("X-Deadline-Ms must be a number of milliseconds")
+        if not math.isfinite(budget):
+            raise ValueError("X-Deadline-Ms must be a number of milliseconds")
+    deadline = None if budget is None else time.monotonic() + budget / 1000
+    return level, deadline
+
+
+class AdmissionQueue:
+    """
+    Pool slots plus a bounded priority queue of callers waiting for one
+    Lives on the event loop: acquire and release are not thread-safe
+    Callers without a deadline wait at most wait_timeout_ms
+    """
+    def __init__(self, slots: int, max_queue: int = 256, wait_timeout_ms: float = 50):
+        self.slots = max(1, int(slots))
+        self.max_queue = max(0, int(max_queue))
+        self.wait_timeout = max(0.0, wait_timeout_ms) / 1000
+
+        self._free = self.slots
+        self._waiters: List[list] = []  # Heap of [priority, deadline, seq, future]
+        self._waiting = 0  # Waiters whose future is still pending
+        self._sequence = itertools.count()
+        self._cost: Optional[float] = None  # Seconds per call at the observed concurrency
+
+        self.admitted = 0
+        self.queued = 0
+        self.degraded = 0
+        self.rejected = {'queue_full': 0, 'evicted': 0, 'deadline': 0, 'timeout': 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self.slots - self._free
+
+    def resize(self, slots: int):
+        """Change the slot count, keeping the calls in flight"""
+        slots = max(1, int(slots))
+        self._free += slots - self.slots
+        self.slots = slots
+
+    def _available(self) -> int:
+        """Slots a caller may take now"""
+        if self._cost is None:
+            return 1 if self.in_flight == 0 else 0
+        return self._free
+
+    def estimate(self, priority: int = PRIORITY_NORMAL, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds until a call arriving now would complete (None before the
+        first completed call)
+        """
+        if self._cost is None:
+            return None
+        ahead = self.in_flight
+        if self._waiting:
+            rank = (priority, math.inf if deadline is None else deadline)
+            ahead += sum(1 for entry in self._waiters if not entry[3].done() and (entry[0], entry[1]) <= rank)
+        return (ahead + 1) * self._cost
+
+    def retry_after(self) -> int:
+        """Seconds until the calls running and queued now have drained"""
+        if self._cost is None:
+            return 1
+        return max(1, math.ceil((self.in_flight + self._waiting) * self._cost))
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(status_code, reason, self.retry_after())
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL, deadline: Optional[float] = None):
+        """Take a slot, waiting in priority order; raises AdmissionRejected"""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None:
+            estimate = self.estimate(priority, deadline)
+            if remaining <= 0 or (estimate is not None and estimate > remaining):
+                raise self._reject(503, 'deadline')
+
+        if self._available() > 0:
+            self._free -= 1
+            self.admitted += 1
+            return
+
+        rank = (priority, math.inf if deadline is None else deadline)
+        if self._waiting >= self.max_queue:
+            worst = max((entry for entry in self._waiters if not entry[3].done()), default=None)
+            if worst is None or (worst[0], worst[1]) <= rank:
+                raise self._reject(429, 'queue_full')
+            self._waiting -= 1
+            worst[3].set_exception(self._reject(429, 'evicted'))
+
+        timeout = self.wait_timeout if remaining is None else remaining
+        if timeout <= 0:
+            raise self._reject(503, 'timeout')
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [*rank, next(self._sequence), future])
+        self._waiting += 1
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._waiting -= 1
+            raise self._reject(503, 'timeout' if deadline is None else 'deadline')
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._waiting -= 1
+            elif future.exception() is None:
+                self.release()  # Granted just before the caller went away
+            raise
+        self.admitted += 1
+
+    def release(self, seconds: Optional[float] = None, concurrency: int = 1):
+        """
+        Free a slot and hand the available ones to the best-ranked waiters;
+        seconds and concurrency of the finished call feed the cost estimate
+        """
+        if seconds is not None:
+            cost = seconds / max(1, concurrency)
+            self._cost = cost if self._cost is None else (1 - _COST_ALPHA) * self._cost + _COST_ALPHA * cost
+        self._free += 1
+        while self._waiters and self._available() > 0:
+            future = heapq.heappop(self._waiters)[3]
+            if not future.done():
+                self._free -= 1
+                self._waiting -= 1
+                future.set_result(True)
+
+    def stats(self) -> Dict:
+        estimate = self.estimate()
+        return {
+            'slots': self.slots,
+            'in_flight': self.in_flight,
+            'waiting': self._waiting,
+            'max_queue': self.max_queue,
+            'wait_timeout_ms': round(self.wait_timeout * 1000, 3),
+            'cost_per_call_ms': round(self._cost * 1000, 4) if self._cost is not None else None,
+            'estimated_latency_ms': round(estimate * 1000, 3) if estimate is not None else None,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'degraded': self.degraded,
+            'rejected': dict(self.rejected),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware attaching the priority and deadline headers of API
+    requests to the request context; 400 when they are malformed
+    Bulk routes (paths ending in /batch) default to low priority
+    """
+    def __init__(self, app, prefix: str = '/api/ai', default_deadline_ms: float = 0):
+        self.app = app
+        self.prefix = prefix
+        self.default_deadline_ms = default_deadline_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {}
+        for name, value in scope['headers']:
+            if name in (PRIORITY_HEADER.encode(), DEADLINE_HEADER.encode()):
+                headers[name.decode()] = value.decode('latin-1')
+        default_priority = PRIORITY_LOW if scope['path'].endswith('/batch') else PRIORITY_NORMAL
+        try:
+            request = parse_headers(headers.get(PRIORITY_HEADER), headers.get(DEADLINE_HEADER),
+                                    default_priority, self.default_deadline_ms)
+        except ValueError as e:
+            body = json.dumps({'detail': str(e)}).encode()
+            await send({'type': 'http.response.start', 'status': 400,
+                        'headers': [(b'content-type', b'application/json'),
+                                    (b'content-length', str(len(body)).encode())]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        token = _current.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
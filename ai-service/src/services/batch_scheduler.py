@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import torch
+
+from services.metrics import metrics
+
+
+class _PendingRequest:
+    __slots__ = ('sequence', 'rows', 'many', 'future', 'enqueued_at')
+
+    def __init__(self, sequence: torch.Tensor, many: bool = False):
+        self.sequence = sequence
+        self.rows = len(sequence)
+        self.many = many
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching in front of a model forward pass
+    Concurrent requests are gathered until max_batch_size rows are queued or
+    the oldest request has waited max_wait_ms, then run as one [B, T, F]
+    tensor. A request is usually one row; submit_many() requests bring
+    several, and the batch may overshoot by the last one's rows
+    """
+    def __init__(self, forward_fn: Callable[[torch.Tensor], torch.Tensor],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._rows = 0
+        self._max_batch_seen = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        # Rows per batch; the last bucket takes batches a submit_many() overshoots
+        self._batch_size_hist = {size: 0 for size in self._bucket_bounds() + [float('inf')]}
+        self._recent_waits = deque(maxlen=1024)
+
+    def _bucket_bounds(self) -> List[int]:
+        bounds, size = [], 1
+        while size < self.max_batch_size:
+            bounds.append(size)
+            size *= 2
+        bounds.append(self.max_batch_size)
+        return bounds
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='batch-scheduler', daemon=True
+                )
+                self._worker.start()
+
+    def submit(self, sequence: torch.Tensor) -> Future:
+        """
+        Queue a single [1, T, F] (or [T, F]) sequence; the future resolves to
+        the model output row for that sequence
+        """
+        if sequence.dim() == 2:
+            sequence = sequence.unsqueeze(0)
+        request = _PendingRequest(sequence)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, sequence: torch.Tensor) -> torch.Tensor:
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(sequence).result()
+
+    def submit_many(self, sequences: torch.Tensor) -> Future:
+        """
+        Queue an [n, T, F] block batched with other callers; the future
+        resolves to its n output rows
+        """
+        request = _PendingRequest(sequences, many=True)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def predict_many(self, sequences: torch.Tensor) -> torch.Tensor:
+        """Blocking convenience wrapper around submit_many()"""
+        return self.submit_many(sequences).result()
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        first = self._queue.get()
+        batch = [first]
+        rows = first.rows
+        deadline = first.enqueued_at + self.max_wait
+
+        while rows < self.max_batch_size:
+            try:
+                # Drain whatever is already queued before waiting
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            batch.append(request)
+            rows += request.rows
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started_at = time.perf_counter()
+            self._record(batch, started_at)
+
+            try:
+                inputs = torch.cat([request.sequence for request in batch], dim=0)
+                outputs = self.forward_fn(inputs)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            # Scatter results back to waiting callers
+            offset = 0
+            for request in batch:
+                if request.many:
+                    request.future.set_result(outputs[offset:offset + request.rows])
+                else:
+                    request.future.set_result(outputs[offset])
+                offset += request.rows
+
+    def _record(self, batch: List[_PendingRequest], started_at: float):
+        waits = [started_at - request.enqueued_at for request in batch]
+        size = sum(request.rows for request in batch)  # Rows stacked into the forward pass
+        if metrics.enabled:
+            for wait in waits:
+                metrics.stages.observe(wait, 'batch_queue_wait')
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._rows += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._queue_wait_total += sum(waits)
+            self._queue_wait_max = max(self._queue_wait_max, max(waits))
+            self._recent_waits.extend(waits)
+            for bound in self._batch_size_hist:
+                if size <= bound:
+                    self._batch_size_hist[bound] += 1
+                    break
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        """Batch size and queue wait metrics"""
+        with self._stats_lock:
+            recent = sorted(self._recent_waits)
+            batches, items, rows = self._batches, self._items, self._rows
+
+            def percentile(p: float) -> float:
+                if not recent:
+                    return 0.0
+                return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000
+
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self._queue.qsize(),
+                'batches': batches,
+                'requests': items,
+                'rows': rows,
+                'avg_batch_size': round(rows / batches, 2) if batches else 0.0,
+                'max_batch_size_seen': self._max_batch_seen,
+                'batch_size_histogram': {
+                    'le_inf' if bound == float('inf') else f'le_{bound}': count
+                    for bound, count in self._batch_size_hist.items()
+                },
+                'queue_wait_ms': {
+                    'avg': round(self._queue_wait_total / items * 1000, 3) if items else 0.0,
+                    'max': round(self._queue_wait_max * 1000, 3),
+                    'p50': round(percentile(0.50), 3),
+                    'p95': round(percentile(0.95), 3),
+                    'p99': round(percentile(0.99), 3),
+                },
+            }
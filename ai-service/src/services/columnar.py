@@ -0,0 +1,223 @@
+"""
+Binary columnar wire formats for the bulk routes
+
+Negotiated per request: Accept picks the response format, Content-Type
+the request format. JSON stays the default.
+
+    application/x-msgpack                 MessagePack (needs msgpack)
+    application/vnd.apache.arrow.stream   Arrow IPC stream (needs pyarrow)
+
+MessagePack layout: a map with scalar metadata plus
+    "columns": {name: column}
+where a numeric column is {"dtype": "<f8", "shape": [n], "data": <bin>}
+(the raw little-endian NumPy buffer) and a string column is a list
+(null for missing values). Arrow carries the same columns as one record
+batch, with the metadata as JSON under the schema's b"metadata" key.
+
+Bulk requests may send {"vaults": [...]} rows in any format, or columns:
+    {"columns": {"address": [...], "tvl": <numeric column>, ...}}
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/x-msgpack'
+ARROW = 'application/vnd.apache.arrow.stream'
+_ALIASES = {
+    'application/msgpack': MSGPACK,
+    'application/vnd.msgpack': MSGPACK,
+}
+
+_pyarrow = None
+
+
+class UnsupportedFormat(Exception):
+    """Raised for a request body in a format this service cannot read"""
+
+
+def _arrow():
+    # pyarrow is optional and slow to import, so load it on first use
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc  # noqa: F401
+        except ImportError:
+            _pyarrow = False
+        else:
+            _pyarrow = pyarrow
+    return _pyarrow or None
+
+
+def available_formats() -> List[str]:
+    formats = [JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if _arrow() is not None:
+        formats.append(ARROW)
+    return formats
+
+
+def _media_type(value: str) -> str:
+    media = value.split(';', 1)[0].strip().lower()
+    return _ALIASES.get(media, media)
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Response format for an Accept header, or None when nothing acceptable
+    is available (406)
+    """
+    if not accept:
+        return JSON
+    ranges = []
+    for position, item in enumerate(accept.split(',')):
+        if not item.strip():
+            continue
+        quality = 1.0
+        for parameter in item.split(';')[1:]:
+            name, _, value = parameter.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((-quality, position, _media_type(item)))
+    for negative_quality, _, media in sorted(ranges):
+        if negative_quality >= 0:
+            continue
+        if media in (JSON, '*/*', 'application/*'):
+            return JSON
+        if media == MSGPACK and msgpack is not None:
+            return MSGPACK
+        if media == ARROW and _arrow() is not None:
+            return ARROW
+    return None
+
+
+def numeric_column(values: np.ndarray) -> Dict:
+    values = np.ascontiguousarray(values)
+    if values.dtype.byteorder == '>':
+        values = values.astype(values.dtype.newbyteorder('<'))
+    return {'dtype': values.dtype.str, 'shape': list(values.shape), 'data': memoryview(values).cast('B')}
+
+
+def _column_array(column) -> np.ndarray:
+    if isinstance(column, dict) and 'data' in column:
+        array = np.frombuffer(column['data'], dtype=np.dtype(column['dtype']))
+        return array.reshape(column.get('shape', [len(array)]))
+    if isinstance(column, np.ndarray):
+        return column
+    # Plain list (JSON or MessagePack arrays); None becomes NaN
+    return np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+
+
+def decode_body(body: bytes, content_type: Optional[str]):
+    """Parse a request body in JSON, MessagePack or Arrow IPC"""
+    media = _media_type(content_type or JSON)
+    if media == MSGPACK:
+        if msgpack is None:
+            raise UnsupportedFormat("MessagePack support is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if media == ARROW:
+        pyarrow = _arrow()
+        if pyarrow is None:
+            raise UnsupportedFormat("Arrow support is not installed")
+        table = pyarrow.ipc.open_stream(body).read_all()
+        columns = {}
+        for name in table.column_names:
+            column = table.column(name)
+            if pyarrow.types.is_string(column.type) or pyarrow.types.is_large_string(column.type):
+                columns[name] = column.to_pylist()
+            else:
+                columns[name] = column.to_numpy()
+        return {'columns': columns}
+    if media in (JSON, 'text/plain', '*/*') or media.endswith('+json'):
+        return json.loads(body)
+    raise UnsupportedFormat(f"Unsupported request content type: {content_type}")
+
+
+def vault_columns(columns: Dict, numeric_fields: List[str]) -> Tuple[Dict, Dict[int, str]]:
+    """
+    Columnar vault batch from decoded request columns
+    Returns {'address': [...], field: float64 array} for the fields present
+    and {row index: error} for rows without a usable address. Raises
+    ValueError for missing or mismatched columns
+    """
+    if not isinstance(columns, dict) or 'address' not in columns:
+        raise ValueError("Columnar requests need an 'address' column")
+    addresses = list(columns['address'])
+    count = len(addresses)
+    result, errors = {'address': addresses}, {}
+    for i, address in enumerate(addresses):
+        if not isinstance(address, str) or not address:
+            errors[i] = "address: a non-empty string is required"
+            addresses[i] = ''
+    for name in numeric_fields:
+        if name not in columns:
+            continue
+        try:
+            values = _column_array(columns[name]).astype(np.float64, copy=False).reshape(-1)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column {name} is not numeric: {e}")
+        if len(values) != count:
+            raise ValueError(f"Column {name} has {len(values)} rows, expected {count}")
+        result[name] = values
+    return result, errors
+
+
+def encode(columns: Dict, metadata: Dict, media_type: str) -> bytes:
+    """
+    Serialize result columns (NumPy arrays or lists of strings/None) plus
+    scalar metadata
+    """
+    if media_type == MSGPACK:
+        packed = {
+            name: numeric_column(values) if isinstance(values, np.ndarray) else values
+            for name, values in columns.items()
+        }
+        return msgpack.packb({**metadata, 'format': 'columnar', 'columns': packed}, use_bin_type=True)
+    if media_type == ARROW:
+        pyarrow = _arrow()
+        arrays = [
+            pyarrow.array(values) if isinstance(values, np.ndarray) else pyarrow.array(values, type=pyarrow.string())
+            for values in columns.values()
+        ]
+        batch = pyarrow.RecordBatch.from_arrays(arrays, names=list(columns)).replace_schema_metadata(
+            {b'metadata': json.dumps(metadata).encode()})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+    raise UnsupportedFormat(f"Cannot encode {media_type}")
+
+
+def decode_response(body: bytes, media_type: str) -> Tuple[Dict, Dict]:
+    """
+    (columns, metadata) from an encoded response; numeric columns come back
+    as NumPy arrays (for clients, benchmarks and parity checks)
+    """
+    if media_type == MSGPACK:
+        payload = msgpack.unpackb(body, raw=False)
+        columns = {
+            name: _column_array(column) if isinstance(column, dict) else column
+            for name, column in payload.pop('columns').items()
+        }
+        return columns, payload
+    if media_type == ARROW:
+        pyarrow = _arrow()
+        table = pyarrow.ipc.open_stream(body).read_all()
+        metadata = json.loads(table.schema.metadata[b'metadata'])
+        columns = {}
+        for name in table.column_names:
+            column = table.column(name)
+            columns[name] = column.to_pylist() if pyarrow.types.is_string(column.type) else column.to_numpy()
+        return columns, metadata
+    raise UnsupportedFormat(f"Cannot decode {media_type}")
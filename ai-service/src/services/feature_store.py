@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Stored address width (the 'S64' address column); longer keys are rejected
+MAX_ADDRESS_BYTES = 64
+
+
+class FeatureStore:
+    """
+    Rolling per-vault feature history for the LSTM time dimension
+    All vaults share one preallocated float32 array of shape
+    [max_vaults, 2 * window, num_features]. Each vault's rows form a ring of
+    window + 1 positions, and the first window - 1 positions are mirrored
+    after the ring. That way the latest `window` observations are always one
+    contiguous slice, so window() returns a view without copying. The spare
+    position means the next write never lands inside a window that was
+    already handed out.
+    With a path, the arrays are memory-mapped files and history survives
+    restarts.
+    window() only answers once a vault has min_history observations, so
+    callers use the request's snapshot until then. When every slot is taken,
+    the least recently ingested vault is evicted to make room.
+    Addresses are stored in MAX_ADDRESS_BYTES bytes. Longer ones are rejected
+    rather than truncated, since truncation could merge two vaults after a
+    reopen.
+    """
+    def __init__(self, max_vaults: int = 10000, window: int = 10, num_features: int = 10,
+                 path: Optional[str] = None, min_history: Optional[int] = None):
+        self.max_vaults = max(1, int(max_vaults))
+        self.window_size = int(window)
+        self.num_features = int(num_features)
+        self.min_history = self.window_size if min_history is None else max(1, int(min_history))
+        self.ring = self.window_size + 1
+        self.rows = 2 * self.window_size
+        self.path = path or None
+
+        self._lock = threading.Lock()
+        # Address -> slot, least recently ingested first
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self.evictions = 0
+
+        if self.path:
+            self._open_mapped()
+        else:
+            self._data = np.zeros((self.max_vaults, self.rows, self.num_features), dtype=np.float32)
+            self._counts = np.zeros(self.max_vaults, dtype=np.int64)
+            self._addresses = np.zeros(self.max_vaults, dtype=f'S{MAX_ADDRESS_BYTES}')
+
+    def _open_mapped(self):
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, 'store.json')
+        meta = {'max_vaults': self.max_vaults, 'window': self.window_size, 'num_features': self.num_features}
+
+        exists = os.path.exists(meta_path)
+        if exists:
+            with open(meta_path) as f:
+                stored = json.load(f)
+            if stored != meta:
+                raise ValueError(f"Feature store at {self.path} has layout {stored}, expected {meta}")
+        mode = 'r+' if exists else 'w+'
+
+        self._data = np.memmap(os.path.join(self.path, 'features.f32'), dtype=np.float32, mode=mode,
+                               shape=(self.max_vaults, self.rows, self.num_features))
+        self._counts = np.memmap(os.path.join(self.path, 'counts.i64'), dtype=np.int64, mode=mode,
+                                 shape=(self.max_vaults,))
+        self._addresses = np.memmap(os.path.join(self.path, 'addresses.s64'), dtype=f'S{MAX_ADDRESS_BYTES}',
+                                    mode=mode, shape=(self.max_vaults,))
+
+        if exists:
+            # Recency is not persisted: reopened vaults start in slot order
+            for slot in np.flatnonzero(self._counts > 0):
+                self._slots[self._addresses[slot].decode()] = int(slot)
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+
+    @staticmethod
+    def normalize_address(address: str) -> str:
+        """Lowercased address; ValueError when it does not fit the stored width"""
+        address = str(address).lower()
+        if len(address.encode()) > MAX_ADDRESS_BYTES:
+            raise ValueError(f"Address is longer than {MAX_ADDRESS_BYTES} bytes")
+        return address
+
+    def _slot(self, address: str) -> Optional[int]:
+        """Slot of a stored vault (never one for addresses too long to store)"""
+        return self._slots.get(str(address).lower())
+
+    def _slot_for(self, address: str) -> int:
+        slot = self._slots.get(address)
+        if slot is not None:
+            self._slots.move_to_end(address)
+            return slot
+        if len(self._slots) < self.max_vaults:
+            slot = len(self._slots)
+        else:
+            _, slot = self._slots.popitem(last=False)
+            self._counts[slot] = 0
+            self.evictions += 1
+        self._addresses[slot] = address.encode()
+        self._slots[address] = slot
+        return slot
+
+    def _write(self, slot: int, row: np.ndarray):
+        count = int(self._counts[slot])
+        if count == 0:
+            # First observation fills the whole history (matches the old repeated sequence)
+            self._data[slot] = row
+        else:
+            position = count % self.ring
+            self._data[slot, position] = row
+            if position < self.window_size - 1:
+                self._data[slot, position + self.ring] = row
+        self._counts[slot] = count + 1
+
+    def ingest(self, address: str, features: np.ndarray):
+        """
+        Append one normalized [num_features] observation for a vault
+        """
+        address = self.normalize_address(address)
+        with self._lock:
+            self._write(self._slot_for(address), features)
+
+    def ingest_batch(self, addresses: List[str], matrix: np.ndarray) -> Dict[int, str]:
+        """
+        Append one observation per row of an [N, num_features] matrix
+        Returns {row index: error} for rows that could not be stored
+        """
+        errors = {}
+        with self._lock:
+            for i, address in enumerate(addresses):
+                try:
+                    address = self.normalize_address(address)
+                except ValueError as e:
+                    errors[i] = str(e)
+                    continue
+                self._write(self._slot_for(address), matrix[i])
+        return errors
+
+    def _window_start(self, count: int) -> int:
+        return (count - self.window_size) % self.ring
+
+    def recent(self, address: str) -> Optional[np.ndarray]:
+        """
+        Zero-copy [window, num_features] view of the latest observations,
+        oldest first, or None when the vault has no history. Before the
+        window fills, the first observation stands in for the missing steps
+        """
+        slot = self._slot(address)
+        if slot is None:
+            return None
+        start = self._window_start(int(self._counts[slot]))
+        return self._data[slot, start:start + self.window_size]
+
+    def window(self, address: str) -> Optional[np.ndarray]:
+        """recent(), or None until the vault has min_history observations"""
+        if self.history_length(address) < self.min_history:
+            return None
+        return self.recent(address)
+
+    def windows(self, addresses: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.window(address) for address in addresses]
+
+    def history_length(self, address: str) -> int:
+        slot = self._slot(address)
+        return 0 if slot is None else int(self._counts[slot])
+
+    def flush(self):
+        """Write memory-mapped pages back to disk"""
+        if self.path:
+            with self._lock:
+                self._data.flush()
+                self._counts.flush()
+                self._addresses.flush()
+
+    def stats(self) -> Dict:
+        return {
+            'vaults': len(self._slots),
+            'max_vaults': self.max_vaults,
+            'window': self.window_size,
+            'min_history': self.min_history,
+            'evictions': self.evictions,
+            'observations': int(self._counts.sum()),
+            'persistent': bool(self.path),
+            'memory_bytes': int(self._data.nbytes),
+        }
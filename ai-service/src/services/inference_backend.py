@@ -0,0 +1,155 @@
+import argparse
+import copy
+import json
+import time
+from typing import Dict, List, Optional, Sequence
+
+import torch
+import torch.nn as nn
+
+# Selectable forward-pass implementations of YieldPredictionModel
+BACKENDS = ('eager', 'script', 'trace', 'int8')
+
+
+def build_backend(model: nn.Module, mode: str, sequence_length: int = 10,
+                  num_features: int = 10) -> nn.Module:
+    """
+    Compile an eval-mode model for CPU inference
+      - eager: the model itself
+      - script / trace: TorchScript, frozen so weights become constants
+      - int8: dynamically quantized LSTM and Linear layers (float32 in/out)
+    Compiled backends copy the weights, so rebuild after loading new ones
+    """
+    if mode not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {mode}")
+    model.eval()
+    if mode == 'eager':
+        return model
+
+    if mode == 'int8':
+        return torch.ao.quantization.quantize_dynamic(
+            copy.deepcopy(model), {nn.LSTM, nn.Linear}, dtype=torch.qint8
+        )
+
+    with torch.no_grad():
+        if mode == 'script':
+            compiled = torch.jit.script(model)
+        else:
+            example = torch.zeros(1, sequence_length, num_features, device=next(model.parameters()).device)
+            compiled = torch.jit.trace(model, example)
+        return torch.jit.freeze(compiled)
+
+
+def _inputs(batch_size: int, sequence_length: int, num_features: int, seed: int) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    # Normalized features mostly sit in [0, 1]
+    return torch.rand(batch_size, sequence_length, num_features, generator=generator)
+
+
+def measure_drift(reference: nn.Module, candidate: nn.Module, batch_size: int = 256,
+                  sequence_length: int = 10, num_features: int = 10, seed: int = 0) -> float:
+    """
+    Largest absolute output difference between two backends on random input
+    """
+    batch = _inputs(batch_size, sequence_length, num_features, seed)
+    with torch.no_grad():
+        expected = reference(batch)
+        actual = candidate(batch)
+    return float((expected - actual).abs().max())
+
+
+def measure_latency(module: nn.Module, batch_size: int, repeats: int = 50, warmup: int = 5,
+                    sequence_length: int = 10, num_features: int = 10) -> Dict:
+    """
+    Per-call latency percentiles (ms) and throughput (sequences/s)
+    """
+    batch = _inputs(batch_size, sequence_length, num_features, seed=1)
+    timings = []
+    with torch.no_grad():
+        for _ in range(warmup):
+            module(batch)
+        for _ in range(repeats):
+            start = time.perf_counter()
+            module(batch)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {
+        'batch_size': batch_size,
+        'mean_ms': round(mean * 1000, 4),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 4),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        'throughput_per_s': round(batch_size / mean, 1),
+    }
+
+
+def compare_backends(model: nn.Module, modes: Sequence[str] = BACKENDS,
+                     batch_sizes: Sequence[int] = (1, 8, 64, 256), repeats: int = 50,
+                     tolerance: float = 1e-4, sequence_length: int = 10,
+                     num_features: int = 10) -> Dict:
+    """
+    Parity and latency report for each backend against eager mode
+    Recommends the backend with the best mean throughput whose drift stays
+    within tolerance
+    """
+    model.eval()
+    report: Dict = {'tolerance': tolerance, 'torch_num_threads': torch.get_num_threads(), 'backends': {}}
+    for mode in modes:
+        try:
+            module = build_backend(model, mode, sequence_length, num_features)
+        except Exception as e:
+            report['backends'][mode] = {'error': str(e)}
+            continue
+        drift = measure_drift(model, module, sequence_length=sequence_length, num_features=num_features)
+        report['backends'][mode] = {
+            'max_abs_drift': drift,
+            'within_tolerance': drift <= tolerance,
+            'latency': [
+                measure_latency(module, size, repeats, sequence_length=sequence_length,
+                                num_features=num_features)
+                for size in batch_sizes
+            ],
+        }
+
+    best, best_throughput = None, 0.0
+    for mode, result in report['backends'].items():
+        if not result.get('within_tolerance'):
+            continue
+        throughput = sum(row['throughput_per_s'] for row in result['latency']) / len(result['latency'])
+        if throughput > best_throughput:
+            best, best_throughput = mode, throughput
+    report['recommended'] = best
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare YieldPredictionModel inference backends")
+    parser.add_argument('--modes', default=','.join(BACKENDS))
+    parser.add_argument('--batch-sizes', default='1,8,64,256')
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--tolerance', type=float, default=None)
+    parser.add_argument('--weights', default=None, help="State dict to load (default: AI_MODEL_PATH)")
+    args = parser.parse_args(argv)
+
+    import config
+    from services.pytorch_predictor import YieldPredictionModel
+
+    model = YieldPredictionModel()
+    weights = args.weights or config.MODEL_PATH
+    try:
+        model.load_state_dict(torch.load(weights, map_location='cpu'))
+    except FileNotFoundError:
+        print(f"⚠️  {weights} not found, comparing an untrained model")
+
+    report = compare_backends(
+        model,
+        modes=[mode.strip() for mode in args.modes.split(',') if mode.strip()],
+        batch_sizes=[int(size) for size in args.batch_sizes.split(',')],
+        repeats=args.repeats,
+        tolerance=config.BACKEND_TOLERANCE if args.tolerance is None else args.tolerance,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import config
+from services.admission import AdmissionQueue, AdmissionRejected, current_request
+from services.metrics import metrics
+
+# Predictor methods that may be dispatched to the pool
+ALLOWED_METHODS = {
+    'predict_apy',
+    'predict_apy_batch',
+    'predict_risk_score',
+    'predict_risk_score_batch',
+    'generate_strategy',
+    'should_rebalance',
+    'should_rebalance_batch',
+    'evaluate_vault',
+    'predict_apy_columns',
+    'predict_risk_score_columns',
+    'should_rebalance_columns',
+    'optimize_portfolio',
+}
+
+# Per-process model replica (process mode only)
+_worker_predictor = None
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when a call is not admitted to the pool: 429 when the wait queue
+    is full, 503 when its deadline (or the queue timeout) cannot be met
+    """
+
+    def __init__(self, retry_after: int = 1, status_code: int = 503, reason: str = 'timeout'):
+        super().__init__(f"Inference pool is saturated ({reason}), retry later")
+        self.retry_after = retry_after
+        self.status_code = status_code
+        self.reason = reason
+
+
+def _resolve_num_threads(mode: str, workers: int) -> int:
+    if config.TORCH_NUM_THREADS > 0:
+        return config.TORCH_NUM_THREADS
+    cpus = os.cpu_count() or 1
+    # Replicas split the cores; a thread pool shares one intra-op pool
+    return max(1, cpus // workers) if mode == 'process' else cpus
+
+
+def set_torch_threads(num_threads: int):
+    """Intra-op threads, and inter-op threads when AI_TORCH_INTEROP_THREADS is set"""
+    import torch
+    torch.set_num_threads(num_threads)
+    if config.TORCH_INTEROP_THREADS > 0 and torch.get_num_interop_threads() != config.TORCH_INTEROP_THREADS:
+        try:
+            torch.set_num_interop_threads(config.TORCH_INTEROP_THREADS)
+        except RuntimeError:
+            pass  # Fixed once inter-op work has run in this process
+
+
+def _init_process_worker(num_threads: int):
+    """Build this process's own YieldPredictionModel replica"""
+    global _worker_predictor
+    set_torch_threads(num_threads)
+
+    # One request at a time per process, so there is nothing to batch
+    config.BATCH_ENABLED = False
+    from services.pytorch_predictor import get_predictor
+    _worker_predictor = get_predictor()
+    # Replicas follow registry swaps published by the main process
+    _worker_predictor.watch_registry(config.MODEL_REGISTRY_POLL_SECONDS)
+
+
+def _call_in_process(method: str, args: tuple) -> Any:
+    return getattr(_worker_predictor, method)(*args)
+
+
+class InferenceExecutor:
+    """
+    Runs blocking predictor calls off the asyncio event loop
+    Modes:
+      - thread: bounded thread pool sharing the in-process predictor (and
+        its batch scheduler)
+      - process: process pool where each process holds its own model replica
+    In-flight calls are capped at workers + queue_size; callers beyond that
+    wait in a bounded priority queue (see services.admission) up to their
+    deadline, or queue_timeout_ms without one, and are otherwise rejected
+    with ExecutorSaturated
+    """
+    def __init__(self, mode: str = 'thread', workers: Optional[int] = None,
+                 queue_size: int = 64, queue_timeout_ms: float = 50, max_waiting: int = 256):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.mode = mode
+        self.queue_size = max(0, queue_size)
+        self._requested_workers = workers
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+        self.admission = AdmissionQueue(1, max_waiting, queue_timeout_ms)
+        self._predictor = None
+        self.resize()
+
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def _ensure_pool(self) -> Executor:
+        if self._pool is not None:
+            return self._pool
+        with self._pool_lock:
+            if self._pool is None:
+                if self.mode == 'process':
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_process_worker,
+                        initargs=(self.num_threads,),
+                    )
+                else:
+                    set_torch_threads(self.num_threads)
+                    from services.pytorch_predictor import get_predictor
+                    self._predictor = get_predictor()
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='inference'
+                    )
+        return self._pool
+
+    def resize(self):
+        """
+        Size workers, in-flight slots and torch threads from the current
+        config, e.g. after a runtime re-tune changed BATCH_MAX_SIZE or
+        TORCH_NUM_THREADS; only before the pool starts
+        """
+        if self._pool is not None:
+            raise RuntimeError("The inference pool is already running")
+        workers = self._requested_workers
+        if not workers:
+            # Thread workers mostly wait on the batch scheduler, so allow a full batch
+            workers = config.BATCH_MAX_SIZE if self.mode == 'thread' else (os.cpu_count() or 1)
+        self.workers = workers
+        self.max_in_flight = workers + self.queue_size
+        self.num_threads = _resolve_num_threads(self.mode, workers)
+        self.admission.resize(self.max_in_flight)
+
+    def set_num_threads(self, num_threads: int):
+        """Override the intra-op thread count before the pool starts (pinned workers)"""
+        if self._pool is not None:
+            raise RuntimeError("The inference pool is already running")
+        self.num_threads = max(1, int(num_threads))
+
+    async def run(self, method: str, *args, priority: Optional[int] = None,
+                  deadline: Optional[float] = None) -> Any:
+        """
+        Await a predictor method on the pool, e.g. run('predict_apy', vault)
+        Priority and deadline (time.monotonic) default to the current request's
+        """
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f"Method not available on the inference pool: {method}")
+
+        request_priority, request_deadline = current_request()
+        try:
+            with metrics.stage('executor_wait'):
+                await self.admission.acquire(
+                    request_priority if priority is None else priority,
+                    request_deadline if deadline is None else deadline,
+                )
+        except AdmissionRejected as e:
+            self._rejected += 1
+            if metrics.enabled:
+                metrics.model_calls.inc(method, 'rejected')
+            raise ExecutorSaturated(e.retry_after, e.status_code, e.reason)
+
+        self._in_flight += 1
+        concurrency = self._in_flight
+        started = time.perf_counter()
+        try:
+            pool = self._ensure_pool()
+            loop = asyncio.get_running_loop()
+            if self.mode == 'process':
+                result = await loop.run_in_executor(pool, _call_in_process, method, args)
+            else:
+                result = await loop.run_in_executor(pool, getattr(self._predictor, method), *args)
+            self._completed += 1
+            if metrics.enabled:
+                metrics.model_calls.inc(method, 'ok')
+            return result
+        except Exception:
+            self._failed += 1
+            if metrics.enabled:
+                metrics.model_calls.inc(method, 'error')
+            raise
+        finally:
+            self._in_flight -= 1
+            self.admission.release(time.perf_counter() - started, concurrency)
+
+    def record_degraded(self, method: str):
+        """Count a call answered by a degraded fast path instead of the pool"""
+        self.admission.degraded += 1
+        if metrics.enabled:
+            metrics.model_calls.inc(method, 'degraded')
+
+    def stats(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'torch_num_threads': self.num_threads,
+            'max_in_flight': self.max_in_flight,
+            'in_flight': self._in_flight,
+            'completed': self._completed,
+            'failed': self._failed,
+            'rejected': self._rejected,
+            'admission': self.admission.stats(),
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global executor instance
+inference_executor = InferenceExecutor(
+    mode=config.EXECUTOR_MODE,
+    workers=config.EXECUTOR_WORKERS,
+    queue_size=config.EXECUTOR_QUEUE_SIZE,
+    queue_timeout_ms=config.EXECUTOR_QUEUE_TIMEOUT_MS,
+    max_waiting=config.ADMISSION_MAX_QUEUE,
+)
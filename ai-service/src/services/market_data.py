@@ -0,0 +1,279 @@
+"""
+Feature enrichment from an external market-data source
+
+VaultData carries address, tvl and current_apy; the other model features
+(volume, volatility, users, shares, price change, liquidity, fee) fall back
+to defaults unless a request sends them. When AI_MARKET_DATA_URL is set,
+the missing ones are filled from that source before inference.
+
+The source is one bulk endpoint:
+    POST <url>  {"addresses": ["0x..", ...]}
+    ->  {"vaults": {"0x..": {"volume_24h": .., "volatility": .., ...}, ...}}
+        (a list of objects with an "address" field is accepted too)
+Lookups go through a TTL + LRU cache. Misses arriving within coalesce_ms
+of each other are sent as one bulk request (split at bulk_size), and
+concurrent lookups of the same address share one in-flight fetch. All I/O
+is on the event loop through a pooled httpx.AsyncClient. A request waits
+at most budget_ms for its misses; fetches still running after that finish
+in the background and fill the cache for the next request, and the
+request goes ahead with defaults. After a failed fetch the source is
+skipped for a short backoff, so an outage costs no latency
+"""
+import asyncio
+import math
+import time
+from typing import Dict, List, Set
+
+import numpy as np
+
+import config
+from services.metrics import metrics
+from services.prediction_cache import PredictionCache
+
+# Vault fields the source may fill (model features beyond VaultData)
+ENRICH_FIELDS = ('volume_24h', 'volatility', 'user_count', 'total_shares', 'price_change_24h', 'liquidity',
+                 'fee_bps')
+_FIELD_SET = frozenset(ENRICH_FIELDS)
+# Vaults processed between yields to the event loop in bulk lookups
+_YIELD_EVERY = 1024
+# Seconds the source is skipped after a failed fetch
+_BACKOFF_SECONDS = 5.0
+
+
+def _address_key(address) -> str:
+    return str(address).strip().lower()
+
+
+def _clean(record) -> Dict[str, float]:
+    """The usable ENRICH_FIELDS of one source record"""
+    fields = {}
+    if isinstance(record, dict):
+        for name in ENRICH_FIELDS:
+            value = record.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                fields[name] = float(value)
+    return fields
+
+
+class MarketDataClient:
+    """Cached, coalescing bulk client for the market-data source"""
+
+    def __init__(self, url: str, timeout_ms: float = 1000, budget_ms: float = 25, ttl_seconds: float = 60,
+                 max_entries: int = 100000, max_connections: int = 20, bulk_size: int = 500,
+                 coalesce_ms: float = 2, api_key: str = ''):
+        self.url = url
+        self.timeout = max(0.001, timeout_ms / 1000)
+        self.budget = max(0.0, budget_ms / 1000)
+        self.max_connections = max(1, int(max_connections))
+        self.bulk_size = max(1, int(bulk_size))
+        self.coalesce = max(0.0, coalesce_ms / 1000)
+        self.api_key = api_key
+        self.cache = PredictionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+        self._client = None
+        self._loop = None
+        self._inflight: Dict[str, asyncio.Future] = {}  # Address -> fetch result (fields or None)
+        self._pending: List[str] = []  # Addresses waiting for the next bulk request
+        self._flush_handle = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._down_until = 0.0
+
+        self.lookups = 0
+        self.coalesced = 0
+        self.requests = 0
+        self.fetched = 0
+        self.not_found = 0
+        self.failures = 0
+        self.late = 0
+        self.skipped = 0
+        self.fetch_ms_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def _http(self):
+        """Pooled client bound to the running event loop (created on first use)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # httpx is only needed when enrichment is configured
+            import httpx
+
+            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else None
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=headers,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._loop = loop
+            self._inflight.clear()
+            self._pending.clear()
+            self._flush_handle = None
+        return self._client
+
+    async def start(self):
+        """Create the client up front, so the first request does not import httpx"""
+        if self.enabled:
+            self._http()
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = self._loop = None
+
+    def _flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.bulk_size):
+            task = asyncio.get_running_loop().create_task(self._fetch(pending[start:start + self.bulk_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, addresses: List[str]):
+        """One bulk request; resolves the addresses' futures and fills the cache"""
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            response = await self._http().post(self.url, json={'addresses': addresses})
+            response.raise_for_status()
+            vaults = response.json().get('vaults', {})
+            if isinstance(vaults, list):
+                vaults = {record.get('address'): record for record in vaults if isinstance(record, dict)}
+            found = {_address_key(address): _clean(record) for address, record in vaults.items()}
+        except Exception as e:
+            self.failures += 1
+            self._down_until = time.monotonic() + _BACKOFF_SECONDS
+            print(f"⚠️  Market data fetch failed ({len(addresses)} vaults): {e!r}")
+            found = None
+        finally:
+            self.fetch_ms_total += (time.perf_counter() - started) * 1000
+        for address in addresses:
+            future = self._inflight.pop(address, None)
+            fields = None if found is None else found.get(address, {})
+            if fields is not None:
+                # Unknown vaults are cached empty, so they are not asked for again until expiry
+                self.cache.put(address, fields)
+                self.fetched += 1 if fields else 0
+                self.not_found += 0 if fields else 1
+            if future is not None and not future.done():
+                future.set_result(fields)
+
+    async def lookup(self, addresses: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Source fields per address (normalized key), for those known within
+        the latency budget
+        """
+        results, waiting = {}, {}
+        self.lookups += len(addresses)
+        self._http()
+        for count, address in enumerate(set(map(_address_key, addresses)), 1):
+            if count % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+            fields = self.cache.get(address)
+            if fields is not None:
+                results[address] = fields
+                continue
+            future = self._inflight.get(address)
+            if future is None:
+                if time.monotonic() < self._down_until:
+                    self.skipped += 1
+                    continue
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[address] = future
+                self._pending.append(address)
+            else:
+                self.coalesced += 1
+            waiting[address] = future
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.coalesce, self._flush)
+        if waiting:
+            # Waiting never cancels the fetches: late ones still fill the cache
+            await asyncio.wait(waiting.values(), timeout=self.budget)
+            for address, future in waiting.items():
+                if not future.done():
+                    self.late += 1
+                elif future.result():
+                    results[address] = future.result()
+        return results
+
+    async def enrich(self, vaults: List[Dict]) -> List[Dict]:
+        """Vault dicts with missing ENRICH_FIELDS filled from the source (inputs untouched)"""
+        if not self.enabled or not vaults:
+            return vaults
+        # A vault needs a lookup when a field is absent or None
+        needed = [vault['address'] for vault in vaults
+                  if not vault.keys() >= _FIELD_SET or None in vault.values()]
+        if not needed:
+            return vaults
+        with metrics.stage('enrich'):
+            found = await self.lookup(needed)
+            enriched = []
+            for count, vault in enumerate(vaults, 1):
+                if count % _YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+                fields = found.get(_address_key(vault['address']))
+                if fields:
+                    merged = {**fields, **vault}  # Values the request sent win
+                    if None in vault.values():
+                        merged.update((name, value) for name, value in fields.items() if vault.get(name) is None)
+                    vault = merged
+                enriched.append(vault)
+        return enriched
+
+    async def enrich_columns(self, columns: Dict) -> Dict:
+        """enrich for columnar batches: adds a float64 column per missing field"""
+        missing = [name for name in ENRICH_FIELDS if name not in columns]
+        if not self.enabled or not missing or not columns['address']:
+            return columns
+        with metrics.stage('enrich'):
+            found = await self.lookup([address for address in columns['address'] if address])
+        if not found:
+            return columns
+        from services.pytorch_predictor import FEATURE_SPEC
+
+        defaults = {name: default for name, default, _ in FEATURE_SPEC}
+        rows = [found.get(_address_key(address), {}) for address in columns['address']]
+        columns = dict(columns)
+        for name in missing:
+            columns[name] = np.array([row.get(name, defaults[name]) for row in rows], dtype=np.float64)
+        return columns
+
+    def stats(self) -> Dict:
+        lookups = self.lookups
+        return {
+            'enabled': self.enabled,
+            'url': self.url or None,
+            'budget_ms': round(self.budget * 1000, 3),
+            'coalesce_ms': round(self.coalesce * 1000, 3),
+            'bulk_size': self.bulk_size,
+            'max_connections': self.max_connections,
+            'lookups': lookups,
+            'coalesced': self.coalesced,
+            'requests': self.requests,
+            'fetched': self.fetched,
+            'not_found': self.not_found,
+            'failures': self.failures,
+            'late': self.late,
+            'skipped': self.skipped,
+            'in_flight': len(self._inflight),
+            'avg_fetch_ms': round(self.fetch_ms_total / self.requests, 3) if self.requests else None,
+            'source_down': time.monotonic() < self._down_until,
+            'cache': self.cache.stats(),
+        }
+
+
+# Global instance
+market_data = MarketDataClient(
+    url=config.MARKET_DATA_URL,
+    timeout_ms=config.MARKET_DATA_TIMEOUT_MS,
+    budget_ms=config.MARKET_DATA_BUDGET_MS,
+    ttl_seconds=config.MARKET_DATA_TTL_SECONDS,
+    max_entries=config.MARKET_DATA_MAX_ENTRIES,
+    max_connections=config.MARKET_DATA_MAX_CONNECTIONS,
+    bulk_size=config.MARKET_DATA_BULK_SIZE,
+    coalesce_ms=config.MARKET_DATA_COALESCE_MS,
+    api_key=config.MARKET_DATA_API_KEY,
+)
@@ -0,0 +1,294 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import config
+
+# Latency buckets in seconds (100us .. 5s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# perf_counter() at the moment the current HTTP request entered the app
+_request_started: contextvars.ContextVar = contextvars.ContextVar('request_started', default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_labels(self.label_names, labels)} {_number(value)}' for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (last slot = +Inf), then sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = _labels(self.label_names, labels, f'le="{_number(bound)}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            suffix = _labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{suffix} {_number(total)}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'stage', 'started')
+
+    def __init__(self, histogram: Histogram, stage: str):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics in Prometheus text format
+    Observations are a bisect plus a locked increment, so hot-path stages can
+    be timed on every call. Collectors add gauges read at scrape time (pool
+    occupancy, cache counters) without touching the hot path
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Dict[str, Tuple[str, float]]]] = []
+
+        self.stages = self.histogram(
+            'ai_stage_duration_seconds', 'Time spent per processing stage', ['stage'])
+        self.requests = self.histogram(
+            'ai_request_duration_seconds', 'End-to-end HTTP request latency', ['route'])
+        self.responses = self.counter(
+            'ai_requests_total', 'HTTP responses by route and status', ['route', 'status'])
+        self.in_flight = self.gauge(
+            'ai_requests_in_flight', 'HTTP requests currently being served')
+        self.model_calls = self.counter(
+            'ai_model_calls_total', 'Predictor calls dispatched to the inference pool', ['method', 'outcome'])
+        self.forward_batches = self.counter(
+            'ai_model_forward_batches_total', 'Model forward passes')
+        self.forward_sequences = self.counter(
+            'ai_model_forward_sequences_total', 'Sequences scored by model forward passes')
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect: Callable[[], Dict[str, Tuple[str, float]]]):
+        """
+        collect() returns {metric name: (help, value)}, rendered as gauges
+        """
+        self._collectors.append(collect)
+
+    def record_forward(self, sequences: int):
+        if self.enabled:
+            self.forward_batches.inc()
+            self.forward_sequences.inc(amount=sequences)
+
+    def stage(self, name: str):
+        """Context manager that records its duration under ai_stage_duration_seconds"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self.stages, name)
+
+    def timed(self, name: str):
+        """Decorator form of stage()"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def endpoint(self, fn):
+        """
+        Route decorator: records request parsing and validation (time from
+        the request entering the app to the handler starting) and the
+        handler itself
+        """
+        if not asyncio.iscoroutinefunction(fn):
+            raise TypeError("metrics.endpoint expects an async route")
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return await fn(*args, **kwargs)
+            started = time.perf_counter()
+            request_started = _request_started.get()
+            if request_started is not None:
+                self.stages.observe(started - request_started, 'validation')
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.stages.observe(time.perf_counter() - started, 'handler')
+        return wrapper
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                values = collect()
+            except Exception:
+                continue  # A failing collector must not break the scrape
+            for name, (help, value) in sorted(values.items()):
+                lines.extend([f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {_number(value)}'])
+        return '\n'.join(lines) + '\n'
+
+
+def _route_template(scope) -> str:
+    """
+    Matched route as a template (/x/{address}) to keep label cardinality
+    bounded; 'unmatched' for requests that hit no route
+    """
+    if 'route' not in scope:
+        return 'unmatched'
+    segments = scope['path'].split('/')
+    for name, value in scope.get('path_params', {}).items():
+        value = str(value)
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] == value:
+                segments[i] = '{' + name + '}'
+                break
+    return '/'.join(segments)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by matched route template
+    """
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = _request_started.set(started)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        self.registry.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.in_flight.dec()
+            _request_started.reset(token)
+            route = _route_template(scope)
+            self.registry.requests.observe(time.perf_counter() - started, route)
+            self.registry.responses.inc(route, str(status))
+
+
+# Global registry
+metrics = MetricsRegistry(enabled=config.METRICS_ENABLED)
@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+
+class ModelNotReady(Exception):
+    """Raised when the predictor is requested before it finished loading"""
+
+    def __init__(self, state: str, retry_after: int = 1):
+        super().__init__(f"Model is not ready ({state}), retry later")
+        self.state = state
+        self.retry_after = retry_after
+
+
+class ModelLoader:
+    """
+    Builds the PyTorchPredictor off the import path
+    start() loads in a background thread: import torch, construct the
+    predictor (weights, inference backend), then run warm-up forward passes
+    over representative batch sizes so the first requests do not pay one-off
+    allocation and compilation costs
+    States: idle -> loading -> warming -> ready, or failed
+    Once ready, later model versions are swapped in by swap() or by the
+    predictor following the registry's ACTIVE pointer; serving continues on
+    the current version meanwhile
+    """
+    def __init__(self, warmup_batch_sizes: Optional[List[int]] = None):
+        self.warmup_batch_sizes = list(warmup_batch_sizes or [])
+        self.state = 'idle'
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_ms: Dict[int, float] = {}
+
+        self._predictor = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.swap_status: Dict = {'state': 'idle'}
+        self._swap_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Begin loading in the background (no-op once started)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = 'loading'
+            self._thread = threading.Thread(target=self._load, name='model-loader', daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            from services.pytorch_predictor import get_predictor
+            predictor = get_predictor()
+            self.load_seconds = round(time.perf_counter() - started, 3)
+
+            self.state = 'warming'
+            self.warmup_ms = predictor.warm_up(self.warmup_batch_sizes)
+
+            self._predictor = predictor
+            self.state = 'ready'
+            predictor.watch_registry(config.MODEL_REGISTRY_POLL_SECONDS)
+            print(f"✅ Model ready in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"❌ Model load failed: {e}")
+        finally:
+            self._done.set()
+
+    def swap(self, action: str, version: Optional[str] = None) -> threading.Thread:
+        """
+        Activate a registry version or roll back in the background
+        One swap runs at a time; raises RuntimeError while another is running
+        """
+        predictor = self.get()
+        if action not in ('activate', 'rollback'):
+            raise ValueError(f"Unknown swap action: {action}")
+        with self._lock:
+            if self._swap_thread is not None and self._swap_thread.is_alive():
+                raise RuntimeError(f"A model swap is already running ({self.swap_status.get('version')})")
+            self.swap_status = {'state': 'loading', 'action': action, 'version': version,
+                                'from_version': predictor.model_version}
+            self._swap_thread = threading.Thread(
+                target=self._swap, args=(predictor, action, version), name='model-swap', daemon=True)
+            self._swap_thread.start()
+            return self._swap_thread
+
+    def _swap(self, predictor, action: str, version: Optional[str]):
+        started = time.perf_counter()
+        try:
+            if action == 'activate':
+                self.swap_status['warmup_ms'] = predictor.activate_version(version)
+            else:
+                self.swap_status['version'] = predictor.rollback()
+            self.swap_status['state'] = 'done'
+        except Exception as e:
+            self.swap_status.update(state='failed', error=str(e))
+            print(f"❌ Model {action} failed: {e}")
+        finally:
+            self.swap_status['seconds'] = round(time.perf_counter() - started, 3)
+
+    @property
+    def ready(self) -> bool:
+        return self._predictor is not None
+
+    def get(self):
+        """The loaded predictor; raises ModelNotReady until warm-up finished"""
+        predictor = self._predictor
+        if predictor is None:
+            raise ModelNotReady(self.state)
+        return predictor
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finished; returns whether the model is ready"""
+        self.start()
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> Dict:
+        status = {
+            'ready': self.ready,
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'warmup_ms': self.warmup_ms,
+        }
+        if self._predictor is not None:
+            status['model_version'] = self._predictor.model_version
+            status['backend'] = self._predictor.backend_name
+            status['swap'] = self.swap_status
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+# Global loader instance
+model_loader = ModelLoader(warmup_batch_sizes=config.MODEL_WARMUP_BATCH_SIZES)
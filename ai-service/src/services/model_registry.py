@@ -0,0 +1,185 @@
+"""
+Versioned model artifacts on disk
+
+    <registry>/
+        <version>/weights.pth   state dict loaded by PyTorchPredictor
+        <version>/meta.json     created_at, source, notes, training metrics
+        ACTIVE                  version every service process should serve
+        activations.json        activation history, newest last (rollback)
+
+Version directories are immutable once registered. ACTIVE is replaced
+atomically, so running services polling it always read a complete name
+
+Usage (from src/):
+    python -m services.model_registry list
+    python -m services.model_registry register models/yield_predictor.pth --activate
+    python -m services.model_registry activate v3
+    python -m services.model_registry rollback
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import config
+
+WEIGHTS_FILE = 'weights.pth'
+META_FILE = 'meta.json'
+ACTIVE_FILE = 'ACTIVE'
+ACTIVATIONS_FILE = 'activations.json'
+_VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+
+class ModelRegistry:
+    """
+    Filesystem registry of versioned model weights
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def _version_dir(self, version: str) -> str:
+        if not _VERSION_PATTERN.match(version or ''):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.path, version)
+
+    def _write_atomic(self, name: str, text: str):
+        os.makedirs(self.path, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.path, prefix=f'.{name}.')
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(temporary, os.path.join(self.path, name))
+
+    def versions(self) -> List[Dict]:
+        """Registered versions with their metadata, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        found = []
+        for name in os.listdir(self.path):
+            weights = os.path.join(self.path, name, WEIGHTS_FILE)
+            if not _VERSION_PATTERN.match(name) or not os.path.isfile(weights):
+                continue
+            found.append({'version': name, **self.metadata(name)})
+        return sorted(found, key=lambda item: (item.get('created_at', 0), item['version']))
+
+    def metadata(self, version: str) -> Dict:
+        try:
+            with open(os.path.join(self._version_dir(version), META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def weights_path(self, version: str) -> str:
+        path = os.path.join(self._version_dir(version), WEIGHTS_FILE)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Model version {version} is not registered")
+        return path
+
+    def _next_version(self) -> str:
+        numbers = [int(item['version'][1:]) for item in self.versions() if re.match(r'^v\d+$', item['version'])]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def register(self, weights: str, version: Optional[str] = None, metadata: Optional[Dict] = None) -> str:
+        """
+        Copy a weights file into a new immutable version directory
+        """
+        version = version or self._next_version()
+        target = self._version_dir(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version} already exists")
+        os.makedirs(self.path, exist_ok=True)
+
+        # Build the directory aside, then rename: readers never see a partial version
+        staging = tempfile.mkdtemp(dir=self.path, prefix=f'.{version}.')
+        try:
+            shutil.copyfile(weights, os.path.join(staging, WEIGHTS_FILE))
+            meta = {'created_at': time.time(), 'source': os.path.abspath(weights), **(metadata or {})}
+            with open(os.path.join(staging, META_FILE), 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.path, ACTIVE_FILE)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def activations(self) -> List[Dict]:
+        try:
+            with open(os.path.join(self.path, ACTIVATIONS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def set_active(self, version: str):
+        """Point every polling service at a registered version"""
+        self.weights_path(version)
+        if version == self.active_version():
+            return
+        history = self.activations()[-99:] + [{'version': version, 'at': time.time()}]
+        self._write_atomic(ACTIVATIONS_FILE, json.dumps(history, indent=2))
+        self._write_atomic(ACTIVE_FILE, version + '\n')
+
+    def previous_version(self) -> Optional[str]:
+        """Most recent activation before the current one that is still registered"""
+        active = self.active_version()
+        for entry in reversed(self.activations()):
+            version = entry['version']
+            if version != active and os.path.isfile(os.path.join(self.path, version, WEIGHTS_FILE)):
+                return version
+        return None
+
+
+# Global registry instance
+model_registry = ModelRegistry(config.MODEL_REGISTRY_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage versioned model weights")
+    parser.add_argument('--registry', default=config.MODEL_REGISTRY_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    register = commands.add_parser('register')
+    register.add_argument('weights')
+    register.add_argument('--version', default=None)
+    register.add_argument('--notes', default=None)
+    register.add_argument('--activate', action='store_true')
+    activate = commands.add_parser('activate')
+    activate.add_argument('version')
+    commands.add_parser('rollback')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'list':
+        active = registry.active_version()
+        for item in registry.versions():
+            marker = '*' if item['version'] == active else ' '
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(item.get('created_at', 0)))
+            print(f"{marker} {item['version']:<20} {created}  {item.get('notes') or ''}")
+    elif args.command == 'register':
+        version = registry.register(args.weights, args.version, {'notes': args.notes} if args.notes else None)
+        print(f"✅ Registered {version}")
+        if args.activate:
+            registry.set_active(version)
+            print(f"✅ Activated {version}")
+    elif args.command == 'activate':
+        registry.set_active(args.version)
+        print(f"✅ Activated {args.version}")
+    else:
+        previous = registry.previous_version()
+        if previous is None:
+            raise SystemExit("No previous version to roll back to")
+        registry.set_active(previous)
+        print(f"✅ Rolled back to {previous}")
+
+
+if __name__ == '__main__':
+    main()
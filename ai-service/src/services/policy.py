@@ -0,0 +1,54 @@
+"""
+Rebalance and strategy rules
+The live service applies them to one vault at a time; the backtest
+(python -m backtest) replays the same rules over whole histories with other
+parameters, so a policy change can be measured before it ships
+"""
+from typing import Dict
+
+import numpy as np
+
+ACTIONS = np.array(['STRONG_BUY', 'BUY', 'HOLD', 'REDUCE_POSITION', 'SELL'])
+STRONG_BUY, BUY, HOLD, REDUCE_POSITION, SELL = range(len(ACTIONS))
+
+# Parameters of the live rules (APY in points, risk score 0-100)
+DEFAULT_POLICY = {
+    'rebalance_threshold': 5.0,  # Rebalance if the predicted APY moves by more than this
+    'strong_buy_apy': 15.0,
+    'strong_buy_risk': 40.0,
+    'buy_apy': 10.0,
+    'buy_risk': 60.0,
+    'sell_apy': 5.0,
+    'sell_risk': 70.0,
+    'reduce_risk': 60.0,
+}
+
+
+def should_rebalance(apy_change, policy: Dict = DEFAULT_POLICY):
+    """Rebalance flag(s) for the absolute predicted APY change (scalar or array)"""
+    return apy_change > policy['rebalance_threshold']
+
+
+def recommended_action(predicted_apy: float, risk_score: float, policy: Dict = DEFAULT_POLICY) -> str:
+    """Recommended action for one vault; first matching rule wins"""
+    if predicted_apy > policy['strong_buy_apy'] and risk_score < policy['strong_buy_risk']:
+        return "STRONG_BUY"
+    elif predicted_apy > policy['buy_apy'] and risk_score < policy['buy_risk']:
+        return "BUY"
+    elif predicted_apy < policy['sell_apy'] or risk_score > policy['sell_risk']:
+        return "SELL"
+    elif risk_score > policy['reduce_risk']:
+        return "REDUCE_POSITION"
+    else:
+        return "HOLD"
+
+
+def action_codes(predicted_apy: np.ndarray, risk_score: np.ndarray, policy: Dict = DEFAULT_POLICY) -> np.ndarray:
+    """Vectorized recommended_action as indices into ACTIONS"""
+    codes = np.full(np.shape(predicted_apy), HOLD, dtype=np.int8)
+    # Assigned from the last rule to the first, so the first matching rule wins
+    codes[risk_score > policy['reduce_risk']] = REDUCE_POSITION
+    codes[(predicted_apy < policy['sell_apy']) | (risk_score > policy['sell_risk'])] = SELL
+    codes[(predicted_apy > policy['buy_apy']) & (risk_score < policy['buy_risk'])] = BUY
+    codes[(predicted_apy > policy['strong_buy_apy']) & (risk_score < policy['strong_buy_risk'])] = STRONG_BUY
+    return codes
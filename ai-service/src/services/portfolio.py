@@ -0,0 +1,222 @@
+"""
+Vectorized portfolio allocation across N vaults
+
+Per risk tolerance, solves
+    maximize   w·(apy − risk_penalty·risk_score) − risk_aversion/2 · wᵀΣw − Σ impact·(w − w0)²
+    subject to Σw = 1, 0 ≤ w ≤ max_weight, |w − w0| ≤ max trade
+in APY points, where w0 are the current weights and Σ the APY covariance.
+Trading into or out of a vault moves its price linearly in the capital
+moved over the vault's liquidity: slippage (%) = 100 · |Δw| · capital / depth.
+That makes max_slippage a box around w0 (a vault only takes as much capital
+as keeps its impact under the cap) and the slippage paid a quadratic cost.
+When the boxes cannot hold all the capital, the rest stays unallocated.
+
+The solver is accelerated projected gradient (FISTA with adaptive restart)
+in the metric of a diagonal majorizer of the Hessian, so illiquid vaults
+with steep impact costs do not shrink everyone's step. The projection onto
+the capped simplex is a vectorized bisection on its shift. Σ is dense
+[N, N] or low-rank plus diagonal, so one iteration costs O(N·k) and
+thousands of vaults fit a time budget of a few hundred milliseconds
+"""
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# risk_tolerance -> risk aversion (per APY point²), risk score penalty (APY
+# points per score point) and cap on one vault's weight
+RISK_PROFILES = {
+    'low': {'risk_aversion': 0.1, 'risk_penalty': 0.1, 'max_weight': 0.10},
+    'medium': {'risk_aversion': 0.03, 'risk_penalty': 0.05, 'max_weight': 0.20},
+    'high': {'risk_aversion': 0.01, 'risk_penalty': 0.02, 'max_weight': 0.35},
+}
+
+# Halvings of the projection's shift interval (resolution ~2^-60 of it)
+_BISECTION_STEPS = 60
+# Power iterations bounding the spectral norm of a dense covariance
+_POWER_STEPS = 30
+
+
+class Covariance:
+    """
+    APY covariance in APY points²: dense [N, N], or loadings [N, k] plus
+    specific variances [N] (Σ = B·Bᵀ + diag(specific))
+    """
+    def __init__(self, dense: Optional[np.ndarray] = None, loadings: Optional[np.ndarray] = None,
+                 specific: Optional[np.ndarray] = None):
+        if dense is not None:
+            dense = np.asarray(dense, dtype=np.float64)
+            if dense.ndim != 2 or dense.shape[0] != dense.shape[1]:
+                raise ValueError("Covariance must be a square matrix")
+            if not np.isfinite(dense).all():
+                raise ValueError("Covariance values must be finite numbers")
+            dense = (dense + dense.T) / 2
+        self.dense = dense
+        self.loadings = None if loadings is None else np.asarray(loadings, dtype=np.float64)
+        self.specific = None if specific is None else np.asarray(specific, dtype=np.float64)
+
+    @property
+    def size(self) -> int:
+        return len(self.dense) if self.dense is not None else len(self.specific)
+
+    def matvec(self, w: np.ndarray) -> np.ndarray:
+        if self.dense is not None:
+            return self.dense @ w
+        result = self.specific * w
+        if self.loadings is not None and self.loadings.shape[1]:
+            result += self.loadings @ (self.loadings.T @ w)
+        return result
+
+    def variance(self, w: np.ndarray) -> float:
+        return float(max(w @ self.matvec(w), 0.0))
+
+    def spectral_bound(self) -> float:
+        """Upper bound on the largest eigenvalue"""
+        if self.dense is not None:
+            if not len(self.dense):
+                return 0.0
+            v = np.ones(len(self.dense)) / np.sqrt(len(self.dense))
+            estimate = 0.0
+            for _ in range(_POWER_STEPS):
+                product = self.dense @ v
+                estimate = float(np.linalg.norm(product))
+                if estimate == 0:
+                    return 0.0
+                v = product / estimate
+            return estimate * 1.05  # Power iteration approaches from below
+        bound = float(self.specific.max(initial=0.0))
+        if self.loadings is not None and self.loadings.shape[1]:
+            bound += float(np.linalg.eigvalsh(self.loadings.T @ self.loadings).max())
+        return bound
+
+
+def estimate_covariance(volatility: np.ndarray, histories: List[Optional[np.ndarray]],
+                        prediction_std: Optional[np.ndarray] = None, shrinkage: float = 0.5) -> Covariance:
+    """
+    Low-rank plus diagonal APY covariance for N vaults
+    Vaults with an APY history (oldest first, APY points) share the sample
+    covariance of their APY changes, shrunk towards its diagonal by
+    `shrinkage`; the others get volatility² alone. The model's predictive
+    variance (Monte Carlo dropout std) adds to the diagonal
+    """
+    count = len(volatility)
+    specific = np.square(np.asarray(volatility, dtype=np.float64))
+    with_history = [i for i, history in enumerate(histories) if history is not None and len(history) > 2]
+    loadings = None
+    if with_history:
+        changes = np.diff(np.stack([histories[i] for i in with_history]).astype(np.float64), axis=1)
+        changes -= changes.mean(axis=1, keepdims=True)
+        scaled = changes / np.sqrt(changes.shape[1] - 1)  # scaled @ scaled.T = sample covariance
+        loadings = np.zeros((count, scaled.shape[1]))
+        loadings[with_history] = np.sqrt(1 - shrinkage) * scaled
+        specific[with_history] = shrinkage * np.square(scaled).sum(axis=1)
+    if prediction_std is not None:
+        specific += np.square(np.nan_to_num(prediction_std))
+    return Covariance(loadings=loadings, specific=specific)
+
+
+def _project(v: np.ndarray, metric: np.ndarray, lower: np.ndarray, upper: np.ndarray, budget: float) -> np.ndarray:
+    """
+    Closest point (in the diagonal metric) to v with lower ≤ w ≤ upper and
+    Σw = budget: w = clip(v − τ/metric) for the shift τ found by bisection
+    """
+    tau_low = float(np.min((v - upper) * metric))  # Everything at its upper bound
+    tau_high = float(np.max((v - lower) * metric))  # Everything at its lower bound
+    for _ in range(_BISECTION_STEPS):
+        tau = (tau_low + tau_high) / 2
+        if np.clip(v - tau / metric, lower, upper).sum() > budget:
+            tau_low = tau
+        else:
+            tau_high = tau
+    return np.clip(v - (tau_low + tau_high) / 2 / metric, lower, upper)
+
+
+def optimize(predicted_apy: np.ndarray, risk_score: np.ndarray, covariance: Covariance,
+             current_weights: np.ndarray, depth: np.ndarray, capital: float, risk_tolerance: str = 'medium',
+             max_slippage: float = 1.0, time_budget_ms: float = 200.0, max_iterations: int = 1000,
+             tolerance: float = 1e-7) -> Dict:
+    """
+    Risk-adjusted, slippage-constrained weights for N vaults
+    predicted_apy (APY points), risk_score (0-100), current_weights
+    (fractions of capital) and depth (liquidity in the capital's unit) are
+    arrays of length N. Every iterate is feasible; accelerated steps may
+    still lower the objective, so the best iterate seen is returned. Stops
+    at convergence or when the time budget is spent
+    """
+    started = time.perf_counter()
+    profile = RISK_PROFILES.get(risk_tolerance, RISK_PROFILES['medium'])
+    apy = np.asarray(predicted_apy, dtype=np.float64)
+    risk = np.asarray(risk_score, dtype=np.float64)
+    w0 = np.asarray(current_weights, dtype=np.float64)
+    count = len(apy)
+    if count == 0:
+        raise ValueError("At least one vault is required")
+    if covariance.size != count:
+        raise ValueError(f"Covariance covers {covariance.size} vaults, expected {count}")
+
+    # Price impact per unit of weight moved, and the trade size that keeps it under max_slippage
+    depth = np.maximum(np.asarray(depth, dtype=np.float64), 1.0)
+    impact = 100 * capital / depth
+    max_trade = max(0.0, max_slippage) / impact
+    lower = np.clip(w0 - max_trade, 0.0, None)
+    upper = np.minimum(np.maximum(profile['max_weight'], 1 / count), w0 + max_trade)
+    upper = np.maximum(upper, lower)  # Current weights above the cap may only shrink
+    budget = min(1.0, float(upper.sum()))
+
+    aversion = profile['risk_aversion']
+    gain = apy - profile['risk_penalty'] * risk
+    metric = np.maximum(aversion * covariance.spectral_bound() + 2 * impact, 1e-9)
+
+    def gradient(w):
+        return aversion * covariance.matvec(w) + 2 * impact * (w - w0) - gain
+
+    def objective(w):
+        trade = w - w0
+        return float(w @ gain - aversion / 2 * covariance.variance(w) - np.sum(impact * trade * trade))
+
+    x = _project(w0, metric, lower, upper, budget)
+    best, best_objective = x, objective(x)
+    y, t = x, 1.0
+    iterations, converged = 0, False
+    deadline = started + max(0.0, time_budget_ms) / 1000
+    while iterations < max_iterations:
+        iterations += 1
+        x_next = _project(y - gradient(y) / metric, metric, lower, upper, budget)
+        value = objective(x_next)
+        if value > best_objective:
+            best, best_objective = x_next, value
+        step = x_next - x
+        if np.max(np.abs(step)) < tolerance:
+            x, converged = x_next, True
+            break
+        if np.dot(y - x_next, step) > 0:
+            # Momentum is pointing uphill: restart from the current iterate
+            y, t = x_next, 1.0
+        else:
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y, t = x_next + (t - 1) / t_next * step, t_next
+        x = x_next
+        if time.perf_counter() >= deadline:
+            break
+
+    x = best
+    trade = x - w0
+    slippage_cost = float(np.sum(impact * trade * trade))
+    allocated = float(x.sum())
+    return {
+        'weights': x,
+        'trade': trade,
+        'slippage_pct': np.abs(trade) * impact,
+        'expected_apy': float(x @ apy),
+        'risk_std': float(np.sqrt(covariance.variance(x))),
+        'risk_score': float(x @ risk / allocated) if allocated > 0 else 0.0,
+        'objective': float(x @ gain - aversion / 2 * covariance.variance(x) - slippage_cost),
+        'turnover': float(np.abs(trade).sum()),
+        'slippage_cost': slippage_cost,
+        'allocated': allocated,
+        'unallocated': max(0.0, 1.0 - allocated),
+        'iterations': iterations,
+        'converged': converged,
+        'solve_ms': round((time.perf_counter() - started) * 1000, 3),
+        'profile': dict(profile, risk_tolerance=risk_tolerance if risk_tolerance in RISK_PROFILES else 'medium'),
+    }
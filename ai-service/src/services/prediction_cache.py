@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bounded prediction cache with TTL expiry and LRU eviction
+    Keys are built from the normalized model feature vector (optionally
+    quantized) plus the model version, so identical snapshots skip the model
+    Cached values are shared between callers and must be treated as read-only
+    """
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30,
+                 quantize_decimals: int = -1):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.quantize_decimals = int(quantize_decimals)
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, kind: str, model_version: str, features: np.ndarray, *extra: Hashable) -> Hashable:
+        """
+        Cache key for a [10] normalized feature row
+        """
+        if self.quantize_decimals >= 0:
+            features = np.round(features, self.quantize_decimals)
+        return (kind, model_version, features.tobytes()) + extra
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def retain_versions(self, versions) -> int:
+        """
+        Drop the entries of every model version not in versions, e.g. after a
+        swap retired one; returns the entries dropped (counted as invalidations)
+        """
+        versions = set(versions)
+        with self._lock:
+            retired = [key for key in self._entries if key[1] not in versions]
+            for key in retired:
+                del self._entries[key]
+            self.invalidations += len(retired)
+        return len(retired)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'quantize_decimals': self.quantize_decimals,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
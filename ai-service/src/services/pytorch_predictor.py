@@ -1,8 +1,92 @@
 import torch
 import torch.nn as nn
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import json
+import os
+import threading
+import time
+
+import config
+from services.batch_scheduler import BatchScheduler
+from services.prediction_cache import PredictionCache
+from services import policy, portfolio, risk_engine
+from services.feature_store import FeatureStore
+from services.streaming_inference import StreamingInference
+from services.inference_backend import build_backend, measure_drift
+from services.metrics import metrics
+from services.model_registry import model_registry
+from services.uncertainty import MonteCarloDropout, MAX_PASS_ROWS
+
+# Model input features: (vault field, default, normalization scale)
+FEATURE_SPEC = [
+    ('tvl', 0, 1e6),  # Normalize TVL
+    ('current_apy', 0, 100),  # Normalize APY
+    ('volume_24h', 0, 1e6),  # Normalize volume
+    ('volatility', 10, 100),  # Normalize volatility
+    ('user_count', 0, 1000),  # Normalize users
+    ('total_shares', 0, 1e6),  # Normalize shares
+    ('price_change_24h', 0, 100),  # Price change
+    ('liquidity', 0, 1e6),  # Liquidity
+    ('fee_bps', 100, 10000),  # Fee
+]
+FEATURE_SCALES = np.array([scale for _, _, scale in FEATURE_SPEC] + [1.0])
+APY_FEATURE = [name for name, _, _ in FEATURE_SPEC].index('current_apy')
+SEQUENCE_LENGTH = 10
+NUM_FEATURES = len(FEATURE_SCALES)
+UNTRAINED = 'untrained'
+
+# State dicts placed in shared memory by share_weights(), keyed by absolute
+# weights path (or UNTRAINED); inherited by forked workers
+_shared_weights: Dict[str, Dict[str, torch.Tensor]] = {}
+
+def feature_row(vault_data: Dict) -> List:
+    return [vault_data.get(key, default) for key, default, _ in FEATURE_SPEC] + [
+        1.0 if vault_data.get('active', True) else 0.0,  # Active flag
+    ]
+
+def feature_matrix(vaults: List[Dict]) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    Normalized float32 [N, 10] model features for N vault snapshots
+    Returns the matrix and {row index: error} for rows that could not be
+    converted (those rows are zero-filled)
+    """
+    rows = [feature_row(vault) for vault in vaults]
+    errors = {}
+    try:
+        raw = np.array(rows, dtype=np.float64).reshape(len(rows), NUM_FEATURES)
+    except (TypeError, ValueError):
+        # Fall back to per-row conversion to isolate the bad inputs
+        raw = np.zeros((len(rows), NUM_FEATURES))
+        for i, row in enumerate(rows):
+            try:
+                raw[i] = np.array(row, dtype=np.float64)
+            except (TypeError, ValueError) as e:
+                errors[i] = f"Invalid feature value: {e}"
+    
+    invalid = ~np.isfinite(raw).all(axis=1)
+    for i in np.flatnonzero(invalid):
+        errors.setdefault(int(i), "Feature values must be finite numbers")
+    raw[invalid] = 0
+    
+    return (raw / FEATURE_SCALES).astype(np.float32), errors
+
+def columns_feature_matrix(columns: Dict[str, np.ndarray], count: int) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    feature_matrix for columnar input: float64 arrays of length N per vault
+    field (missing fields take their defaults)
+    """
+    raw = np.empty((count, NUM_FEATURES))
+    for j, (key, default, _) in enumerate(FEATURE_SPEC):
+        raw[:, j] = columns[key] if key in columns else default
+    raw[:, -1] = (columns['active'] != 0) if 'active' in columns else 1.0
+    
+    invalid = ~np.isfinite(raw).all(axis=1)
+    errors = {int(i): "Feature values must be finite numbers" for i in np.flatnonzero(invalid)}
+    raw[invalid] = 0
+    
+    return (raw / FEATURE_SCALES).astype(np.float32), errors
 
 class YieldPredictionModel(nn.Module):
     """
@@ -45,6 +129,9 @@ class YieldPredictionModel(nn.Module):
         # Apply attention
         context = torch.sum(attention_weights * lstm_out, dim=1)
         
+        return self.head(context)
+    
+    def head(self, context):
         # Fully connected layers
         out = self.relu(self.fc1(context))
         out = self.dropout(out)
@@ -52,6 +139,67 @@ class YieldPredictionModel(nn.Module):
         out = self.fc3(out)
         
         return out
+    
+    def mc_dropout_copy(self) -> 'YieldPredictionModel':
+        """
+        Module sharing this model's parameters with dropout left on, for
+        Monte Carlo sampling next to eval-mode inference
+        """
+        copy = YieldPredictionModel(self.lstm.input_size, self.hidden_size, self.num_layers,
+                                    self.fc3.out_features)
+        copy.load_state_dict(self.state_dict(), assign=True)
+        return copy.train()
+
+class VaultEvaluation:
+    """
+    Evaluation context for one vault snapshot
+    Features, prediction, confidence and risk are computed once; strategy and
+    rebalance decisions are derived from this result
+    """
+    __slots__ = ('vault_data', 'features', 'prediction', 'risk_analysis')
+    
+    def __init__(self, vault_data: Dict, features: np.ndarray, prediction: Dict, risk_analysis: Dict):
+        self.vault_data = vault_data
+        self.features = features
+        self.prediction = prediction
+        self.risk_analysis = risk_analysis
+    
+    @property
+    def predicted_apy(self) -> float:
+        return self.prediction['predicted_apy']
+    
+    @property
+    def confidence(self) -> float:
+        return self.prediction['confidence']
+
+class ModelBundle:
+    """
+    One loaded model version: weights, compiled backend, dropout sampler
+    and identity
+    Never mutated after loading; a swap replaces the whole bundle
+    """
+    __slots__ = ('version', 'model', 'backend', 'backend_name', 'backend_drift', 'sampler', 'source',
+                 'loaded_at')
+    
+    def __init__(self, version: str, model: nn.Module, backend, backend_name: str, backend_drift: float,
+                 source: Optional[str]):
+        self.version = version
+        self.model = model
+        self.backend = backend
+        self.backend_name = backend_name
+        self.backend_drift = backend_drift
+        self.sampler = model.mc_dropout_copy()  # Eager weights, whatever the backend
+        self.source = source
+        self.loaded_at = time.time()
+    
+    def describe(self) -> Dict:
+        return {
+            'version': self.version,
+            'backend': self.backend_name,
+            'backend_drift': self.backend_drift,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+        }
 
 class PyTorchPredictor:
     """
@@ -59,90 +207,715 @@ class PyTorchPredictor:
     """
     def __init__(self):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = YieldPredictionModel().to(self.device)
-        self.model.eval()  # Set to evaluation mode
+        # (active ModelBundle, activation count), replaced as one tuple so a
+        # reader sees a bundle and its generation together without a lock
+        self._active: Tuple[ModelBundle, int] = (None, 0)
+        self.previous: Optional[ModelBundle] = None
+        self._swap_lock = threading.Lock()  # Serializes loads and swaps, never taken by inference
+        self._registry_seen = model_registry.active_version()
+        self._watcher: Optional[threading.Thread] = None
+        
+        # Prediction cache keyed on normalized features + model version
+        self.cache = None
+        if config.CACHE_ENABLED:
+            self.cache = PredictionCache(
+                max_entries=config.CACHE_MAX_ENTRIES,
+                ttl_seconds=config.CACHE_TTL_SECONDS,
+                quantize_decimals=config.CACHE_QUANTIZE_DECIMALS,
+            )
         
-        # Try to load pre-trained weights
+        # Monte Carlo dropout uncertainty (confidence from the model's own spread),
+        # sampled by default when AI_MC_SAMPLES > 0, otherwise only on ?samples=
+        self.uncertainty = None
+        if config.MC_SAMPLES > 0 or config.MC_MAX_SAMPLES > 0:
+            self.uncertainty = MonteCarloDropout(
+                samples=config.MC_SAMPLES,
+                latency_budget_ms=config.MC_LATENCY_BUDGET_MS,
+                bulk_budget_ms=config.MC_BULK_LATENCY_BUDGET_MS,
+                min_samples=config.MC_MIN_SAMPLES,
+                interval=config.MC_INTERVAL,
+                confidence_scale=config.MC_CONFIDENCE_SCALE,
+            )
+        
+        # Try to load pre-trained weights: the registry's active version,
+        # otherwise the plain weights file
         try:
-            self.model.load_state_dict(torch.load('models/yield_predictor.pth', map_location=self.device))
-            print("✅ Loaded pre-trained model")
-        except:
+            bundle = self.load_bundle(*initial_weights(self._registry_seen))
+            print(f"✅ Loaded pre-trained model ({bundle.version})")
+        except Exception:
             print("⚠️  Using untrained model (for demo)")
+            model = YieldPredictionModel().to(self.device)
+            if UNTRAINED in _shared_weights:
+                # Same random init in every forked worker
+                model.load_state_dict(_shared_weights[UNTRAINED], assign=True)
+            bundle = self._bundle(model, UNTRAINED, None)
+        self._active = (bundle, 1)
+        
+        # Rolling per-vault history that feeds the LSTM time dimension. Off in
+        # process mode: /features/ingest reaches only the main process, so the
+        # replicas serving predictions would never see the history
+        self.feature_store = None
+        if config.FEATURE_STORE_ENABLED and config.EXECUTOR_MODE != 'process':
+            self.feature_store = FeatureStore(
+                max_vaults=config.FEATURE_STORE_MAX_VAULTS,
+                window=SEQUENCE_LENGTH,
+                num_features=NUM_FEATURES,
+                path=config.FEATURE_STORE_PATH,
+                min_history=config.FEATURE_STORE_MIN_HISTORY,
+            )
+        
+        # Incremental one-step inference over the stored history
+        self.streaming = None
+        self._ingest_lock = threading.Lock()
+        if self.feature_store is not None and config.STREAMING_ENABLED:
+            self.streaming = StreamingInference(
+                bundle.model,
+                window=SEQUENCE_LENGTH,
+                max_vaults=config.STREAMING_MAX_VAULTS,
+                idle_seconds=config.STREAMING_IDLE_SECONDS,
+                tolerance=config.STREAMING_TOLERANCE,
+                verify_every=config.STREAMING_VERIFY_EVERY,
+                refresh_every=config.STREAMING_REFRESH_EVERY,
+            )
+            self.streaming.suspended = self._streaming_suspension(bundle)
+        
+        # Micro-batching scheduler shared by all concurrent callers
+        self.batcher = None
+        self.mc_batcher = None
+        if config.BATCH_ENABLED:
+            self.batcher = BatchScheduler(
+                self._forward,
+                max_batch_size=config.BATCH_MAX_SIZE,
+                max_wait_ms=config.BATCH_MAX_WAIT_MS,
+            )
+            if self.uncertainty is not None:
+                # Concurrent single predictions share one dropout-sampling pass
+                self.mc_batcher = BatchScheduler(
+                    lambda batch: self.uncertainty.forward(self.active.sampler, batch),
+                    max_batch_size=MAX_PASS_ROWS,
+                    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+                )
+    
+    @property
+    def active(self) -> 'ModelBundle':
+        return self._active[0]
+    
+    @property
+    def model(self) -> nn.Module:
+        return self._active[0].model
+    
+    @property
+    def model_version(self) -> str:
+        return self._active[0].version
+    
+    @property
+    def backend(self):
+        return self._active[0].backend
+    
+    @property
+    def backend_name(self) -> str:
+        return self._active[0].backend_name
+    
+    @property
+    def backend_drift(self) -> float:
+        return self._active[0].backend_drift
+    
+    def _bundle(self, model: nn.Module, version: str, source: Optional[str]) -> 'ModelBundle':
+        model.eval()
+        name, backend, drift = self._build_backend(model)
+        return ModelBundle(version, model, backend, name, drift, source)
+    
+    def load_bundle(self, path: str, version: Optional[str] = None) -> 'ModelBundle':
+        """
+        Build a new model and inference backend from a weights file
+        The active model is untouched until the bundle is activated
+        """
+        state_dict = _shared_weights.get(os.path.abspath(path)) if self.device.type == 'cpu' else None
+        if state_dict is None:
+            state_dict = torch.load(path, map_location=self.device)
+        model = YieldPredictionModel().to(self.device)
+        # assign: parameters take over the loaded tensors (no second copy;
+        # shared-memory tensors stay shared)
+        model.load_state_dict(state_dict, assign=True)
+        return self._bundle(model, version or self._state_dict_version(state_dict), path)
+    
+    def _build_backend(self, model: nn.Module) -> Tuple[str, object, float]:
+        """
+        Compile the configured inference backend for a model
+        Falls back to eager when it fails or drifts past the tolerance
+        """
+        name, backend, drift = config.INFERENCE_BACKEND, model, 0.0
+        if name != 'eager':
+            try:
+                backend = build_backend(model, name, SEQUENCE_LENGTH, NUM_FEATURES)
+                drift = measure_drift(model, backend, sequence_length=SEQUENCE_LENGTH,
+                                      num_features=NUM_FEATURES)
+                if drift > config.BACKEND_TOLERANCE:
+                    raise ValueError(f"drift {drift:.2e} exceeds {config.BACKEND_TOLERANCE:.2e}")
+            except Exception as e:
+                print(f"⚠️  {name} backend rejected ({e}), using eager")
+                name, backend, drift = 'eager', model, 0.0
+        return name, backend, drift
+    
+    def activate(self, bundle: 'ModelBundle', warmup_batch_sizes: Optional[List[int]] = None) -> Dict[int, float]:
+        """
+        Warm a loaded bundle up, then make it the active model
+        In-flight forwards finish on the bundle they already read. Cached
+        results are keyed by the version that produced them: the new and the
+        previous (rollback) version keep theirs, older versions' entries are
+        purged. Returns warm-up timings {batch size: ms}
+        """
+        with self._swap_lock:
+            timings = self.warm_up(warmup_batch_sizes or [], bundle)
+            current, generation = self._active
+            if bundle is current:
+                return timings
+            self._active = (bundle, generation + 1)
+            self.previous = current
+            if self.cache is not None:
+                self.cache.retain_versions((bundle.version, current.version))
+            if self.streaming is not None:
+                self.streaming.swap_model(bundle.model, self._streaming_suspension(bundle))
+            print(f"🔁 Active model {current.version} -> {bundle.version}")
+            return timings
+    
+    def reload_weights(self, path: str):
+        """
+        Load weights from disk and switch to them
+        """
+        self.activate(self.load_bundle(path), config.MODEL_WARMUP_BATCH_SIZES)
+    
+    def activate_version(self, version: str, publish: bool = True) -> Dict[int, float]:
+        """
+        Load, warm up and switch to a registry version
+        publish also points the registry's ACTIVE at it, so other service
+        processes watching the registry follow
+        """
+        if version == self.model_version:
+            timings = {}
+        elif self.previous is not None and self.previous.version == version:
+            timings = self.activate(self.previous)  # Still warm
+        else:
+            bundle = self.load_bundle(model_registry.weights_path(version), version)
+            timings = self.activate(bundle, config.MODEL_WARMUP_BATCH_SIZES)
+        if publish:
+            model_registry.set_active(version)
+            self._registry_seen = version
+        return timings
+    
+    def rollback(self) -> str:
+        """
+        Switch back to the previously active model (kept in memory, so no
+        reload), or to the registry's previous activation after a restart
+        """
+        previous = self.previous
+        if previous is not None:
+            self.activate(previous)
+            if previous.source is not None and os.path.dirname(previous.source) == os.path.join(
+                    model_registry.path, previous.version):
+                model_registry.set_active(previous.version)
+                self._registry_seen = previous.version
+            return previous.version
+        version = model_registry.previous_version()
+        if version is None:
+            raise RuntimeError("No previous model version to roll back to")
+        self.activate_version(version)
+        return version
+    
+    def sync_registry(self) -> bool:
+        """
+        Follow a changed registry ACTIVE pointer; returns whether it swapped
+        """
+        version = model_registry.active_version()
+        if not version or version == self._registry_seen:
+            return False
+        self._registry_seen = version
+        if version == self.model_version:
+            return False
+        self.activate_version(version, publish=False)
+        return True
+    
+    def watch_registry(self, interval: float):
+        """Poll the registry's ACTIVE pointer in a background thread"""
+        if interval <= 0 or self._watcher is not None:
+            return
+        
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync_registry()
+                except Exception as e:
+                    print(f"⚠️  Model registry sync failed: {e}")
+        
+        self._watcher = threading.Thread(target=watch, name='model-registry-watch', daemon=True)
+        self._watcher.start()
+    
+    @staticmethod
+    def _state_dict_version(state_dict: Dict) -> str:
+        digest = hashlib.sha1()
+        for name in sorted(state_dict):
+            digest.update(name.encode())
+            digest.update(state_dict[name].detach().cpu().numpy().tobytes())
+        return digest.hexdigest()[:12]
+    
+    def _cached(self, kind: str, features: np.ndarray, compute, *extra):
+        """compute(bundle) through the prediction cache"""
+        bundle, generation = self._active
+        if self.cache is None:
+            return compute(bundle)
+        key = self.cache.make_key(kind, bundle.version, features, *extra)
+        value = self.cache.get(key)
+        if value is None:
+            value = compute(bundle)
+            # A swap during compute may have served it from the new model
+            if self._active[1] == generation:
+                self.cache.put(key, value)
+        return value
+    
+    def _forward(self, batch: torch.Tensor, bundle: 'ModelBundle' = None) -> torch.Tensor:
+        """
+        Run one forward pass over a [B, 10, 10] batch (on the active model
+        unless a bundle is given)
+        """
+        backend = (bundle or self._active[0]).backend
+        with metrics.stage('model_forward'), torch.no_grad():
+            output = backend(batch)
+        metrics.record_forward(len(batch))
+        return output
+    
+    def warm_up(self, batch_sizes: List[int], bundle: 'ModelBundle' = None) -> Dict[int, float]:
+        """
+        Run one forward pass per batch size; returns {batch size: ms}
+        """
+        timings = {}
+        for size in batch_sizes:
+            batch = torch.zeros(size, SEQUENCE_LENGTH, NUM_FEATURES, device=self.device)
+            started = time.perf_counter()
+            self._forward(batch, bundle)
+            timings[size] = round((time.perf_counter() - started) * 1000, 3)
+        if self.uncertainty is not None:
+            self.uncertainty.calibrate((bundle or self.active).sampler, SEQUENCE_LENGTH, NUM_FEATURES)
+        return timings
+    
+    @metrics.timed('preprocess')
+    def build_feature_matrix(self, vaults: List[Dict]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """
+        Vectorized preprocessing of N vaults into one normalized [N, 10] matrix
+        Features: TVL, APY, volume, volatility, user_count, etc.
+        """
+        return feature_matrix(vaults)
+    
+    def matrix_to_sequences(self, matrix: np.ndarray) -> torch.Tensor:
+        """
+        Expand an [N, 10] feature matrix into the [N, 10, 10] model input
+        (same features repeated over the time steps, without copying)
+        """
+        features = torch.from_numpy(matrix).to(self.device)
+        return features.unsqueeze(1).expand(-1, SEQUENCE_LENGTH, -1)
+    
+    def _features(self, vault_data: Dict) -> np.ndarray:
+        matrix, errors = self.build_feature_matrix([vault_data])
+        if errors:
+            raise ValueError(errors[0])
+        return matrix
+    
+    def _history_window(self, vault_data: Dict) -> Optional[np.ndarray]:
+        if self.feature_store is None or not vault_data.get('address'):
+            return None
+        return self.feature_store.window(vault_data['address'])
+    
+    def _window_to_sequence(self, window: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(window).unsqueeze(0).to(self.device)
     
     def preprocess_data(self, vault_data: Dict) -> torch.Tensor:
         """
         Preprocess vault data for model input
-        Features: TVL, APY, volume, volatility, user_count, etc.
+        Uses the vault's stored 10-step history when the feature store has
+        one, otherwise the snapshot features repeated over the time steps
         """
-        features = [
-            float(vault_data.get('tvl', 0)) / 1e6,  # Normalize TVL
-            float(vault_data.get('current_apy', 0)) / 100,  # Normalize APY
-            float(vault_data.get('volume_24h', 0)) / 1e6,  # Normalize volume
-            float(vault_data.get('volatility', 10)) / 100,  # Normalize volatility
-            float(vault_data.get('user_count', 0)) / 1000,  # Normalize users
-            float(vault_data.get('total_shares', 0)) / 1e6,  # Normalize shares
-            float(vault_data.get('price_change_24h', 0)) / 100,  # Price change
-            float(vault_data.get('liquidity', 0)) / 1e6,  # Liquidity
-            float(vault_data.get('fee_bps', 100)) / 10000,  # Fee
-            1.0 if vault_data.get('active', True) else 0.0,  # Active flag
-        ]
+        window = self._history_window(vault_data)
+        if window is not None:
+            return self._window_to_sequence(window)
+        return self.matrix_to_sequences(self._features(vault_data))
+    
+    def ingest_observations(self, observations: List[Dict]) -> List[Dict]:
+        """
+        Append observations to the feature store (one row per vault snapshot)
+        Results are in input order; failed items carry an 'error' key
+        """
+        if self.feature_store is None:
+            raise RuntimeError("Feature store is disabled")
+        matrix, errors = self.build_feature_matrix(observations)
+        valid = [i for i, item in enumerate(observations) if i not in errors]
+        for i in valid:
+            if not observations[i].get('address'):
+                errors[i] = "Observation is missing an address"
+        valid = [i for i in valid if i not in errors]
         
-        # Create sequence (using same features for demo)
-        sequence = np.array([features] * 10)  # 10 time steps
+        addresses = [observations[i]['address'] for i in valid]
+        with self._ingest_lock:
+            store_errors = self.feature_store.ingest_batch(addresses, matrix[valid])
+            for position, message in store_errors.items():
+                errors[valid[position]] = message
+            
+            if self.streaming is not None:
+                stored = [position for position in range(len(valid)) if position not in store_errors]
+                stored_addresses = [self.feature_store.normalize_address(addresses[p]) for p in stored]
+                self.streaming.observe(
+                    stored_addresses,
+                    matrix[[valid[p] for p in stored]],
+                    [self.feature_store.history_length(address) for address in stored_addresses],
+                    self.feature_store.recent,
+                )
         
-        return torch.FloatTensor(sequence).unsqueeze(0).to(self.device)
+        return [
+            {'error': errors[i]} if i in errors else {
+                'address': observations[i]['address'],
+                'history_length': self.feature_store.history_length(observations[i]['address']),
+            }
+            for i in range(len(observations))
+        ]
     
-    def predict_apy(self, vault_data: Dict) -> Dict:
+    def predict_apy(self, vault_data: Dict, samples: Optional[int] = None) -> Dict:
         """
         Predict future APY using PyTorch model
+        samples overrides the Monte Carlo dropout sample count (0 = off)
         """
-        with torch.no_grad():
-            # Preprocess input
-            input_tensor = self.preprocess_data(vault_data)
-            
-            # Model prediction
-            prediction = self.model(input_tensor)
-            predicted_apy = float(prediction.item()) * 100  # Convert back to percentage
-            
-            # Ensure reasonable range
-            predicted_apy = max(0, min(predicted_apy, 100))
-            
-            # Calculate confidence based on model certainty
+        # Preprocess input
+        features = self._features(vault_data)
+        
+        return self._predict_features(vault_data, features, samples)
+    
+    def _predict_features(self, vault_data: Dict, features: np.ndarray, samples: Optional[int] = None) -> Dict:
+        window = self._history_window(vault_data)
+        windows = {} if window is None else {0: window}
+        
+        def compute(bundle: ModelBundle) -> Dict:
+            if window is None:
+                raw_output = self._infer_sequence(self.matrix_to_sequences(features))
+            else:
+                raw_output = self._window_output(vault_data['address'], window)
+            stats = self._uncertainty_rows(features, np.zeros(1, dtype=np.int64), windows, bundle, samples,
+                                           batched=True)
+            return self._prediction_result(vault_data, raw_output, bundle.version, self._uncertainty_block(stats, 0))
+        
+        return self._cached('apy', features[0] if window is None else window, compute,
+                            self._requested_samples(samples), self._confidence_inputs(vault_data))
+    
+    @staticmethod
+    def _streaming_suspension(bundle: 'ModelBundle') -> Optional[str]:
+        """
+        Why streaming is paused for a bundle: its steps run the eager
+        modules, so it only serves while the full-window path is eager too
+        """
+        if bundle.backend_name == 'eager':
+            return None
+        return f"Inference backend is {bundle.backend_name}; streaming steps only run on eager weights"
+    
+    def _streaming_output(self, address: str) -> Optional[float]:
+        if self.streaming is None:
+            return None
+        address = self.feature_store.normalize_address(address)
+        return self.streaming.latest(address, self.feature_store.history_length(address))
+    
+    def _window_output(self, address: str, window: np.ndarray) -> float:
+        raw_output = self._streaming_output(address)
+        if raw_output is None:
+            raw_output = self._infer_sequence(self._window_to_sequence(window))
+        return raw_output
+    
+    def verify_streaming(self, address: str) -> Optional[Dict]:
+        """
+        Compare a vault's streaming output with the full-window forward pass
+        """
+        if self.streaming is None:
+            raise RuntimeError("Streaming inference is disabled")
+        return self.streaming.verify(
+            self.feature_store.normalize_address(address), self.feature_store.recent
+        )
+    
+    def _infer_sequence(self, input_tensor: torch.Tensor) -> float:
+        # Model prediction (batched with concurrent callers when enabled)
+        if self.batcher is not None:
+            prediction = self.batcher.predict(input_tensor)
+        else:
+            prediction = self._forward(input_tensor)
+        return float(prediction.item())
+    
+    def _prediction_result(self, vault_data: Dict, raw_output: float, model_version: str,
+                           uncertainty: Optional[Dict] = None) -> Dict:
+        predicted_apy = raw_output * 100  # Convert back to percentage
+        
+        # Ensure reasonable range
+        predicted_apy = max(0, min(predicted_apy, 100))
+        
+        # Calculate confidence based on model certainty: the spread of the
+        # dropout samples, or data-quality heuristics when not sampled
+        if uncertainty is not None:
+            confidence = float(self.uncertainty.confidence(uncertainty['std']))
+        else:
             confidence = self._calculate_confidence(vault_data, predicted_apy)
-            
-            return {
-                'predicted_apy': round(predicted_apy, 2),
-                'confidence': round(confidence, 2),
-                'model': 'LSTM-Attention',
-                'features_used': 10,
-            }
+        
+        result = {
+            'predicted_apy': round(predicted_apy, 2),
+            'confidence': round(confidence, 2),
+            'model': 'LSTM-Attention',
+            'model_version': model_version,
+            'features_used': 10,
+        }
+        if uncertainty is not None:
+            result['uncertainty'] = uncertainty
+        return result
+    
+    def _requested_samples(self, samples: Optional[int]) -> int:
+        if self.uncertainty is None:
+            return 0
+        return self.uncertainty.samples if samples is None else max(0, int(samples))
+    
+    def _uncertainty_rows(self, matrix: np.ndarray, rows: np.ndarray, windows: Dict[int, np.ndarray],
+                          bundle: 'ModelBundle', samples: Optional[int], bulk: bool = False,
+                          batched: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Monte Carlo dropout statistics for the given matrix rows, in the
+        order of rows: mean, std, lower, upper and the samples drawn (0 when
+        the latency budget left no room). One K for the whole request, one
+        expanded pass per chunk (shared with concurrent callers through the
+        micro-batcher when batched); None when uncertainty is off
+        """
+        if self.uncertainty is None or self._requested_samples(samples) == 0 or len(rows) == 0:
+            return None
+        stats = {name: np.full(len(rows), np.nan) for name in ('mean', 'std', 'lower', 'upper')}
+        stats['samples'] = np.zeros(len(rows), dtype=np.int64)
+        chunk_size = max(1, MAX_PASS_ROWS // self._requested_samples(samples))
+        chunks = -(-len(rows) // chunk_size)
+        planned = self.uncertainty.plan(len(rows), samples, passes=chunks, bulk=bulk)
+        if not planned:
+            return stats
+        if batched and self.mc_batcher is not None:
+            forward = self.mc_batcher.predict_many
+        else:
+            forward = lambda batch: self.uncertainty.forward(bundle.sampler, batch)
+        for start in range(0, len(rows), chunk_size):
+            indices = rows[start:start + chunk_size]
+            drawn = self.uncertainty.sample(self._batch_sequences(matrix, indices, windows), planned, forward)
+            for name, values in drawn.items():
+                stats[name][start:start + len(indices)] = values
+        stats['samples'][:] = planned
+        return stats
+    
+    def _uncertainty_block(self, stats: Optional[Dict[str, np.ndarray]], position: int) -> Optional[Dict]:
+        if stats is None or not stats['samples'][position]:
+            return None
+        return self.uncertainty.describe(
+            {name: stats[name][position] for name in ('mean', 'std', 'lower', 'upper')},
+            int(stats['samples'][position]),
+        )
+    
+    def predict_apy_batch(self, vaults: List[Dict], samples: Optional[int] = None) -> List[Dict]:
+        """
+        Predict APY for many vaults with one forward pass per chunk (plus one
+        expanded dropout-sampling pass per chunk when uncertainty is on)
+        Results are in input order; failed items carry an 'error' key
+        """
+        requested = self._requested_samples(samples)
+        matrix, errors = self.build_feature_matrix(vaults)
+        bundle, generation = self._active  # One model version for the whole request
+        results: List[Dict] = [None] * len(vaults)
+        for i, message in errors.items():
+            results[i] = {'error': message}
+        addresses = [vault.get('address') for vault in vaults]
+        windows = self._history_windows(addresses, errors)
+        
+        # Serve cached rows; only the misses go through the model
+        keys = {}
+        pending = []
+        for i in range(len(vaults)):
+            if i in errors:
+                continue
+            if self.cache is not None:
+                keys[i] = self.cache.make_key('apy', bundle.version, windows.get(i, matrix[i]), requested,
+                                              self._confidence_inputs(vaults[i]))
+                cached = self.cache.get(keys[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+        
+        outputs, failures = self._model_outputs(
+            matrix, addresses, np.array(pending, dtype=np.int64), windows, bundle, generation)
+        sampled = [i for i in pending if i not in failures]
+        stats = self._uncertainty_rows(matrix, np.array(sampled, dtype=np.int64), windows, bundle, samples,
+                                       bulk=True)
+        positions = {i: position for position, i in enumerate(sampled)}
+        for i, raw_output in zip(pending, outputs.tolist()):
+            if i in failures:
+                results[i] = {'error': failures[i]}
+                continue
+            uncertainty = self._uncertainty_block(stats, positions[i])
+            results[i] = self._prediction_result(vaults[i], raw_output, bundle.version, uncertainty)
+            if self.cache is not None:
+                self.cache.put(keys[i], results[i])
+        
+        return results
+    
+    def _history_windows(self, addresses: List[Optional[str]], skip: Dict[int, str]) -> Dict[int, np.ndarray]:
+        """Stored history per row, for rows whose vault has one"""
+        windows = {}
+        if self.feature_store is None:
+            return windows
+        for i, address in enumerate(addresses):
+            if address and i not in skip:
+                window = self.feature_store.window(address)
+                if window is not None:
+                    windows[i] = window
+        return windows
+    
+    def _model_outputs(self, matrix: np.ndarray, addresses: List[Optional[str]], rows: np.ndarray,
+                       windows: Dict[int, np.ndarray], bundle: 'ModelBundle',
+                       generation: int) -> Tuple[np.ndarray, Dict[int, str]]:
+        """
+        Raw model outputs for the given matrix rows, in the order of rows
+        Vaults with an up-to-date streaming state skip the forward pass; the
+        rest run in chunks over stored history or repeated snapshot features.
+        Returns the outputs (NaN where a chunk failed) and {row: error}
+        """
+        outputs = np.full(len(rows), np.nan)
+        failures = {}
+        if self.streaming is None or not windows:
+            forward = np.arange(len(rows))
+        else:
+            forward = []
+            for position, i in enumerate(rows.tolist()):
+                raw_output = self._streaming_output(addresses[i]) if i in windows else None
+                # Streaming state follows the active model; use it only if no swap happened
+                if raw_output is not None and self._active[1] == generation:
+                    outputs[position] = raw_output
+                else:
+                    forward.append(position)
+            forward = np.array(forward, dtype=np.int64)
+        
+        chunk_size = max(1, config.BULK_CHUNK_SIZE)
+        for start in range(0, len(forward), chunk_size):
+            positions = forward[start:start + chunk_size]
+            indices = rows[positions]
+            try:
+                output = self._forward(self._batch_sequences(matrix, indices, windows), bundle)
+                outputs[positions] = output.reshape(-1).cpu().numpy()
+            except Exception as e:
+                for i in indices.tolist():
+                    failures[i] = str(e)
+        return outputs, failures
+    
+    def predict_apy_columns(self, columns: Dict, samples: Optional[int] = None) -> Dict:
+        """
+        predict_apy_batch for columnar input, returning columns
+        columns holds an 'address' list plus float64 arrays per vault field.
+        Predictions come straight from the output tensor as arrays, rounded
+        like the per-vault results; no per-vault dicts are built and the
+        result cache is bypassed. Failed rows are NaN, with {row: error}.
+        With uncertainty on, 'uncertainty' holds apy_mean, apy_std,
+        apy_lower, apy_upper (NaN where not sampled) and uncertainty_samples
+        """
+        addresses = columns['address']
+        count = len(addresses)
+        matrix, errors = columns_feature_matrix(columns, count)
+        bundle, generation = self._active
+        windows = self._history_windows(addresses, errors)
+        
+        valid = np.ones(count, dtype=bool)
+        valid[list(errors)] = False
+        rows = np.flatnonzero(valid)
+        outputs, failures = self._model_outputs(matrix, addresses, rows, windows, bundle, generation)
+        errors.update(failures)
+        
+        predicted_apy = np.full(count, np.nan)
+        predicted_apy[rows] = np.clip(outputs * 100, 0, 100)  # Convert back to percentage
+        confidence = self._confidence_columns(columns, count)
+        
+        uncertainty = None
+        sampled_rows = rows[~np.isin(rows, list(failures))] if failures else rows
+        stats = self._uncertainty_rows(matrix, sampled_rows, windows, bundle, samples, bulk=True)
+        if stats is not None:
+            drawn = stats['samples'] > 0
+            uncertainty = {'uncertainty_samples': np.zeros(count, dtype=np.int32)}
+            uncertainty['uncertainty_samples'][sampled_rows] = stats['samples']
+            for name in ('mean', 'std', 'lower', 'upper'):
+                column = np.full(count, np.nan)
+                column[sampled_rows[drawn]] = stats[name][drawn]
+                uncertainty[f'apy_{name}'] = risk_engine.round2(column)
+            confidence[sampled_rows[drawn]] = self.uncertainty.confidence(uncertainty['apy_std'][sampled_rows[drawn]])
+        
+        failed = list(errors)
+        predicted_apy[failed] = np.nan
+        confidence[failed] = np.nan
+        result = {
+            'predicted_apy': risk_engine.round2(predicted_apy),
+            'confidence': risk_engine.round2(confidence),
+            'errors': errors,
+            'model_version': bundle.version,
+        }
+        if uncertainty is not None:
+            result['uncertainty'] = uncertainty
+        return result
+    
+    @staticmethod
+    def _confidence_columns(columns: Dict, count: int) -> np.ndarray:
+        """Vectorized _calculate_confidence"""
+        tvl = columns.get('tvl', np.zeros(count))
+        volatility = columns.get('volatility', np.full(count, 10.0))
+        user_count = np.trunc(columns.get('user_count', np.zeros(count)))
+        confidence = np.full(count, 85.0)
+        confidence += np.where(tvl > 1000000, 10, np.where(tvl < 10000, -15, 0))
+        confidence += np.where(volatility < 10, 5, np.where(volatility > 30, -10, 0))
+        confidence += np.where(user_count > 100, 5, np.where(user_count < 10, -10, 0))
+        return np.clip(confidence, 0, 100)
+    
+    def _batch_sequences(self, matrix: np.ndarray, indices: np.ndarray,
+                         windows: Dict[int, np.ndarray]) -> torch.Tensor:
+        """
+        [n, 10, 10] input for a chunk: stored history where available,
+        repeated snapshot features otherwise
+        """
+        history = [(position, windows[i]) for position, i in enumerate(indices) if i in windows]
+        if not history:
+            return self.matrix_to_sequences(matrix[indices])
+        batch = self.matrix_to_sequences(matrix[indices]).clone()
+        for position, window in history:
+            batch[position] = torch.from_numpy(window)
+        return batch
+    
+    @staticmethod
+    def _confidence_inputs(vault_data: Dict) -> Tuple[int, int, int]:
+        """
+        Data-quality grades (1 good, 0 neutral, -1 poor) of TVL, volatility
+        and user count: everything the heuristic confidence reads from the
+        request, so they are part of prediction cache keys
+        """
+        tvl = float(vault_data.get('tvl', 0))
+        volatility = float(vault_data.get('volatility', 10))
+        user_count = int(vault_data.get('user_count', 0))
+        return (
+            1 if tvl > 1000000 else -1 if tvl < 10000 else 0,
+            1 if volatility < 10 else -1 if volatility > 30 else 0,
+            1 if user_count > 100 else -1 if user_count < 10 else 0,
+        )
     
     def _calculate_confidence(self, vault_data: Dict, prediction: float) -> float:
         """
         Calculate prediction confidence based on data quality
         """
         confidence = 85.0  # Base confidence
+        tvl, volatility, user_count = self._confidence_inputs(vault_data)
         
         # Adjust based on TVL (higher TVL = more reliable)
-        tvl = float(vault_data.get('tvl', 0))
-        if tvl > 1000000:
-            confidence += 10
-        elif tvl < 10000:
-            confidence -= 15
+        confidence += {1: 10, 0: 0, -1: -15}[tvl]
         
         # Adjust based on volatility (lower volatility = more predictable)
-        volatility = float(vault_data.get('volatility', 10))
-        if volatility < 10:
-            confidence += 5
-        elif volatility > 30:
-            confidence -= 10
+        confidence += {1: 5, 0: 0, -1: -10}[volatility]
         
         # Adjust based on user count (more users = more data)
-        user_count = int(vault_data.get('user_count', 0))
-        if user_count > 100:
-            confidence += 5
-        elif user_count < 10:
-            confidence -= 10
+        confidence += {1: 5, 0: 0, -1: -10}[user_count]
         
         return max(0, min(confidence, 100))
     
@@ -150,52 +923,131 @@ class PyTorchPredictor:
         """
         Predict risk score using ensemble approach
         """
-        # Extract features
-        tvl = float(vault_data.get('tvl', 0))
-        volatility = float(vault_data.get('volatility', 10))
-        liquidity = float(vault_data.get('liquidity', 0))
-        user_count = int(vault_data.get('user_count', 0))
-        
-        # Calculate risk components
-        tvl_risk = 100 - min(100, (tvl / 1000000) * 20)  # Lower TVL = higher risk
-        volatility_risk = min(100, volatility * 3)  # Higher volatility = higher risk
-        liquidity_risk = 100 - min(100, (liquidity / 500000) * 20)  # Lower liquidity = higher risk
-        user_risk = 100 - min(100, (user_count / 100) * 20)  # Fewer users = higher risk
-        
-        # Weighted average
-        risk_score = (
-            tvl_risk * 0.3 +
-            volatility_risk * 0.4 +
-            liquidity_risk * 0.2 +
-            user_risk * 0.1
-        )
-        
-        # Classify risk level
-        if risk_score < 30:
-            risk_level = "LOW"
-        elif risk_score < 60:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "HIGH"
-        
+        return self._risk_analysis(vault_data)
+    
+    def _risk_analysis(self, vault_data: Dict) -> Dict:
+        """
+        predict_risk_score through the cache, keyed and validated on the
+        risk inputs only, so the other features cannot fail it
+        """
+        columns, errors = risk_engine.extract_columns([vault_data])
+        if errors:
+            raise ValueError(errors[0])
+        inputs = np.array([columns[name][0] for name, _ in risk_engine.RISK_COLUMNS])
+        return self._cached('risk', inputs, lambda _: self._compute_risk_score(vault_data))
+    
+    @metrics.timed('risk_scoring')
+    def _compute_risk_score(self, vault_data: Dict) -> Dict:
+        records, errors = risk_engine.score_vaults([vault_data])
+        if errors:
+            raise ValueError(errors[0])
+        return records[0]
+    
+    @metrics.timed('risk_scoring')
+    def predict_risk_score_batch(self, vaults: List[Dict]) -> List[Dict]:
+        """
+        Vectorized risk scores for many vaults
+        Results are in input order; failed items carry an 'error' key
+        """
+        records, errors = risk_engine.score_vaults(vaults)
+        for i, message in errors.items():
+            records[i] = {'error': message}
+        return records
+    
+    @metrics.timed('risk_scoring')
+    def predict_risk_score_columns(self, columns: Dict) -> Dict:
+        """
+        Vectorized risk scores for columnar input, returned as rounded
+        component arrays plus level codes (index into risk_engine.RISK_LEVELS)
+        """
+        count = len(columns['address'])
+        inputs, errors = {}, {}
+        for name, default in risk_engine.RISK_COLUMNS:
+            values = columns[name] if name in columns else np.full(count, float(default))
+            invalid = np.isnan(values)
+            for i in np.flatnonzero(invalid):
+                errors.setdefault(int(i), f"Invalid {name}: not a number")
+            inputs[name] = np.where(invalid, 0, values)
+        scores = risk_engine.score_risk(**inputs)
+        result = {name: risk_engine.round2(scores[name]) for name in ('risk_score', *risk_engine.RISK_WEIGHTS)}
+        result['level_code'] = scores['level_code']
+        result['errors'] = errors
+        return result
+    
+    def evaluate(self, vault_data: Dict) -> VaultEvaluation:
+        """
+        Compute features, prediction, confidence and risk once for a vault
+        """
+        features = self._features(vault_data)
+        prediction = self._predict_features(vault_data, features)
+        risk_analysis = self._risk_analysis(vault_data)
+        return VaultEvaluation(vault_data, features[0], prediction, risk_analysis)
+    
+    def degraded_evaluation(self, vault_data: Dict) -> Tuple[VaultEvaluation, str]:
+        """
+        Evaluation without a model forward pass, for load shedding: the
+        cached prediction when there is one ('cached'), otherwise the current
+        APY held with zero confidence ('risk_only'). Only the vectorized risk
+        score is computed, so this is cheap enough for the event loop
+        """
+        features = self._features(vault_data)
+        window = self._history_window(vault_data)
+        prediction, mode = None, 'cached'
+        if self.cache is not None:
+            key = self.cache.make_key('apy', self.model_version, features[0] if window is None else window,
+                                      self._requested_samples(None), self._confidence_inputs(vault_data))
+            prediction = self.cache.get(key)
+        if prediction is None:
+            prediction, mode = {
+                'predicted_apy': round(float(vault_data.get('current_apy', 0)), 2),
+                'confidence': 0.0,
+                'model': 'LSTM-Attention',
+                'model_version': self.model_version,
+                'features_used': 0,
+            }, 'risk_only'
+        risk_analysis = self._risk_analysis(vault_data)
+        return VaultEvaluation(vault_data, features[0], prediction, risk_analysis), mode
+    
+    def degraded_should_rebalance(self, vault_data: Dict) -> Dict:
+        """should_rebalance from degraded_evaluation, tagged with its mode"""
+        evaluation, mode = self.degraded_evaluation(vault_data)
+        decision = self.should_rebalance(vault_data, {}, evaluation)
+        if mode == 'risk_only':
+            risk = evaluation.risk_analysis
+            decision['reasoning'] = [
+                "Model queue is saturated; rebalancing decision deferred",
+                f"Current risk score is {risk['risk_score']:.2f} ({risk['risk_level']})",
+                "Retry later for a model-based decision",
+            ]
+        return {**decision, 'risk_analysis': evaluation.risk_analysis, 'degraded': mode}
+    
+    def degraded_generate_strategy(self, vault_data: Dict, user_preferences: Dict) -> Dict:
+        """generate_strategy from degraded_evaluation, tagged with its mode"""
+        evaluation, mode = self.degraded_evaluation(vault_data)
+        return {**self.generate_strategy(vault_data, user_preferences, evaluation), 'degraded': mode}
+    
+    def evaluate_vault(self, vault_data: Dict, user_preferences: Dict) -> Dict:
+        """
+        Prediction, risk, strategy and rebalance decision from one forward pass
+        """
+        evaluation = self.evaluate(vault_data)
         return {
-            'risk_score': round(risk_score, 2),
-            'risk_level': risk_level,
-            'components': {
-                'tvl_risk': round(tvl_risk, 2),
-                'volatility_risk': round(volatility_risk, 2),
-                'liquidity_risk': round(liquidity_risk, 2),
-                'user_risk': round(user_risk, 2),
-            },
+            'prediction': evaluation.prediction,
+            'risk_analysis': evaluation.risk_analysis,
+            'strategy': self.generate_strategy(vault_data, user_preferences, evaluation),
+            'rebalance': self.should_rebalance(vault_data, {}, evaluation),
         }
     
-    def generate_strategy(self, vault_data: Dict, user_preferences: Dict) -> Dict:
+    def generate_strategy(self, vault_data: Dict, user_preferences: Dict,
+                          evaluation: VaultEvaluation = None) -> Dict:
         """
         Generate AI-powered investment strategy
         """
+        if evaluation is None:
+            evaluation = self.evaluate(vault_data)
         risk_tolerance = user_preferences.get('risk_tolerance', 'medium')
-        predicted_apy = self.predict_apy(vault_data)['predicted_apy']
-        risk_analysis = self.predict_risk_score(vault_data)
+        predicted_apy = evaluation.predicted_apy
+        risk_analysis = evaluation.risk_analysis
         
         # Strategy parameters based on risk tolerance and predictions
         if risk_tolerance == 'low':
@@ -238,42 +1090,153 @@ class PyTorchPredictor:
             'predicted_apy': predicted_apy,
             'risk_assessment': risk_analysis['risk_level'],
             'recommended_action': self._get_recommended_action(predicted_apy, risk_analysis),
+            'model_version': evaluation.prediction['model_version'],
         }
     
     def _get_recommended_action(self, predicted_apy: float, risk_analysis: Dict) -> str:
         """
         Get recommended action based on predictions
         """
-        risk_score = risk_analysis['risk_score']
-        
-        if predicted_apy > 15 and risk_score < 40:
-            return "STRONG_BUY"
-        elif predicted_apy > 10 and risk_score < 60:
-            return "BUY"
-        elif predicted_apy < 5 or risk_score > 70:
-            return "SELL"
-        elif risk_score > 60:
-            return "REDUCE_POSITION"
-        else:
-            return "HOLD"
+        return policy.recommended_action(predicted_apy, risk_analysis['risk_score'])
     
-    def should_rebalance(self, vault_data: Dict, current_allocation: Dict) -> Dict:
+    def should_rebalance(self, vault_data: Dict, current_allocation: Dict,
+                         evaluation: VaultEvaluation = None) -> Dict:
         """
         Determine if portfolio should be rebalanced
         """
-        predicted_apy = self.predict_apy(vault_data)['predicted_apy']
+        if evaluation is not None:
+            return self._rebalance_decision(vault_data, evaluation.prediction, evaluation.confidence)
+        return self._rebalance_decision(vault_data, self.predict_apy(vault_data))
+    
+    def should_rebalance_batch(self, vaults: List[Dict]) -> List[Dict]:
+        """
+        Rebalancing decisions for many vaults from one batched prediction
+        """
+        return [
+            prediction if 'error' in prediction
+            else self._rebalance_decision(vault, prediction)
+            for vault, prediction in zip(vaults, self.predict_apy_batch(vaults))
+        ]
+    
+    def should_rebalance_columns(self, columns: Dict) -> Dict:
+        """
+        should_rebalance_batch for columnar input, returning columns
+        """
+        result = self.predict_apy_columns(columns)
+        current_apy = columns.get('current_apy', np.zeros(len(columns['address'])))
+        apy_change = np.abs(result['predicted_apy'] - current_apy)
+        result['current_apy'] = current_apy
+        result['apy_change'] = risk_engine.round2(apy_change)
+        result['should_rebalance'] = policy.should_rebalance(apy_change)
+        return result
+    
+    def optimize_portfolio(self, vaults: List[Dict], user_preferences: Dict, capital: float,
+                           covariance: Optional[List[List[float]]] = None,
+                           time_budget_ms: Optional[float] = None) -> Dict:
+        """
+        Allocate capital across many vaults (services.portfolio) from one
+        batched APY prediction, vectorized risk scores and the given or an
+        estimated APY covariance
+        """
+        predictions = self.predict_apy_batch(vaults)
+        for i, prediction in enumerate(predictions):
+            if 'error' in prediction:
+                raise ValueError(f"Vault {i}: {prediction['error']}")
+        columns, errors = risk_engine.extract_columns(vaults)
+        if errors:
+            i, message = next(iter(errors.items()))
+            raise ValueError(f"Vault {i}: {message}")
+        scores = risk_engine.score_risk(**columns)
+        apy = np.array([prediction['predicted_apy'] for prediction in predictions], dtype=np.float64)
+        
+        if covariance is None:
+            prediction_std = np.array([prediction['uncertainty']['std'] if 'uncertainty' in prediction else 0.0
+                                       for prediction in predictions])
+            estimate = portfolio.estimate_covariance(columns['volatility'], self._apy_histories(vaults),
+                                                     prediction_std, config.PORTFOLIO_SHRINKAGE)
+        else:
+            estimate = portfolio.Covariance(dense=covariance)
+        
+        # Capital moves against the vault's liquidity, or its TVL when liquidity is unknown
+        depth = np.where(columns['liquidity'] > 0, columns['liquidity'], columns['tvl'])
+        current = np.array([float(vault.get('current_weight', 0)) for vault in vaults])
+        with metrics.stage('portfolio_solve'):
+            result = portfolio.optimize(
+                apy, scores['risk_score'], estimate, current, depth, capital,
+                risk_tolerance=user_preferences.get('risk_tolerance', 'medium'),
+                max_slippage=float(user_preferences.get('max_slippage', 1.0)),
+                time_budget_ms=config.PORTFOLIO_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms,
+                max_iterations=config.PORTFOLIO_MAX_ITERATIONS,
+                tolerance=config.PORTFOLIO_TOLERANCE,
+            )
+        
+        weights = np.round(result['weights'], 6)
+        amounts = risk_engine.round2(result['weights'] * capital).tolist()
+        trades = risk_engine.round2(result['trade'] * capital).tolist()
+        slippage = risk_engine.round2(result['slippage_pct']).tolist()
+        risk_scores = risk_engine.round2(scores['risk_score']).tolist()
+        allocations = [
+            {
+                'vault_address': vault.get('address'),
+                'weight': weight,
+                'amount': amount,
+                'trade_amount': trade,
+                'predicted_apy': prediction['predicted_apy'],
+                'risk_score': risk_score,
+                'slippage_pct': slip,
+            }
+            for vault, prediction, weight, amount, trade, risk_score, slip in zip(
+                vaults, predictions, weights.tolist(), amounts, trades, risk_scores, slippage)
+        ]
+        return {
+            'allocations': allocations,
+            'summary': {
+                'expected_apy': round(result['expected_apy'], 2),
+                'risk_std': round(result['risk_std'], 2),
+                'risk_score': round(result['risk_score'], 2),
+                'allocated': round(result['allocated'], 6),
+                'unallocated': round(result['unallocated'], 6),
+                'turnover': round(result['turnover'], 6),
+                'slippage_cost': round(result['slippage_cost'], 4),
+            },
+            'solver': {
+                'iterations': result['iterations'],
+                'converged': result['converged'],
+                'solve_ms': result['solve_ms'],
+                'covariance': 'estimated' if covariance is None else 'provided',
+            },
+            'risk_profile': result['profile'],
+            'model_version': predictions[0]['model_version'],
+        }
+    
+    def _apy_histories(self, vaults: List[Dict]) -> List[Optional[np.ndarray]]:
+        """APY points over the stored window, for vaults with a full one"""
+        histories = [None] * len(vaults)
+        if self.feature_store is None:
+            return histories
+        for i, vault in enumerate(vaults):
+            address = vault.get('address')
+            if address and self.feature_store.history_length(address) >= self.feature_store.window_size:
+                histories[i] = self.feature_store.recent(address)[:, APY_FEATURE] * FEATURE_SCALES[APY_FEATURE]
+        return histories
+    
+    def _rebalance_decision(self, vault_data: Dict, prediction: Dict, confidence: float = None) -> Dict:
+        predicted_apy = prediction['predicted_apy']
+        if confidence is None:
+            confidence = prediction['confidence']
         current_apy = float(vault_data.get('current_apy', 0))
         
         apy_change = abs(predicted_apy - current_apy)
         
-        should_rebalance = apy_change > 5  # Rebalance if APY changes by more than 5%
+        should_rebalance = policy.should_rebalance(apy_change)
         
         return {
             'should_rebalance': should_rebalance,
             'current_apy': current_apy,
             'predicted_apy': predicted_apy,
             'apy_change': round(apy_change, 2),
-            'confidence': self._calculate_confidence(vault_data, predicted_apy),
+            'confidence': confidence,
+            'model_version': prediction['model_version'],
             'reasoning': self._generate_rebalance_reasoning(should_rebalance, apy_change, predicted_apy),
         }
     
@@ -294,5 +1257,39 @@ class PyTorchPredictor:
         
         return reasons
 
-# Global predictor instance
-pytorch_predictor = PyTorchPredictor()
+def initial_weights(registry_version: Optional[str]) -> Tuple[str, Optional[str]]:
+    """(weights path, version) a new predictor starts from"""
+    if registry_version:
+        return model_registry.weights_path(registry_version), registry_version
+    return config.MODEL_PATH, None
+
+def share_weights() -> str:
+    """
+    Load the startup weights once into shared memory, for a supervisor that
+    forks workers afterwards: their predictors build on these tensors
+    instead of reading and copying the file. Returns the version shared
+    """
+    version = model_registry.active_version()
+    try:
+        path, _ = initial_weights(version)
+        state_dict = torch.load(path, map_location='cpu')
+        key = os.path.abspath(path)
+    except Exception:
+        # No trained weights: share one random init so workers agree
+        state_dict, key, version = YieldPredictionModel().state_dict(), UNTRAINED, UNTRAINED
+    for tensor in state_dict.values():
+        tensor.share_memory_()
+    _shared_weights[key] = state_dict
+    return version or PyTorchPredictor._state_dict_version(state_dict)
+
+# Shared predictor instance, built on first use (see services.model_loader)
+_predictor: Optional[PyTorchPredictor] = None
+_predictor_lock = threading.Lock()
+
+def get_predictor() -> PyTorchPredictor:
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = PyTorchPredictor()
+    return _predictor
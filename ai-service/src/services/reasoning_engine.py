@@ -1,9 +1,12 @@
 from datetime import datetime
 from typing import Dict, List
 
+from services.metrics import metrics
+
 class ReasoningEngine:
     """Generate human-readable reasoning for AI decisions"""
     
+    @metrics.timed('reasoning')
     def generate_reasoning(self, action: str, data: Dict) -> Dict:
         """Generate reasoning trail for an action"""
         
@@ -58,6 +61,9 @@ class ReasoningEngine:
     
     def _risk_reasoning(self, data: Dict) -> Dict:
         risk_level = data.get('risk_level', 5)
+        if isinstance(risk_level, str):
+            # PyTorch risk analysis reports a LOW/MEDIUM/HIGH label with a 0-100 score
+            risk_level = float(data.get('risk_score', 50)) / 10
         
         factors = []
         
@@ -0,0 +1,132 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Risk inputs: (vault field, default)
+RISK_COLUMNS = [
+    ('tvl', 0),
+    ('volatility', 10),
+    ('liquidity', 0),
+    ('user_count', 0),
+]
+
+# Component weights in the total risk score
+RISK_WEIGHTS = {
+    'tvl_risk': 0.3,
+    'volatility_risk': 0.4,
+    'liquidity_risk': 0.2,
+    'user_risk': 0.1,
+}
+
+RISK_LEVELS = np.array(['LOW', 'MEDIUM', 'HIGH'])
+
+
+def extract_columns(vaults: List[Dict]) -> Tuple[Dict[str, np.ndarray], Dict[int, str]]:
+    """
+    Columnar float64 arrays of the risk inputs for N vaults
+    Returns the columns and {row index: error} for unconvertible rows
+    (those rows are zero-filled)
+    """
+    columns, errors = {}, {}
+    for name, default in RISK_COLUMNS:
+        values = [vault.get(name, default) for vault in vaults]
+        try:
+            column = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            column = np.zeros(len(values))
+            for i, value in enumerate(values):
+                try:
+                    column[i] = float(value)
+                except (TypeError, ValueError) as e:
+                    errors.setdefault(i, f"Invalid {name}: {e}")
+        invalid = np.isnan(column)
+        for i in np.flatnonzero(invalid):
+            errors.setdefault(int(i), f"Invalid {name}: not a number")
+        column[invalid] = 0
+        columns[name] = column
+    return columns, errors
+
+
+def score_risk(tvl: np.ndarray, volatility: np.ndarray, liquidity: np.ndarray,
+               user_count: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized risk scoring over columnar arrays
+    Returns every component, the weighted risk_score and level_code
+    (0 = LOW, 1 = MEDIUM, 2 = HIGH)
+    """
+    tvl = np.asarray(tvl, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    liquidity = np.asarray(liquidity, dtype=np.float64)
+    user_count = np.trunc(np.asarray(user_count, dtype=np.float64))  # Whole users
+
+    tvl_risk = 100 - np.minimum(100, (tvl / 1000000) * 20)  # Lower TVL = higher risk
+    volatility_risk = np.minimum(100, volatility * 3)  # Higher volatility = higher risk
+    liquidity_risk = 100 - np.minimum(100, (liquidity / 500000) * 20)  # Lower liquidity = higher risk
+    user_risk = 100 - np.minimum(100, (user_count / 100) * 20)  # Fewer users = higher risk
+
+    # Weighted average (same summation order as the scalar formula)
+    risk_score = (
+        tvl_risk * RISK_WEIGHTS['tvl_risk'] +
+        volatility_risk * RISK_WEIGHTS['volatility_risk'] +
+        liquidity_risk * RISK_WEIGHTS['liquidity_risk'] +
+        user_risk * RISK_WEIGHTS['user_risk']
+    )
+
+    # Classify risk level; NaN scores fall through to HIGH
+    level_code = np.full(risk_score.shape, 2, dtype=np.int8)
+    level_code[risk_score < 60] = 1
+    level_code[risk_score < 30] = 0
+
+    return {
+        'tvl_risk': tvl_risk,
+        'volatility_risk': volatility_risk,
+        'liquidity_risk': liquidity_risk,
+        'user_risk': user_risk,
+        'risk_score': risk_score,
+        'level_code': level_code,
+    }
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized round(x, 2) that matches Python's round() exactly
+    np.round can pick the other neighbour when x * 100 sits on a .5 tie, so
+    those few entries are re-rounded with the builtin
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    with np.errstate(invalid='ignore'):
+        ties = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(ties):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def to_records(scores: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Convert columnar scores to the per-vault predict_risk_score dicts
+    """
+    columns = [round2(scores[name]).tolist() for name in ('risk_score', *RISK_WEIGHTS)]
+    levels = RISK_LEVELS[scores['level_code']].tolist()
+    return [
+        {
+            'risk_score': risk_score,
+            'risk_level': level,
+            'components': {
+                'tvl_risk': tvl_risk,
+                'volatility_risk': volatility_risk,
+                'liquidity_risk': liquidity_risk,
+                'user_risk': user_risk,
+            },
+        }
+        for risk_score, tvl_risk, volatility_risk, liquidity_risk, user_risk, level
+        in zip(*columns, levels)
+    ]
+
+
+def score_vaults(vaults: List[Dict]) -> Tuple[List[Dict], Dict[int, str]]:
+    """
+    Risk dicts for N vaults in input order, plus {row index: error}
+    """
+    columns, errors = extract_columns(vaults)
+    records = to_records(score_risk(**columns))
+    return records, errors
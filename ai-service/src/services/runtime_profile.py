@@ -0,0 +1,174 @@
+"""
+Inference runtime profile written by the autotuner (python -m autotune)
+
+The profile holds the settings that measured best on this machine: torch
+intra-op and inter-op threads, largest micro-batch and worker processes.
+It is applied at startup, before the inference pool and the workers are
+created, by overriding the matching config values. Variables set in the
+environment always win over it.
+
+It records what it was measured against: CPU model and count, torch
+version, inference backend and model version. When any of these differ at
+startup the profile is stale and is not applied. `python main.py` then
+re-tunes with a short sweep before it starts serving
+(AI_RUNTIME_PROFILE_RETUNE); other launchers log a warning and keep the
+defaults
+"""
+import hashlib
+import json
+import os
+import platform
+from typing import Dict, Optional
+
+import config
+from services.model_registry import model_registry
+
+PROFILE_FORMAT = 1
+
+# Profile setting -> (config attribute, environment variable that overrides it)
+SETTINGS = {
+    'workers': ('WORKERS', 'AI_WORKERS'),
+    'torch_num_threads': ('TORCH_NUM_THREADS', 'AI_TORCH_NUM_THREADS'),
+    'torch_interop_threads': ('TORCH_INTEROP_THREADS', 'AI_TORCH_INTEROP_THREADS'),
+    'batch_max_size': ('BATCH_MAX_SIZE', 'AI_BATCH_MAX_SIZE'),
+}
+
+
+def _cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _torch_version() -> Optional[str]:
+    # From the package metadata: importing torch here would slow startup
+    from importlib import metadata
+    try:
+        return metadata.version('torch')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def model_identity() -> str:
+    """
+    Version the service will start with: the registry's active version,
+    else a hash of the weights file ('untrained' without one)
+    """
+    version = model_registry.active_version()
+    if version:
+        return version
+    try:
+        with open(config.MODEL_PATH, 'rb') as f:
+            return 'sha1:' + hashlib.sha1(f.read()).hexdigest()[:12]
+    except OSError:
+        return 'untrained'
+
+
+def fingerprint() -> Dict:
+    """What a profile is only valid for"""
+    from services.worker_supervisor import usable_cpus
+
+    return {
+        'cpu_model': _cpu_model(),
+        'cpus': len(usable_cpus()),
+        'machine': platform.machine(),
+        'torch': _torch_version(),
+        'inference_backend': config.INFERENCE_BACKEND,
+        'model': model_identity(),
+    }
+
+
+def save(profile: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(temporary, path)
+
+
+class RuntimeProfile:
+    """Loads, validates and applies the profile at `path`"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.profile: Optional[Dict] = None
+        self.state = 'none'  # none, valid, applied, stale, invalid or disabled
+        self.reason: Optional[str] = None
+        self.applied: Dict = {}
+
+    def stale_reason(self, profile: Dict, current: Optional[Dict] = None) -> Optional[str]:
+        """Why the profile does not match this machine and model (None when it does)"""
+        if profile.get('format') != PROFILE_FORMAT:
+            return f"format {profile.get('format')} != {PROFILE_FORMAT}"
+        current = current or fingerprint()
+        recorded = profile.get('fingerprint', {})
+        changed = [key for key in current if recorded.get(key) != current[key]]
+        if changed:
+            return ', '.join(f"{key} changed ({recorded.get(key)!r} -> {current[key]!r})" for key in changed)
+        return None
+
+    def load(self) -> Optional[Dict]:
+        """Read and validate the profile; sets state and reason"""
+        self.profile, self.reason = None, None
+        if not self.path:
+            self.state = 'disabled'
+            return None
+        try:
+            with open(self.path) as f:
+                profile = json.load(f)
+        except FileNotFoundError:
+            self.state = 'none'
+            return None
+        except (OSError, ValueError) as e:
+            self.state, self.reason = 'invalid', str(e)
+            return None
+        self.profile = profile
+        self.reason = self.stale_reason(profile)
+        self.state = 'stale' if self.reason else 'valid'
+        return profile
+
+    def apply(self, profile: Optional[Dict] = None, warn: bool = True) -> Dict:
+        """
+        Override config with a valid profile's settings (those not set in the
+        environment); returns {setting: value} applied
+        """
+        if profile is None:
+            profile = self.load()
+            if self.state == 'stale' and warn:
+                print(f"⚠️  Runtime profile {self.path} is stale ({self.reason}); "
+                      f"using defaults, re-run python -m autotune")
+            if self.state != 'valid':
+                return {}
+        applied = {}
+        for name, value in profile.get('settings', {}).items():
+            if name not in SETTINGS:
+                continue
+            attribute, variable = SETTINGS[name]
+            if variable in os.environ:
+                continue
+            setattr(config, attribute, int(value))
+            applied[name] = int(value)
+        self.profile, self.state, self.reason, self.applied = profile, 'applied', None, applied
+        return applied
+
+    def stats(self) -> Dict:
+        profile = self.profile or {}
+        return {
+            'path': self.path or None,
+            'state': self.state,
+            'reason': self.reason,
+            'applied': dict(self.applied),
+            'settings': profile.get('settings'),
+            'measured': profile.get('result'),
+            'created_at': profile.get('created_at'),
+            'fingerprint': profile.get('fingerprint'),
+        }
+
+
+# Global instance
+runtime_profile = RuntimeProfile(config.RUNTIME_PROFILE_PATH)
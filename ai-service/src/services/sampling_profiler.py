@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import config
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler for all Python threads
+    A daemon thread snapshots every thread's stack each interval and counts
+    identical stacks. Output is in collapsed-stack format ("a;b;c count"),
+    which flamegraph.pl and speedscope read directly
+    """
+    def __init__(self, interval_ms: float = 10, max_depth: int = 64, max_stacks: int = 20000):
+        self.interval = max(1.0, float(interval_ms)) / 1000
+        self.max_depth = int(max_depth)
+        self.max_stacks = int(max_stacks)
+
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.samples = 0
+        self.dropped = 0
+        self.sampling_seconds = 0.0  # Time spent inside the sampler itself
+        self.started_at: Optional[float] = None
+        self.running_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+        self.running_seconds += time.monotonic() - self.started_at
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = self.dropped = 0
+            self.sampling_seconds = self.running_seconds = 0.0
+            if self._thread is not None:
+                self.started_at = time.monotonic()
+
+    def _frame_name(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    names.append(self._frame_name(frame))
+                    frame = frame.f_back
+                stacks.append(';'.join(reversed(names)))
+            with self._lock:
+                for stack in stacks:
+                    if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[stack] += 1
+                    else:
+                        self.dropped += 1
+                self.samples += 1
+                self.sampling_seconds += time.perf_counter() - started
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first"""
+        with self._lock:
+            return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def top(self, limit: int = 20) -> List[Dict]:
+        """Innermost frames by sample count"""
+        leaves: Counter = Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            total = sum(leaves.values())
+        return [
+            {'frame': frame, 'samples': count, 'share': round(count / total, 4)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+    def stats(self) -> Dict:
+        running_seconds = self.running_seconds
+        if self._thread is not None:
+            running_seconds += time.monotonic() - self.started_at
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'distinct_stacks': len(self._stacks),
+            'dropped_stacks': self.dropped,
+            # Sampler time / wall time while running
+            'overhead': round(self.sampling_seconds / running_seconds, 5) if running_seconds else 0.0,
+        }
+
+
+# Global profiler instance (started at boot when AI_PROFILER_ENABLED is set)
+profiler = SamplingProfiler(interval_ms=config.PROFILER_INTERVAL_MS)
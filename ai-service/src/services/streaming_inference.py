@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+
+
+class StreamingInference:
+    """
+    Incremental YieldPredictionModel inference, one LSTM step per new observation
+    Each vault carries one (hidden, cell) state across observations plus a
+    ring of its last `window` LSTM outputs and attention scores. A new
+    observation advances the state by a single LSTM time step,
+    replaces the oldest ring entry and re-applies the attention softmax and
+    head over the ring: one time step instead of `window`.
+    This is an approximation. The model scores a window from a zero state,
+    while the carried state still holds (decaying) information from older
+    observations, and older ring entries were computed with that longer
+    context. A state is exact right after it is (re)built from the feature
+    store window. Every verify_every steps a sample is checked against the
+    full-window forward pass, and states that drift past `tolerance` are
+    dropped. Their vaults fall back to full-window inference until the next
+    observation rebuilds them. States are also rebuilt after refresh_every
+    steps, which bounds how much history they accumulate.
+    State for every vault lives in preallocated tensors indexed by slot.
+    Idle vaults are evicted (LRU + idle timeout).
+    Steps use the eager model's modules. While `suspended` holds a reason
+    (a compiled inference backend serves the full-window path), nothing is
+    stepped and latest() answers None, so every prediction comes from one
+    backend's numerics.
+    """
+    def __init__(self, model, window: int = 10, max_vaults: int = 2000, idle_seconds: float = 3600,
+                 tolerance: float = 1e-3, verify_every: int = 64, refresh_every: int = 100):
+        self.model = model
+        self.window = int(window)
+        self.max_vaults = max(1, int(max_vaults))
+        self.idle_seconds = float(idle_seconds)
+        self.tolerance = float(tolerance)
+        self.verify_every = int(verify_every)
+        self.refresh_every = int(refresh_every)
+        self.suspended: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free = list(range(self.max_vaults - 1, -1, -1))
+        self._allocate()
+
+        self.steps = 0
+        self.bootstraps = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.verifications = 0
+        self.verify_failures = 0
+        self.max_abs_diff = 0.0
+
+    def _allocate(self):
+        device = next(self.model.parameters()).device
+        layers, hidden = self.model.num_layers, self.model.hidden_size
+        # (hidden, cell) in nn.LSTM's [layers, batch, hidden] layout
+        self._h = torch.zeros(layers, self.max_vaults, hidden, device=device)
+        self._c = torch.zeros(layers, self.max_vaults, hidden, device=device)
+        self._outputs = torch.zeros(self.max_vaults, self.window, hidden, device=device)  # Ring of LSTM outputs
+        self._scores = torch.zeros(self.max_vaults, self.window, device=device)  # and their attention scores
+        self._position = np.zeros(self.max_vaults, dtype=np.int64)  # Oldest ring entry (next to replace)
+        self._count = np.zeros(self.max_vaults, dtype=np.int64)  # Observations folded in
+        self._since_bootstrap = np.zeros(self.max_vaults, dtype=np.int64)
+        self._output = np.zeros(self.max_vaults)  # Latest model output
+        self._last_seen = np.zeros(self.max_vaults)
+
+    def _emit(self, slots: np.ndarray, index: torch.Tensor):
+        """Attention over each slot's ring, then the model head"""
+        weights = torch.softmax(self._scores[index], dim=1).unsqueeze(1)
+        context = torch.bmm(weights, self._outputs[index]).squeeze(1)
+        self._output[slots] = self.model.head(context).reshape(-1).cpu().numpy()
+
+    def _step(self, slots: np.ndarray, rows: torch.Tensor):
+        """Advance the given slots by one [N, F] observation each"""
+        device = self._h.device
+        index = torch.from_numpy(slots).to(device)
+        # One time step through the fused multi-layer LSTM, from the carried state
+        out, (hidden, cell) = self.model.lstm(rows.to(device).unsqueeze(1), (self._h[:, index], self._c[:, index]))
+        self._h[:, index] = hidden
+        self._c[:, index] = cell
+
+        out = out.squeeze(1)
+        position = torch.from_numpy(self._position[slots]).to(device)
+        self._outputs[index, position] = out
+        self._scores[index, position] = self.model.attention(out).squeeze(-1)
+        self._position[slots] = (self._position[slots] + 1) % self.window
+        self._count[slots] += 1
+        self._since_bootstrap[slots] += 1
+        self.steps += len(slots)
+        self._emit(slots, index)
+
+    def _acquire_slot(self, address: str, now: float) -> int:
+        if not self._free:
+            self._evict_one()
+        slot = self._free.pop()
+        self._slots[address] = slot
+        self._last_seen[slot] = now
+        return slot
+
+    def _bootstrap(self, addresses: List[str], windows: np.ndarray, counts: List[int], now: float):
+        """Rebuild states exactly by running each vault's current [W, F] window"""
+        slots = np.array([
+            self._slots[address] if address in self._slots else self._acquire_slot(address, now)
+            for address in addresses
+        ], dtype=np.int64)
+        index = torch.from_numpy(slots).to(self._h.device)
+        sequences = torch.from_numpy(np.ascontiguousarray(windows)).to(self._h.device)
+        lstm_out, (hidden, cell) = self.model.lstm(sequences)
+        self._h[:, index] = hidden
+        self._c[:, index] = cell
+        self._outputs[index] = lstm_out
+        self._scores[index] = self.model.attention(lstm_out).squeeze(-1)
+        self._position[slots] = 0
+        self._count[slots] = counts
+        self._since_bootstrap[slots] = 0
+        self._emit(slots, index)
+        self.bootstraps += len(slots)
+
+    def observe(self, addresses: List[str], rows: np.ndarray, counts: List[int],
+                window_fn: Callable[[str], np.ndarray]):
+        """
+        Fold newly ingested [N, F] rows into the streaming states
+        counts are the feature store history lengths after the ingest;
+        vaults whose state is missing, out of step or due for a refresh are
+        rebuilt from window_fn(address)
+        """
+        if self.suspended is not None:
+            return
+        # Only the latest row per vault matters; repeats force a rebuild
+        latest: Dict[str, int] = {}
+        for i, address in enumerate(addresses):
+            latest[address] = i
+
+        with self._lock, torch.no_grad():
+            now = time.monotonic()
+            step_slots, step_rows, rebuild = [], [], []
+            for address, i in latest.items():
+                slot = self._slots.get(address)
+                if slot is not None:
+                    self._last_seen[slot] = now
+                    self._slots.move_to_end(address)
+                in_step = slot is not None and self._count[slot] == counts[i] - 1
+                if in_step and (self.refresh_every <= 0 or self._since_bootstrap[slot] < self.refresh_every):
+                    step_slots.append(slot)
+                    step_rows.append(rows[i])
+                elif slot is None or self._count[slot] != counts[i]:
+                    if in_step:
+                        self.refreshes += 1
+                    rebuild.append((address, counts[i]))
+
+            if step_slots:
+                self._step(np.array(step_slots, dtype=np.int64), torch.from_numpy(np.stack(step_rows)))
+
+            if rebuild:
+                rebuild = rebuild[-self.max_vaults:]  # The rest falls back to full-window inference
+                windows = np.stack([window_fn(address) for address, _ in rebuild])
+                self._bootstrap([address for address, _ in rebuild], windows,
+                                [count for _, count in rebuild], now)
+
+            if self.verify_every > 0 and step_slots and self.steps % self.verify_every < len(step_slots):
+                stepped_slots = set(step_slots)
+                stepped = [address for address in latest if self._slots.get(address) in stepped_slots]
+                self._verify_locked(stepped[:1], window_fn)
+
+            self._evict_idle(now)
+
+    def latest(self, address: str, count: int) -> Optional[float]:
+        """
+        Streaming model output for the vault's current window, or None when
+        the state is missing or behind the feature store
+        """
+        with self._lock:
+            slot = self._slots.get(address)
+            if slot is None or self._count[slot] != count or self.suspended is not None:
+                return None
+            self._last_seen[slot] = time.monotonic()
+            self._slots.move_to_end(address)
+            return float(self._output[slot])
+
+    def _verify_locked(self, addresses: List[str], window_fn: Callable[[str], np.ndarray]) -> List[Dict]:
+        addresses = [address for address in addresses if address in self._slots]
+        if not addresses:
+            return []
+        windows = torch.from_numpy(np.stack([window_fn(address) for address in addresses]))
+        full = self.model(windows.to(self._h.device)).reshape(-1).tolist()
+        reports = []
+        for address, expected in zip(addresses, full):
+            slot = self._slots[address]
+            streamed = float(self._output[slot])
+            steps = int(self._since_bootstrap[slot])
+            diff = abs(streamed - expected)
+            ok = diff <= self.tolerance
+            self.verifications += 1
+            self.max_abs_diff = max(self.max_abs_diff, diff)
+            if not ok:
+                # Drop the drifted state; it is rebuilt on the next observation
+                self.verify_failures += 1
+                self._release(address)
+            reports.append({
+                'address': address,
+                'streaming_output': streamed,
+                'full_window_output': expected,
+                'abs_diff': diff,
+                'steps_since_rebuild': steps,
+                'within_tolerance': ok,
+            })
+        return reports
+
+    def verify(self, address: str, window_fn: Callable[[str], np.ndarray]) -> Optional[Dict]:
+        """
+        Compare the streaming output with a full-window forward pass
+        """
+        with self._lock, torch.no_grad():
+            reports = self._verify_locked([address], window_fn)
+        return reports[0] if reports else None
+
+    def _release(self, address: str):
+        slot = self._slots.pop(address)
+        self._count[slot] = 0
+        self._free.append(slot)
+
+    def _evict_one(self):
+        address = next(iter(self._slots))
+        self._release(address)
+        self.evictions += 1
+
+    def _evict_idle(self, now: float):
+        while self._slots:
+            address = next(iter(self._slots))
+            if now - self._last_seen[self._slots[address]] <= self.idle_seconds:
+                break
+            self._release(address)
+            self.evictions += 1
+
+    def reset(self):
+        """Drop every state, e.g. after the model weights change"""
+        with self._lock:
+            for address in list(self._slots):
+                self._release(address)
+
+    def swap_model(self, model, suspended: Optional[str] = None):
+        """
+        Switch to another model; states are rebuilt on the next observation
+        suspended: why the new model must not be stepped (None = step it)
+        """
+        with self._lock:
+            for address in list(self._slots):
+                self._release(address)
+            self.model = model
+            self.suspended = suspended
+            self._allocate()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tensors = (self._h, self._c, self._outputs, self._scores)
+            return {
+                'suspended': self.suspended,
+                'vaults': len(self._slots),
+                'max_vaults': self.max_vaults,
+                'idle_seconds': self.idle_seconds,
+                'steps': self.steps,
+                'bootstraps': self.bootstraps,
+                'refreshes': self.refreshes,
+                'refresh_every': self.refresh_every,
+                'evictions': self.evictions,
+                'verifications': self.verifications,
+                'verify_failures': self.verify_failures,
+                'max_abs_diff': self.max_abs_diff,
+                'tolerance': self.tolerance,
+                'memory_bytes': sum(tensor.numel() * tensor.element_size() for tensor in tensors),
+            }
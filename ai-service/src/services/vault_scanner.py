@@ -0,0 +1,340 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+import config
+from services.admission import PRIORITY_LOW
+from services.inference_executor import inference_executor, ExecutorSaturated
+from services.market_data import market_data
+from services.metrics import metrics
+from services.model_loader import model_loader
+
+# Pool deadline of a scan when there is no interval (POST /scanner/scan only)
+_MANUAL_SCAN_SECONDS = 30.0
+# First and largest pause before re-offering a chunk the pool turned away
+_RETRY_MIN_SECONDS = 0.01
+_RETRY_MAX_SECONDS = 1.0
+
+
+def normalize_address(address: str) -> str:
+    return str(address).strip().lower()
+
+
+class Subscription:
+    """
+    One push subscriber: event filters plus a bounded queue
+    The queue holds at most one pending event per vault; a newer decision
+    replaces the undelivered one, so a slow consumer falls behind by distinct
+    vaults rather than by events. When it is still full the oldest event is
+    dropped and the subscriber receives an overflow notice telling it to
+    resync from the decision snapshot
+    """
+    def __init__(self, addresses: Optional[Iterable[str]] = None, actionable_only: bool = False,
+                 min_apy_change: float = 0.0, min_confidence: float = 0.0, max_queue: int = 1000):
+        self.addresses = {normalize_address(a) for a in addresses} if addresses else None
+        self.actionable_only = actionable_only
+        self.min_apy_change = float(min_apy_change)
+        self.min_confidence = float(min_confidence)
+        self.max_queue = max(1, int(max_queue))
+        self.closed = False
+        self.connected_at = time.time()
+
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._unreported_drops = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def matches(self, event: Dict) -> bool:
+        if self.addresses is not None and event['vault_address'] not in self.addresses:
+            return False
+        if self.actionable_only and not event['should_rebalance']:
+            return False
+        return event['apy_change'] >= self.min_apy_change and event['confidence'] >= self.min_confidence
+
+    def offer(self, event: Dict):
+        """Queue an event without blocking the publisher"""
+        if self.closed or not self.matches(event):
+            return
+        key = event['vault_address']
+        if key in self._pending:
+            del self._pending[key]
+            self.coalesced += 1
+        elif len(self._pending) >= self.max_queue:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+            self._unreported_drops += 1
+        self._pending[key] = event
+        self._wakeup.set()
+
+    async def next(self, timeout: float) -> Optional[Dict]:
+        """
+        Next event, an overflow notice, or None after timeout / on close
+        """
+        if not self._pending and not self._unreported_drops and not self.closed:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed:
+            return None
+        if self._unreported_drops:
+            dropped, self._unreported_drops = self._unreported_drops, 0
+            return {'type': 'overflow', 'dropped': dropped}
+        if not self._pending:
+            return None
+        _, event = self._pending.popitem(last=False)
+        self.delivered += 1
+        return event
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    def stats(self) -> Dict:
+        return {
+            'addresses': len(self.addresses) if self.addresses is not None else None,
+            'actionable_only': self.actionable_only,
+            'min_apy_change': self.min_apy_change,
+            'min_confidence': self.min_confidence,
+            'queued': len(self._pending),
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'connected_seconds': round(time.time() - self.connected_at, 1),
+        }
+
+
+class VaultScanner:
+    """
+    Periodic should_rebalance scan over a registered vault universe
+    Every interval the whole set goes through should_rebalance_batch on the
+    inference pool in chunks, so interactive requests interleave with it.
+    Only decisions worth acting on are pushed to subscribers: the first
+    actionable decision for a vault, any flip of should_rebalance, and
+    actionable decisions whose predicted APY moved by at least
+    min_apy_change points since the last push for that vault
+    Every pool call of a scan carries the deadline start + interval, so a
+    busy pool queues the scan (at low priority) instead of turning it away
+    after the short no-deadline timeout. Chunks the pool still rejects are
+    retried until that deadline; the ones left are counted as deferred and
+    picked up by the next scan
+    Registration, scans and publishing run on the event loop thread and
+    update() only swaps whole snapshots, so no locking is needed
+    """
+    def __init__(self, interval_seconds: float = 30, batch_size: int = 1024, max_vaults: int = 10000,
+                 min_apy_change: float = 0.5, max_subscribers: int = 100, subscriber_queue: int = 1000):
+        self.interval_seconds = float(interval_seconds)
+        self.batch_size = max(1, int(batch_size))
+        self.max_vaults = int(max_vaults)
+        self.min_apy_change = float(min_apy_change)
+        self.max_subscribers = int(max_subscribers)
+        self.subscriber_queue = int(subscriber_queue)
+
+        self._vaults: Dict[str, Dict] = {}
+        self._decisions: Dict[str, Dict] = {}
+        self._published: Dict[str, Dict] = {}
+        self._subscribers: Set[Subscription] = set()
+        self._scan_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.sequence = 0
+        self.scans = 0
+        self.skipped_scans = 0
+        self.vault_errors = 0
+        self.pool_retries = 0
+        self.deferred_vaults = 0
+        self.events_published = 0
+        self.last_scan: Dict = {}
+
+    def register(self, vaults: List[Dict]) -> int:
+        """Add or replace vault snapshots; returns the universe size"""
+        new = {normalize_address(vault['address']) for vault in vaults} - self._vaults.keys()
+        if len(self._vaults) + len(new) > self.max_vaults:
+            raise ValueError(f"At most {self.max_vaults} vaults can be registered")
+        for vault in vaults:
+            self._vaults[normalize_address(vault['address'])] = dict(vault)
+        return len(self._vaults)
+
+    def unregister(self, address: str) -> bool:
+        address = normalize_address(address)
+        self._decisions.pop(address, None)
+        self._published.pop(address, None)
+        return self._vaults.pop(address, None) is not None
+
+    def update(self, observations: List[Dict]) -> int:
+        """Merge fresh snapshot fields into already registered vaults"""
+        updated = 0
+        for observation in observations:
+            address = normalize_address(observation.get('address', ''))
+            vault = self._vaults.get(address)
+            if vault is not None:
+                # Replace rather than mutate: a scan may be reading the old snapshot
+                self._vaults[address] = {**vault, **observation, 'address': vault['address']}
+                updated += 1
+        return updated
+
+    def vault_count(self) -> int:
+        return len(self._vaults)
+
+    def subscribe(self, **filters) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise RuntimeError(f"At most {self.max_subscribers} subscribers")
+        subscription = Subscription(max_queue=self.subscriber_queue, **filters)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        self._subscribers.discard(subscription)
+
+    def _publish(self, event: Dict):
+        self.events_published += 1
+        for subscription in self._subscribers:
+            subscription.offer(event)
+
+    def _event_for(self, address: str, decision: Dict) -> Optional[Dict]:
+        previous = self._decisions.get(address)
+        published = self._published.get(address)
+        if previous is not None and previous['should_rebalance'] != decision['should_rebalance']:
+            reason = 'changed'
+        elif not decision['should_rebalance']:
+            return None
+        elif published is None or not published['should_rebalance']:
+            reason = 'actionable'
+        elif abs(decision['predicted_apy'] - published['predicted_apy']) >= self.min_apy_change:
+            reason = 'updated'
+        else:
+            return None
+        self.sequence += 1
+        return {
+            'type': 'rebalance',
+            'id': self.sequence,
+            'reason': reason,
+            'vault_address': address,
+            **decision,
+            'scanned_at': time.time(),
+        }
+
+    async def _decide(self, vaults: List[Dict], deadline: float) -> Optional[List[Dict]]:
+        """should_rebalance_batch on the pool, retried until deadline; None when never admitted"""
+        pause = _RETRY_MIN_SECONDS
+        while True:
+            try:
+                # Queued behind interactive calls when the pool is busy
+                return await inference_executor.run('should_rebalance_batch', vaults,
+                                                    priority=PRIORITY_LOW, deadline=deadline)
+            except ExecutorSaturated:
+                remaining = deadline - time.monotonic()
+                if remaining <= pause:
+                    return None
+                self.pool_retries += 1
+                await asyncio.sleep(pause)
+                pause = min(pause * 2, _RETRY_MAX_SECONDS)
+
+    async def scan(self) -> Dict:
+        """Evaluate every registered vault once and publish the notable decisions"""
+        if self._scan_lock is None:
+            self._scan_lock = asyncio.Lock()
+        async with self._scan_lock:
+            started = time.perf_counter()
+            deadline = time.monotonic() + (self.interval_seconds if self.interval_seconds > 0
+                                           else _MANUAL_SCAN_SECONDS)
+            addresses = list(self._vaults)
+            published = errors = deferred = 0
+            with metrics.stage('vault_scan'):
+                for start in range(0, len(addresses), self.batch_size):
+                    chunk = addresses[start:start + self.batch_size]
+                    vaults = await market_data.enrich([self._vaults[address] for address in chunk])
+                    decisions = await self._decide(vaults, deadline)
+                    if decisions is None:
+                        deferred += len(chunk)
+                        continue
+                    for address, decision in zip(chunk, decisions):
+                        if 'error' in decision or address not in self._vaults:
+                            errors += 1
+                            continue
+                        event = self._event_for(address, decision)
+                        self._decisions[address] = decision
+                        if event is not None:
+                            self._published[address] = decision
+                            self._publish(event)
+                            published += 1
+
+            self.scans += 1
+            self.vault_errors += errors
+            self.deferred_vaults += deferred
+            self.last_scan = {
+                'at': time.time(),
+                'vaults': len(addresses),
+                'errors': errors,
+                'deferred': deferred,
+                'published': published,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            }
+            return self.last_scan
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            if not self._vaults or not model_loader.ready:
+                continue
+            try:
+                await self.scan()
+            except Exception as e:
+                self.skipped_scans += 1
+                print(f"⚠️  Vault scan failed: {e}")
+
+    def start(self):
+        """Schedule periodic scans on the running event loop"""
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def decisions(self, actionable_only: bool = False) -> List[Dict]:
+        """Latest decision per vault, e.g. for subscribers resyncing after overflow"""
+        return [
+            {'vault_address': address, **decision}
+            for address, decision in self._decisions.items()
+            if not actionable_only or decision['should_rebalance']
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            'running': self._task is not None,
+            'interval_seconds': self.interval_seconds,
+            'vaults': len(self._vaults),
+            'actionable': sum(1 for decision in self._decisions.values() if decision['should_rebalance']),
+            'scans': self.scans,
+            'skipped_scans': self.skipped_scans,
+            'vault_errors': self.vault_errors,
+            'pool_retries': self.pool_retries,
+            'deferred_vaults': self.deferred_vaults,
+            'events_published': self.events_published,
+            'last_scan': self.last_scan,
+            'subscribers': [subscription.stats() for subscription in self._subscribers],
+        }
+
+
+# Global scanner instance
+vault_scanner = VaultScanner(
+    interval_seconds=config.SCANNER_INTERVAL_SECONDS,
+    batch_size=config.SCANNER_BATCH_SIZE,
+    max_vaults=config.SCANNER_MAX_VAULTS,
+    min_apy_change=config.SCANNER_MIN_APY_CHANGE,
+    max_subscribers=config.SCANNER_MAX_SUBSCRIBERS,
+    subscriber_queue=config.SCANNER_SUBSCRIBER_QUEUE,
+)
@@ -0,0 +1,217 @@
+"""
+Preforking multi-worker server
+
+    python main.py --workers 4          (or AI_WORKERS=4 python main.py)
+
+The supervisor binds the listening socket, imports the app and loads the
+model weights into shared memory once, then forks the workers. Forked
+workers inherit the imported modules (torch included) copy-on-write and
+build their predictors on the shared weight tensors, so adding a worker
+neither re-imports torch nor reads and copies the weights again. Each
+worker pins itself to its own core set, sizes torch's intra-op pool to
+match and serves the inherited socket with uvicorn; the kernel spreads
+connections across the workers.
+
+Workers that die are restarted; SIGTERM / SIGINT drain them gracefully.
+Per-process state (prediction cache, feature store, /metrics) stays per
+worker; a persistent feature store gets one directory per worker index
+(AI_FEATURE_STORE_PATH/worker-N), as workers cannot share its slots. The
+vault scanner's registrations and SSE subscribers would be split across
+workers, so multi-worker mode requires AI_SCANNER_ENABLED=false. Models
+activated later through the registry are loaded by each worker on its own,
+as in single-process mode. Needs fork (Linux, macOS)
+"""
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Dict, List, Optional
+
+import config
+from services.inference_executor import inference_executor, set_torch_threads
+
+# Set inside a worker process: index, pid, cpus, torch_num_threads
+current_worker: Dict = {}
+
+# A worker exiting sooner than this after starting counts as a crash loop
+MIN_UPTIME_SECONDS = 10.0
+MAX_QUICK_RESTARTS = 5
+
+
+def usable_cpus() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_plan(workers: int, cpus: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Contiguous, near-equal core sets, one per worker; with more workers than
+    cores each worker gets one core, shared round-robin
+    """
+    cpus = sorted(cpus if cpus is not None else usable_cpus())
+    if workers >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(workers)]
+    plan, start = [], 0
+    for i in range(workers):
+        size = len(cpus) // workers + (1 if i < len(cpus) % workers else 0)
+        plan.append(cpus[start:start + size])
+        start += size
+    return plan
+
+
+class WorkerSupervisor:
+    """
+    Forks and supervises uvicorn workers sharing one socket and one copy of
+    the model weights
+    """
+    def __init__(self, app, host: str = '0.0.0.0', port: int = 8000, workers: int = 2,
+                 pin_cores: bool = True, graceful_timeout: float = 30.0, log_level: str = 'info'):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pin_cores = pin_cores
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.plan = core_plan(workers)
+
+        self._socket: Optional[socket.socket] = None
+        self._pids: Dict[int, int] = {}  # pid -> worker index
+        self._started_at: Dict[int, float] = {}
+        self._quick_exits: Dict[int, int] = {}
+        self._stopping = False
+        self._exit_code = 0
+
+    def run(self) -> int:
+        """Serve until SIGTERM / SIGINT; returns the process exit code"""
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Multi-worker mode needs os.fork")
+        if config.EXECUTOR_MODE == 'process':
+            raise RuntimeError("AI_EXECUTOR_MODE=process starts its own model replicas; "
+                               "use the thread executor with multiple workers")
+        if config.SCANNER_ENABLED:
+            raise RuntimeError("The vault scanner keeps registered vaults and SSE subscribers in one "
+                               "process; set AI_SCANNER_ENABLED=false with multiple workers and run "
+                               "the scanner on a single-worker instance")
+
+        self._socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._socket.set_inheritable(True)
+
+        from services.pytorch_predictor import share_weights
+        version = share_weights()
+        # Move everything imported so far out of the collector's reach, so
+        # its bookkeeping does not touch (and copy) the inherited pages
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        print(f"🧩 Model {version} in shared memory; starting {self.workers} workers on "
+              f"{self.host}:{self.port}")
+        for index in range(self.workers):
+            self._spawn(index)
+        try:
+            while not self._stopping:
+                self._reap()
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
+            self._socket.close()
+        return self._exit_code
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid:
+            self._pids[pid] = index
+            self._started_at[index] = time.monotonic()
+            return
+        code = 1
+        try:
+            code = self._serve(index)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    def _serve(self, index: int) -> int:
+        """Worker process body"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+
+        cpus = self.plan[index]
+        if self.pin_cores and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cpus)
+            threads = config.TORCH_NUM_THREADS or len(cpus)
+        else:
+            cpus = None
+            threads = config.TORCH_NUM_THREADS or max(1, len(usable_cpus()) // self.workers)
+        set_torch_threads(threads)
+        inference_executor.set_num_threads(threads)
+        if config.FEATURE_STORE_PATH:
+            # Slots are allocated per process: concurrent workers must not share the files
+            config.FEATURE_STORE_PATH = os.path.join(config.FEATURE_STORE_PATH, f'worker-{index}')
+        current_worker.update(index=index, pid=os.getpid(), cpus=cpus, torch_num_threads=threads)
+
+        import uvicorn
+        server = uvicorn.Server(uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        ))
+        server.run(sockets=[self._socket])
+        return 0 if server.started else 3
+
+    def _reap(self):
+        while self._pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index = self._pids.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - self._started_at[index] < MIN_UPTIME_SECONDS:
+                self._quick_exits[index] = self._quick_exits.get(index, 0) + 1
+            else:
+                self._quick_exits[index] = 0
+            if self._quick_exits[index] > MAX_QUICK_RESTARTS:
+                print(f"❌ Worker {index} keeps exiting ({code}); stopping")
+                self._exit_code = 1
+                self._stopping = True
+                return
+            print(f"⚠️  Worker {index} (pid {pid}) exited with {code}; restarting")
+            self._spawn(index)
+
+    def _shutdown(self):
+        """SIGTERM every worker, then SIGKILL what is left after the grace period"""
+        for pid in list(self._pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._pids.pop(pid, None)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._pids and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self._pids.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in list(self._pids):
+            print(f"⚠️  Worker pid {pid} did not stop in time; killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._pids.clear()
@@ -0,0 +1,126 @@
+import glob
+import os
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from services.pytorch_predictor import NUM_FEATURES, SEQUENCE_LENGTH
+
+# Column of the normalized features holding current_apy / 100; the value
+# `horizon` steps after a window is the training target
+APY_COLUMN = 1
+
+
+def list_shards(path: str) -> List[str]:
+    """
+    Shards are float32 .npy files of shape [T, 10], one time-ordered series
+    of normalized features each (see training.shards)
+    """
+    if os.path.isfile(path):
+        return [path]
+    shards = sorted(glob.glob(os.path.join(path, '**', '*.npy'), recursive=True))
+    if not shards:
+        raise FileNotFoundError(f"No .npy shards under {path}")
+    return shards
+
+
+def shard_length(path: str) -> int:
+    # Reads the header only; the data stays on disk
+    array = np.load(path, mmap_mode='r')
+    if array.ndim != 2 or array.shape[1] != NUM_FEATURES:
+        raise ValueError(f"{path}: expected [T, {NUM_FEATURES}] array, got {array.shape}")
+    return array.shape[0]
+
+
+class WindowDataset(IterableDataset):
+    """
+    Streams (window, target) batches from memory-mapped shards
+    Sample t is the window of rows [t, t + window) and its target is the
+    normalized APY `horizon` rows after the window. Each shard's timeline is
+    split chronologically: the first 1 - val_fraction of samples train, the
+    rest validate, so validation never sees the future of training data.
+    Work is cut into chunks of consecutive samples. Per epoch the chunks are
+    shuffled and dealt to DataLoader workers, and each chunk is read as one
+    contiguous slice and shuffled in memory, so reads stay sequential and at
+    most one chunk per worker is resident. Yields ready [B, W, F] / [B, 1]
+    batches (use DataLoader(batch_size=None))
+    """
+    def __init__(self, path: str, split: str = 'train', batch_size: int = 256, window: int = SEQUENCE_LENGTH,
+                 horizon: int = 1, val_fraction: float = 0.1, chunk_size: int = 16384,
+                 shuffle: bool = True, seed: int = 0):
+        if split not in ('train', 'val'):
+            raise ValueError(f"Unknown split: {split}")
+        self.split = split
+        self.batch_size = int(batch_size)
+        self.window = int(window)
+        self.horizon = int(horizon)
+        self.chunk_size = max(self.batch_size, int(chunk_size))
+        self.shuffle = shuffle and split == 'train'
+        self.seed = int(seed)
+        self.epoch = 0
+
+        self.shards = list_shards(path)
+        # (shard index, first sample, end sample) per chunk
+        self.chunks: List[Tuple[int, int, int]] = []
+        self.num_samples = 0
+        for index, shard in enumerate(self.shards):
+            samples = shard_length(shard) - self.window - self.horizon + 1
+            if samples <= 0:
+                continue
+            boundary = int(samples * (1 - val_fraction))
+            start, end = (0, boundary) if split == 'train' else (boundary, samples)
+            for first in range(start, end, self.chunk_size):
+                self.chunks.append((index, first, min(first + self.chunk_size, end)))
+            self.num_samples += max(0, end - start)
+
+    def set_epoch(self, epoch: int):
+        """Reseed the chunk and sample order (call before each epoch)"""
+        self.epoch = int(epoch)
+
+    def __len__(self) -> int:
+        # Upper bound on batches; each chunk ends with at most one short batch
+        return sum(-(-(end - first) // self.batch_size) for _, first, end in self.chunks)
+
+    def _worker_chunks(self) -> List[Tuple[int, int, int]]:
+        order = list(range(len(self.chunks)))
+        if self.shuffle:
+            np.random.default_rng((self.seed, self.epoch)).shuffle(order)
+        info = get_worker_info()
+        if info is not None:
+            order = order[info.id::info.num_workers]
+        return [self.chunks[i] for i in order]
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        info = get_worker_info()
+        worker = info.id if info is not None else 0
+        rng = np.random.default_rng((self.seed, self.epoch, worker))
+        arrays = {}
+        for shard_index, first, end in self._worker_chunks():
+            array = arrays.get(shard_index)
+            if array is None:
+                array = arrays[shard_index] = np.load(self.shards[shard_index], mmap_mode='r')
+
+            # One contiguous read covers every window and target of the chunk
+            rows = np.array(array[first:end + self.window + self.horizon - 1], dtype=np.float32)
+            windows = np.lib.stride_tricks.sliding_window_view(rows, self.window, axis=0)[:end - first]
+            windows = windows.transpose(0, 2, 1)  # [n, W, F]
+            targets = rows[self.window + self.horizon - 1:, APY_COLUMN][:end - first]
+
+            order = rng.permutation(end - first) if self.shuffle else np.arange(end - first)
+            for start in range(0, len(order), self.batch_size):
+                picked = order[start:start + self.batch_size]
+                yield (
+                    torch.from_numpy(np.ascontiguousarray(windows[picked])),
+                    torch.from_numpy(targets[picked].reshape(-1, 1).copy()),
+                )
+
+
+def make_loader(dataset: WindowDataset, num_workers: int = 0,
+                prefetch_factor: Optional[int] = None) -> torch.utils.data.DataLoader:
+    kwargs = {}
+    if num_workers > 0:
+        kwargs['persistent_workers'] = False
+        kwargs['prefetch_factor'] = prefetch_factor or 4
+    return torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=num_workers, **kwargs)
@@ -0,0 +1,247 @@
+"""
+Train YieldPredictionModel from memory-mapped .npy shards
+
+Usage (from src/):
+    python -m training.shards synthetic data/shards
+    python -m training.train data/shards --epochs 5 --workers 4
+    python -m training.train data/shards --epochs 10 --resume
+    python -m training.train data/shards --register --activate
+
+The best weights by validation loss are written to --out (default
+AI_MODEL_PATH) as a plain state dict, the format PyTorchPredictor loads.
+Training state goes to --checkpoint every --checkpoint-every steps and at
+each epoch end; --resume continues from it, skipping the batches that epoch
+already consumed so the data order matches an uninterrupted run.
+--register copies the best weights into the model registry as a new
+version (with the validation metrics as metadata); --activate also points
+running services at it
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import torch
+import torch.nn as nn
+
+import config
+from services.model_registry import ModelRegistry
+from services.pytorch_predictor import YieldPredictionModel
+from training.dataset import WindowDataset, make_loader
+
+# Arguments that must match for a resumed run to see the same data order
+RESUME_KEYS = ('batch_size', 'workers', 'seed', 'horizon', 'val_fraction', 'chunk_size')
+
+
+def _atomic_save(obj, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = path + '.tmp'
+    torch.save(obj, temporary)
+    os.replace(temporary, path)
+
+
+def evaluate(model: nn.Module, loader, loss_fn) -> Dict:
+    """Validation MSE (normalized units) and MAE in APY percentage points"""
+    model.eval()
+    total_loss, total_error, count = 0.0, 0.0, 0
+    with torch.no_grad():
+        for windows, targets in loader:
+            outputs = model(windows)
+            total_loss += loss_fn(outputs, targets).item() * len(targets)
+            total_error += float((outputs - targets).abs().sum()) * 100
+            count += len(targets)
+    model.train()
+    if count == 0:
+        return {'loss': None, 'mae_apy': None, 'samples': 0}
+    return {'loss': total_loss / count, 'mae_apy': total_error / count, 'samples': count}
+
+
+def train(args) -> Dict:
+    torch.manual_seed(args.seed)
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    dataset_args = dict(batch_size=args.batch_size, horizon=args.horizon, val_fraction=args.val_fraction,
+                        chunk_size=args.chunk_size, seed=args.seed)
+    train_set = WindowDataset(args.data, split='train', **dataset_args)
+    val_set = WindowDataset(args.data, split='val', **dataset_args)
+    print(f"📦 {len(train_set.shards)} shards: {train_set.num_samples} train / "
+          f"{val_set.num_samples} val windows")
+
+    model = YieldPredictionModel()
+    optimizer = torch.optim.Adam(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    loss_fn = nn.MSELoss()
+
+    start_epoch, skip_batches, global_step = 0, 0, 0
+    best_val_loss: Optional[float] = None
+    samples_seen, train_seconds = 0, 0.0
+    history = []
+    if args.resume and os.path.exists(args.checkpoint):
+        state = torch.load(args.checkpoint, map_location='cpu', weights_only=False)
+        model.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        torch.set_rng_state(state['rng_state'])
+        start_epoch, skip_batches = state['epoch'], state['step_in_epoch']
+        global_step, best_val_loss = state['global_step'], state['best_val_loss']
+        samples_seen, train_seconds = state['samples_seen'], state['train_seconds']
+        history = state.get('history', [])
+        changed = [key for key in RESUME_KEYS if state['args'].get(key) != getattr(args, key)]
+        if changed:
+            print(f"⚠️  {', '.join(changed)} changed since the checkpoint; data order will differ")
+        print(f"↩️  Resuming at epoch {start_epoch + 1}, batch {skip_batches}")
+
+    def checkpoint(epoch: int, step_in_epoch: int, pending_samples: int = 0, pending_seconds: float = 0.0):
+        # pending_*: progress of the epoch in flight, not yet folded into the totals
+        _atomic_save({
+            'model': model.state_dict(),
+            'optimizer': optimizer.state_dict(),
+            'rng_state': torch.get_rng_state(),
+            'epoch': epoch,
+            'step_in_epoch': step_in_epoch,
+            'global_step': global_step,
+            'best_val_loss': best_val_loss,
+            'samples_seen': samples_seen + pending_samples,
+            'train_seconds': train_seconds + pending_seconds,
+            'history': history,
+            'args': vars(args),
+        }, args.checkpoint)
+
+    model.train()
+    for epoch in range(start_epoch, args.epochs):
+        train_set.set_epoch(epoch)
+        iterator = iter(make_loader(train_set, args.workers))
+        step_in_epoch = 0
+        if epoch == start_epoch and skip_batches:
+            for _ in range(skip_batches):
+                next(iterator, None)
+            step_in_epoch = skip_batches
+
+        epoch_samples, epoch_loss = 0, 0.0
+        data_seconds = compute_seconds = 0.0
+        epoch_started = time.perf_counter()
+        while True:
+            waited = time.perf_counter()
+            batch = next(iterator, None)
+            fetched = time.perf_counter()
+            if batch is None:
+                break
+            windows, targets = batch
+
+            optimizer.zero_grad(set_to_none=True)
+            loss = loss_fn(model(windows), targets)
+            loss.backward()
+            if args.clip_grad > 0:
+                nn.utils.clip_grad_norm_(model.parameters(), args.clip_grad)
+            optimizer.step()
+
+            data_seconds += fetched - waited
+            compute_seconds += time.perf_counter() - fetched
+            epoch_samples += len(targets)
+            epoch_loss += loss.item() * len(targets)
+            step_in_epoch += 1
+            global_step += 1
+
+            if args.log_every and global_step % args.log_every == 0:
+                elapsed = time.perf_counter() - epoch_started
+                print(f"  epoch {epoch + 1} step {global_step}: loss {epoch_loss / epoch_samples:.6f}, "
+                      f"{epoch_samples / elapsed:,.0f} samples/s")
+            if args.checkpoint_every and global_step % args.checkpoint_every == 0:
+                checkpoint(epoch, step_in_epoch, epoch_samples, time.perf_counter() - epoch_started)
+            if args.max_steps and step_in_epoch >= args.max_steps:
+                break
+
+        epoch_seconds = time.perf_counter() - epoch_started
+        train_seconds += epoch_seconds
+        samples_seen += epoch_samples
+        validation = evaluate(model, make_loader(val_set, args.workers), loss_fn)
+
+        improved = validation['loss'] is None or best_val_loss is None or validation['loss'] < best_val_loss
+        if improved:
+            if validation['loss'] is not None:
+                best_val_loss = validation['loss']
+            _atomic_save(model.state_dict(), args.out)
+
+        summary = {
+            'epoch': epoch + 1,
+            'train_loss': epoch_loss / epoch_samples if epoch_samples else None,
+            'val_loss': validation['loss'],
+            'val_mae_apy': validation['mae_apy'],
+            'samples': epoch_samples,
+            'samples_per_sec': round(epoch_samples / epoch_seconds, 1) if epoch_seconds else 0.0,
+            # Share of the epoch spent waiting for the DataLoader
+            'data_wait_fraction': round(data_seconds / epoch_seconds, 4) if epoch_seconds else 0.0,
+            'compute_seconds': round(compute_seconds, 2),
+            'saved_weights': improved,
+        }
+        history.append(summary)
+        val = 'n/a' if validation['loss'] is None else f"{validation['loss']:.6f} (MAE {validation['mae_apy']:.3f} APY pts)"
+        print(f"✅ epoch {epoch + 1}/{args.epochs}: train {summary['train_loss'] or 0:.6f}, val {val}, "
+              f"{summary['samples_per_sec']:,} samples/s, data wait {summary['data_wait_fraction']:.1%}")
+        checkpoint(epoch + 1, 0)
+
+    report = {
+        'weights': args.out,
+        'checkpoint': args.checkpoint,
+        'best_val_loss': best_val_loss,
+        'samples_seen': samples_seen,
+        'train_seconds': round(train_seconds, 2),
+        'samples_per_sec': round(samples_seen / train_seconds, 1) if train_seconds else 0.0,
+        'workers': args.workers,
+        'torch_num_threads': torch.get_num_threads(),
+        'epochs': history,
+    }
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train YieldPredictionModel from .npy shards")
+    parser.add_argument('data', help="Shard directory (or a single .npy file)")
+    parser.add_argument('--out', default=config.MODEL_PATH, help="Weights file loaded by the service")
+    parser.add_argument('--checkpoint', default=None, help="Training state (default: <out>.ckpt)")
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--weight-decay', type=float, default=0.0)
+    parser.add_argument('--clip-grad', type=float, default=1.0)
+    parser.add_argument('--horizon', type=int, default=1, help="Steps ahead of the window to predict")
+    parser.add_argument('--val-fraction', type=float, default=0.1, help="Tail of each series held out")
+    parser.add_argument('--chunk-size', type=int, default=16384, help="Windows per contiguous read")
+    parser.add_argument('--workers', type=int, default=2, help="DataLoader worker processes")
+    parser.add_argument('--threads', type=int, default=0, help="Torch intra-op threads (0 = default)")
+    parser.add_argument('--max-steps', type=int, default=0, help="Cap batches per epoch (0 = all)")
+    parser.add_argument('--log-every', type=int, default=100)
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', default=None, help="Write a JSON summary here")
+    parser.add_argument('--register', action='store_true', help="Add the best weights to the model registry")
+    parser.add_argument('--activate', action='store_true', help="Make the registered version active")
+    parser.add_argument('--registry', default=config.MODEL_REGISTRY_PATH)
+    args = parser.parse_args(argv)
+    args.checkpoint = args.checkpoint or args.out + '.ckpt'
+
+    report = train(args)
+    print(f"🏁 {report['samples_seen']:,} samples in {report['train_seconds']}s "
+          f"({report['samples_per_sec']:,} samples/s); weights at {report['weights']}")
+    if args.register or args.activate:
+        registry = ModelRegistry(args.registry)
+        best = min((epoch for epoch in report['epochs'] if epoch['val_loss'] is not None),
+                   key=lambda epoch: epoch['val_loss'], default={})
+        version = registry.register(args.out, metadata={
+            'val_loss': best.get('val_loss'),
+            'val_mae_apy': best.get('val_mae_apy'),
+            'samples_seen': report['samples_seen'],
+            'data': os.path.abspath(args.data),
+        })
+        print(f"📦 Registered {version} in {args.registry}")
+        if args.activate:
+            registry.set_active(version)
+            print(f"✅ Activated {version}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Test setup: import the service from src/ the way it runs (cd src), with
+on-disk state pointed away from models/
+"""
+import os
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC)
+
+_state = tempfile.mkdtemp(prefix='ai-service-tests-')
+os.environ.setdefault('AI_MODEL_PATH', os.path.join(_state, 'yield_predictor.pth'))
+os.environ.setdefault('AI_MODEL_REGISTRY_PATH', os.path.join(_state, 'registry'))
+os.environ.setdefault('AI_RUNTIME_PROFILE', '')
+os.environ.setdefault('AI_FEATURE_STORE_PATH', '')
+os.environ.setdefault('AI_MARKET_DATA_URL', '')
@@ -0,0 +1,20 @@
+"""autotune.sweep: a crashing trial is recorded instead of hanging the sweep"""
+import time
+
+from autotune.sweep import best, run_trial
+
+
+def test_crashed_trial_is_marked_failed():
+    started = time.monotonic()
+    # torch.set_num_threads(0) raises in every trial process
+    trial = run_trial({'workers': 2, 'torch_num_threads': 0, 'torch_interop_threads': 0},
+                      batch_sizes=[8], duration=0.05)
+    assert 'set_num_threads' in trial['error'] and trial['batches'] == {}
+    assert time.monotonic() - started < 60
+
+
+def test_best_ignores_failed_layouts():
+    ok = {'workers': 1, 'torch_num_threads': 1, 'torch_interop_threads': 1,
+          'batches': {8: {'throughput_per_s': 100.0, 'p50_ms': 1.0, 'p99_ms': 2.0, 'passes': 10}}}
+    failed = {'workers': 2, 'torch_num_threads': 1, 'torch_interop_threads': 1, 'error': 'boom', 'batches': {}}
+    assert best([failed, ok], max_p99_ms=50)['workers'] == 1
@@ -0,0 +1,59 @@
+"""backtest: realized APY of histories whose answer is known in closed form"""
+import numpy as np
+import pytest
+import torch
+
+from backtest import engine, replay
+from services.pytorch_predictor import FEATURE_SCALES, YieldPredictionModel
+from training import shards
+
+HOURLY = engine.DEFAULT_SETTINGS['steps_per_year']
+
+
+def _history(steps, apy, price_change_24h):
+    """Normalized [T, 10] shard rows with the given APY and 24h price change (%)"""
+    raw = np.column_stack([
+        np.full(steps, 1e6),  # tvl
+        np.full(steps, apy),
+        np.full(steps, 1e5),  # volume_24h
+        np.full(steps, 15.0),  # volatility
+        np.full(steps, 100),  # user_count
+        np.full(steps, 1e6),  # total_shares
+        np.broadcast_to(price_change_24h, steps),
+        np.full(steps, 5e5),  # liquidity
+        np.full(steps, 100),  # fee_bps
+        np.ones(steps),  # active
+    ])
+    return raw / FEATURE_SCALES
+
+
+def _buy_and_hold(tmp_path, history, settings=None):
+    shards.write_shard(str(tmp_path / 'shards' / 'vault.npy'), history)
+    weights = tmp_path / 'model.pth'
+    torch.save(YieldPredictionModel().state_dict(), weights)
+    cache, _ = replay.build(str(tmp_path / 'shards'), str(weights), str(tmp_path / 'replay'))
+    settings = dict({'cost_bps': 0.0}, **(settings or {}))
+    return engine.summarize(engine.evaluate(cache, None, settings))['realized_apy']
+
+
+def test_constant_price_earns_the_yield(tmp_path):
+    realized = _buy_and_hold(tmp_path, _history(2000, apy=5.0, price_change_24h=0.0))
+    assert realized == pytest.approx(((1 + 0.05 / HOURLY) ** HOURLY - 1) * 100, abs=1e-3)
+
+
+def test_steady_price_trend_is_not_counted_once_per_hour(tmp_path):
+    # Price up 0.1% every day, no yield: 1.001^365 a year, hourly or daily
+    realized = _buy_and_hold(tmp_path, _history(2000, apy=0.0, price_change_24h=0.1))
+    assert realized == pytest.approx((1.001 ** 365 - 1) * 100, rel=1e-4)
+
+
+def test_daily_steps_take_the_whole_24h_change(tmp_path):
+    realized = _buy_and_hold(tmp_path, _history(400, apy=0.0, price_change_24h=0.1), {'steps_per_year': 365})
+    assert realized == pytest.approx((1.001 ** 365 - 1) * 100, rel=1e-4)
+
+
+def test_synthetic_price_change_spans_a_day():
+    price = 1.001 ** (np.arange(100) / shards.SYNTHETIC_STEPS_PER_DAY)
+    change = shards._change_24h(price)
+    assert change[0] == 0
+    np.testing.assert_allclose(change[shards.SYNTHETIC_STEPS_PER_DAY:], 0.1, rtol=1e-9)
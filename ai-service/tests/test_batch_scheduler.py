@@ -0,0 +1,16 @@
+"""services.batch_scheduler batch-size metrics count the rows that ran"""
+import torch
+
+from services.batch_scheduler import BatchScheduler
+
+
+def test_batch_sizes_count_rows_not_requests():
+    scheduler = BatchScheduler(lambda batch: batch[:, 0, :1], max_batch_size=32, max_wait_ms=200)
+    futures = [scheduler.submit_many(torch.zeros(20, 10, 10)), scheduler.submit_many(torch.ones(20, 10, 10))]
+    assert [len(future.result()) for future in futures] == [20, 20]
+    scheduler.predict(torch.zeros(1, 10, 10))
+
+    stats = scheduler.stats()
+    assert (stats['batches'], stats['requests'], stats['rows']) == (2, 3, 41)
+    assert stats['avg_batch_size'] == 20.5 and stats['max_batch_size_seen'] == 40
+    assert stats['batch_size_histogram']['le_1'] == 1 and stats['batch_size_histogram']['le_inf'] == 1
@@ -0,0 +1,76 @@
+"""services.feature_store: history windows, snapshot fallback and eviction"""
+import numpy as np
+import pytest
+
+from services.feature_store import FeatureStore
+
+
+def _row(value, num_features=3):
+    return np.full(num_features, value, dtype=np.float32)
+
+
+def test_window_waits_for_min_history():
+    store = FeatureStore(max_vaults=4, window=4, num_features=3, min_history=3)
+    store.ingest('0xA', _row(1))
+    store.ingest('0xa', _row(2))
+    assert store.window('0xA') is None
+    assert store.recent('0xA')[:, 0].tolist() == [1, 1, 1, 2]
+    store.ingest('0xA', _row(3))
+    assert store.window('0xA')[:, 0].tolist() == [1, 1, 2, 3]
+
+
+def test_window_slides_over_the_latest_observations():
+    store = FeatureStore(max_vaults=2, window=4, num_features=3)
+    for value in range(1, 31):
+        store.ingest('0xa', _row(value))
+        if value >= 4:
+            assert store.window('0xa')[:, 0].tolist() == list(range(value - 3, value + 1))
+    assert store.history_length('0xa') == 30
+
+
+def test_least_recently_ingested_vault_is_evicted():
+    store = FeatureStore(max_vaults=2, window=2, num_features=3, min_history=1)
+    store.ingest('0xa', _row(1))
+    store.ingest('0xb', _row(2))
+    store.ingest('0xa', _row(3))  # 0xb is now the oldest
+    errors = store.ingest_batch(['0xc'], np.stack([_row(4)]))
+    assert errors == {}
+    assert store.window('0xb') is None
+    assert store.history_length('0xb') == 0
+    assert store.window('0xa')[:, 0].tolist() == [1, 3]
+    assert store.window('0xc')[:, 0].tolist() == [4, 4]
+    assert store.stats()['evictions'] == 1
+
+
+def test_evicted_vault_starts_a_fresh_history():
+    store = FeatureStore(max_vaults=1, window=3, num_features=3, min_history=1)
+    for value in (1, 2, 3):
+        store.ingest('0xa', _row(value))
+    store.ingest('0xb', _row(9))
+    store.ingest('0xa', _row(7))
+    assert store.history_length('0xa') == 1
+    assert store.window('0xa')[:, 0].tolist() == [7, 7, 7]
+
+
+def test_memory_mapped_history_survives_reopening(tmp_path):
+    store = FeatureStore(max_vaults=4, window=3, num_features=3, path=str(tmp_path))
+    for value in (1, 2, 3, 4):
+        store.ingest('0xa', _row(value))
+    store.flush()
+    reopened = FeatureStore(max_vaults=4, window=3, num_features=3, path=str(tmp_path))
+    assert reopened.window('0xa')[:, 0].tolist() == [2, 3, 4]
+    assert reopened.history_length('0xa') == 4
+
+
+def test_over_length_addresses_are_rejected_not_truncated(tmp_path):
+    store = FeatureStore(max_vaults=4, window=4, num_features=3, path=str(tmp_path))
+    prefix = '0x' + 'a' * 62
+    errors = store.ingest_batch([prefix + 'b', prefix, prefix + 'c'], np.stack([_row(1), _row(2), _row(3)]))
+    assert sorted(errors) == [0, 2] and 'longer than 64 bytes' in errors[0]
+    with pytest.raises(ValueError):
+        store.ingest(prefix + 'b', _row(4))
+    assert store.history_length(prefix + 'b') == 0 and store.recent(prefix + 'b') is None
+
+    store.flush()
+    reopened = FeatureStore(max_vaults=4, window=4, num_features=3, path=str(tmp_path))
+    assert reopened.history_length(prefix) == 1 and reopened.history_length(prefix + 'c') == 0
@@ -0,0 +1,17 @@
+"""`import main` stays within AI_IMPORT_BUDGET_MS and leaves torch unloaded"""
+import check_import_time
+import config
+from conftest import SRC
+
+
+def test_import_main_does_not_load_torch():
+    modules = set(check_import_time._measure(SRC)['modules'])
+    assert [name for name in check_import_time.FORBIDDEN_MODULES if name in modules] == []
+
+
+def test_import_main_within_budget():
+    best_ms = min(check_import_time._measure(SRC)['ms'] for _ in range(3))  # Least noisy estimate
+    if best_ms > config.IMPORT_BUDGET_MS:
+        slowest = '\n'.join(f"{ms:8.1f}  {name}" for ms, name in check_import_time._slowest_imports(SRC))
+        raise AssertionError(f"import main took {best_ms:.0f} ms (budget {config.IMPORT_BUDGET_MS:.0f} ms); "
+                             f"slowest imports (cumulative ms):\n{slowest}")
@@ -0,0 +1,32 @@
+"""services.inference_executor sizing"""
+import pytest
+
+import config
+from services.inference_executor import InferenceExecutor
+
+
+def test_resize_follows_a_retuned_batch_size(monkeypatch):
+    monkeypatch.setattr(config, 'BATCH_MAX_SIZE', 8)
+    monkeypatch.setattr(config, 'TORCH_NUM_THREADS', 0)
+    executor = InferenceExecutor(mode='thread', queue_size=4)
+    assert (executor.workers, executor.max_in_flight, executor.admission.slots) == (8, 12, 12)
+
+    monkeypatch.setattr(config, 'BATCH_MAX_SIZE', 64)
+    monkeypatch.setattr(config, 'TORCH_NUM_THREADS', 1)
+    executor.resize()
+    assert (executor.workers, executor.max_in_flight, executor.num_threads) == (64, 68, 1)
+    assert executor.admission.slots == 68 and executor.admission.in_flight == 0
+
+
+def test_explicit_workers_are_kept(monkeypatch):
+    executor = InferenceExecutor(mode='thread', workers=3, queue_size=0)
+    monkeypatch.setattr(config, 'BATCH_MAX_SIZE', 64)
+    executor.resize()
+    assert executor.workers == 3 and executor.admission.slots == 3
+
+
+def test_resize_refuses_a_running_pool():
+    executor = InferenceExecutor(mode='thread', workers=1)
+    executor._pool = object()  # Started (without touching torch's global thread count)
+    with pytest.raises(RuntimeError):
+        executor.resize()
@@ -0,0 +1,149 @@
+"""services.market_data against the local stub source (benchmarks.market_stub)"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from benchmarks.market_stub import StubMarketData, stub_record
+from services.market_data import ENRICH_FIELDS, MarketDataClient
+
+pytest.importorskip('httpx')
+
+
+@pytest.fixture(scope='module')
+def stub():
+    with StubMarketData(latency_ms=100) as stub:
+        yield stub
+
+
+@pytest.fixture(scope='module')
+def slow_stub():
+    with StubMarketData(latency_ms=300) as stub:
+        yield stub
+
+
+@pytest.fixture(scope='module')
+def failing_stub():
+    with StubMarketData(failing=True) as stub:
+        yield stub
+
+
+def _run(client, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def _client(url, **kwargs):
+    return MarketDataClient(url, **dict({'budget_ms': 2000, 'coalesce_ms': 5}, **kwargs))
+
+
+def test_concurrent_misses_are_coalesced_into_one_request(stub):
+    client = _client(stub.url)
+    before = stub.requests
+
+    async def lookups():
+        return await asyncio.gather(*(client.lookup([f'0xc{i}']) for i in range(8)))
+
+    results = _run(client, lookups())
+    assert stub.requests - before == 1
+    assert [result[f'0xc{i}'] for i, result in enumerate(results)] == [stub_record(f'0xc{i}') for i in range(8)]
+
+
+def test_bulk_lookups_are_split_at_bulk_size(stub):
+    client = _client(stub.url, bulk_size=4)
+    before = stub.requests
+    found = _run(client, client.lookup([f'0xb{i}' for i in range(10)]))
+    assert len(found) == 10 and stub.requests - before == 3
+
+
+def test_concurrent_lookups_share_the_in_flight_fetch(stub):
+    client = _client(stub.url)
+    before = stub.requests
+
+    async def lookups():
+        first = asyncio.ensure_future(client.lookup(['0xd1', '0xd2']))
+        await asyncio.sleep(0.01)  # The first fetch is flushed and in flight
+        second = await client.lookup(['0xD1'])
+        return await first, second
+
+    first, second = _run(client, lookups())
+    assert stub.requests - before == 1
+    assert client.coalesced == 1
+    assert first['0xd1'] == second['0xd1'] == stub_record('0xd1')
+
+
+def test_cached_lookups_skip_the_source(stub):
+    client = _client(stub.url)
+    before = stub.requests
+
+    async def lookups():
+        await client.lookup(['0xe1'])
+        return await client.lookup(['0xe1'])
+
+    assert _run(client, lookups()) == {'0xe1': stub_record('0xe1')}
+    assert stub.requests - before == 1
+
+
+def test_budget_timeout_goes_ahead_and_late_fetch_fills_the_cache(slow_stub):
+    client = _client(slow_stub.url, budget_ms=20)
+
+    async def lookups():
+        missed = await client.lookup(['0xf1'])
+        await asyncio.sleep(0.6)  # The fetch completes in the background
+        return missed, await client.lookup(['0xf1'])
+
+    missed, cached = _run(client, lookups())
+    assert missed == {} and client.late == 1
+    assert cached == {'0xf1': stub_record('0xf1')}
+    assert client.requests == 1
+
+
+def test_failed_fetch_backs_off(failing_stub):
+    client = _client(failing_stub.url)
+    before = failing_stub.requests
+
+    async def lookups():
+        first = await client.lookup(['0xa1'])
+        return first, await client.lookup(['0xa2'])
+
+    first, second = _run(client, lookups())
+    assert first == second == {}
+    assert client.failures == 1 and client.skipped == 1
+    assert failing_stub.requests - before == 1
+    assert client.stats()['source_down']
+
+
+def test_enrich_keeps_request_values(stub):
+    client = _client(stub.url)
+    vaults = [
+        {'address': '0xAB1', 'tvl': 1e6, 'current_apy': 5.0, 'volatility': 12.5},
+        {'address': '0xab2', 'tvl': 1e6, 'current_apy': 5.0, 'liquidity': None},
+        dict({'address': '0xab3', 'tvl': 1e6, 'current_apy': 5.0}, **{name: 1.0 for name in ENRICH_FIELDS}),
+    ]
+    first, second, complete = _run(client, client.enrich(vaults))
+
+    expected = stub_record('0xab1')
+    assert first['volatility'] == 12.5
+    assert {name: first[name] for name in ENRICH_FIELDS if name != 'volatility'} == \
+        {name: value for name, value in expected.items() if name != 'volatility'}
+    assert second['liquidity'] == stub_record('0xab2')['liquidity']
+    assert complete is vaults[2]
+    assert 'volume_24h' not in vaults[0]  # Inputs untouched
+
+
+def test_enrich_columns_keeps_request_columns():
+    volatility = np.array([11.0, 22.0])
+    columns = {'address': ['0xcc1', '0xunknown'], 'tvl': np.ones(2), 'current_apy': np.ones(2),
+               'volatility': volatility}
+    with StubMarketData(unknown_prefix='0xunknown') as partial:
+        client = _client(partial.url)
+        enriched = _run(client, client.enrich_columns(columns))
+
+    assert enriched['volatility'] is volatility
+    assert enriched['volume_24h'][0] == stub_record('0xcc1')['volume_24h']
+    assert enriched['volume_24h'][1] == 0  # FEATURE_SPEC default for vaults the source does not know
+    assert 'volume_24h' not in columns
@@ -0,0 +1,34 @@
+"""services.portfolio.optimize returns the best iterate it has seen"""
+import numpy as np
+
+from services.portfolio import Covariance, optimize
+
+
+def _problem(count=200, seed=7):
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0, 2, size=(count, 4))
+    return {
+        'predicted_apy': rng.uniform(1, 20, count),
+        'risk_score': rng.uniform(0, 100, count),
+        'covariance': Covariance(loadings=loadings, specific=rng.uniform(0.5, 4, count)),
+        'current_weights': rng.dirichlet(np.ones(count)),
+        'depth': rng.uniform(1e5, 1e8, count),
+        'capital': 1e6,
+    }
+
+
+def test_objective_never_drops_with_more_iterations():
+    problem = _problem()
+    objectives = [
+        optimize(**problem, max_iterations=iterations, time_budget_ms=60_000)['objective']
+        for iterations in range(1, 60)
+    ]
+    assert all(later >= earlier for earlier, later in zip(objectives, objectives[1:]))
+
+
+def test_result_stays_feasible():
+    problem = _problem()
+    result = optimize(**problem, max_slippage=0.5, time_budget_ms=60_000)
+    weights = result['weights']
+    assert (weights >= -1e-12).all() and weights.sum() <= 1 + 1e-9
+    assert (result['slippage_pct'] <= 0.5 + 1e-9).all()
@@ -0,0 +1,17 @@
+"""services.prediction_cache: retired model versions give their entries back"""
+import numpy as np
+
+from services.prediction_cache import PredictionCache
+
+
+def test_retain_versions_purges_and_counts_the_rest():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    row = np.zeros(10, dtype=np.float32)
+    for version in ('v1', 'v2', 'v3'):
+        cache.put(cache.make_key('apy', version, row), version)
+        cache.put(cache.make_key('risk', version, row), version)
+
+    assert cache.retain_versions(('v3', 'v2')) == 2
+    assert cache.get(cache.make_key('apy', 'v1', row)) is None
+    assert cache.get(cache.make_key('apy', 'v2', row)) == 'v2'
+    assert cache.stats()['invalidations'] == 2 and cache.stats()['entries'] == 4
@@ -0,0 +1,68 @@
+"""Model input switches from the request snapshot to stored history"""
+import numpy as np
+import pytest
+
+import config
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    config.BATCH_ENABLED = False
+    from services.pytorch_predictor import PyTorchPredictor
+    return PyTorchPredictor()
+
+
+def _vault(address, apy):
+    return {'address': address, 'tvl': 2e6, 'current_apy': apy, 'volatility': 15, 'user_count': 300}
+
+
+def test_snapshot_is_used_until_the_window_fills(predictor):
+    store = predictor.feature_store
+    address = '0x' + 'ab' * 20
+    request = _vault(address, 30.0)
+    snapshot = predictor.matrix_to_sequences(predictor._features(request)).numpy()
+
+    predictor.ingest_observations([_vault(address, 4.0)])
+    np.testing.assert_array_equal(predictor.preprocess_data(request).numpy(), snapshot)
+
+    predictor.ingest_observations([_vault(address, 4.0)] * (store.min_history - 1))
+    history = predictor.preprocess_data(request).numpy()[0]
+    np.testing.assert_array_equal(history, store.window(address))
+    assert not np.array_equal(history, snapshot[0])
+
+
+def test_cached_history_prediction_keeps_request_confidence(predictor):
+    assert predictor.cache is not None
+    address = '0x' + 'cd' * 20
+    predictor.ingest_observations([_vault(address, 6.0)] * predictor.feature_store.min_history)
+
+    large = predictor.predict_apy(_vault(address, 6.0))
+    small = predictor.predict_apy(dict(_vault(address, 6.0), tvl=5000))
+    assert large['predicted_apy'] == small['predicted_apy']  # Same stored window
+    assert large['confidence'] == 100 and small['confidence'] == 75
+    assert predictor.predict_apy(_vault(address, 6.0)) == large  # Served from the cache
+
+
+def test_over_length_address_is_an_error_item(predictor):
+    long_address = '0x' + 'ef' * 40
+    results = predictor.ingest_observations([_vault(long_address, 5.0), _vault('0x' + 'ef' * 20, 5.0)])
+    assert 'longer than 64 bytes' in results[0]['error']
+    assert results[1]['history_length'] >= 1
+
+
+def test_swap_purges_retired_versions_from_the_cache(predictor):
+    original = predictor._active[0]
+    vault = _vault('0x' + '77' * 20, 5.0)
+    predictor.predict_apy(vault)
+    before = predictor.cache.stats()['invalidations']
+    try:
+        second = predictor._bundle(original.model, 'test-second', None)
+        third = predictor._bundle(original.model, 'test-third', None)
+        predictor.activate(second)
+        predictor.predict_apy(vault)
+        predictor.activate(third)  # original's entries retire, second's are the rollback
+        versions = {key[1] for key in predictor.cache._entries}
+        assert original.version not in versions and 'test-second' in versions
+        assert predictor.cache.stats()['invalidations'] > before
+    finally:
+        predictor.activate(original)
@@ -0,0 +1,19 @@
+"""AI_EXECUTOR_MODE=process replicas cannot see ingested history, so it is off"""
+import pytest
+from fastapi import HTTPException
+
+import config
+from routes import ai_routes
+from services.pytorch_predictor import PyTorchPredictor
+
+
+def test_process_mode_turns_the_feature_store_off(monkeypatch):
+    monkeypatch.setattr(config, 'EXECUTOR_MODE', 'process')
+    monkeypatch.setattr(config, 'BATCH_ENABLED', False)
+    predictor = PyTorchPredictor()
+    assert predictor.feature_store is None and predictor.streaming is None
+
+    monkeypatch.setattr(ai_routes, '_predictor', lambda: predictor)
+    with pytest.raises(HTTPException) as error:
+        ai_routes.ingest_features(ai_routes.IngestRequest(observations=[{'address': '0xa', 'tvl': 1}]))
+    assert error.value.status_code == 404 and 'AI_EXECUTOR_MODE=process' in error.value.detail
@@ -0,0 +1,97 @@
+"""services.risk_engine against the per-vault formula it replaced"""
+import numpy as np
+
+from services import risk_engine
+
+
+def scalar_risk_score(vault_data):
+    """predict_risk_score before vectorization, kept as the reference"""
+    tvl = float(vault_data.get('tvl', 0))
+    volatility = float(vault_data.get('volatility', 10))
+    liquidity = float(vault_data.get('liquidity', 0))
+    user_count = int(vault_data.get('user_count', 0))
+
+    tvl_risk = 100 - min(100, (tvl / 1000000) * 20)
+    volatility_risk = min(100, volatility * 3)
+    liquidity_risk = 100 - min(100, (liquidity / 500000) * 20)
+    user_risk = 100 - min(100, (user_count / 100) * 20)
+
+    risk_score = tvl_risk * 0.3 + volatility_risk * 0.4 + liquidity_risk * 0.2 + user_risk * 0.1
+
+    if risk_score < 30:
+        risk_level = "LOW"
+    elif risk_score < 60:
+        risk_level = "MEDIUM"
+    else:
+        risk_level = "HIGH"
+
+    return {
+        'risk_score': round(risk_score, 2),
+        'risk_level': risk_level,
+        'components': {
+            'tvl_risk': round(tvl_risk, 2),
+            'volatility_risk': round(volatility_risk, 2),
+            'liquidity_risk': round(liquidity_risk, 2),
+            'user_risk': round(user_risk, 2),
+        },
+    }
+
+
+def _random_vaults(rng, count):
+    vaults = []
+    for _ in range(count):
+        vault = {
+            'tvl': float(rng.choice([rng.uniform(0, 1e7), rng.lognormal(12, 3), 0.0, -rng.uniform(0, 1e5)])),
+            'volatility': float(rng.choice([rng.uniform(0, 60), rng.exponential(20), 0.0])),
+            'liquidity': float(rng.uniform(0, 3e6)),
+            'user_count': int(rng.integers(0, 2000)) if rng.random() < 0.8 else float(rng.uniform(-5, 800)),
+        }
+        for name in list(vault):
+            if rng.random() < 0.1:
+                del vault[name]  # Falls back to the default
+        vaults.append(vault)
+    return vaults
+
+
+def _tie_vaults(rng, count):
+    # Components landing on x.xx5: tvl_risk = 100 - k/1000, volatility_risk = 3k/1000, ...
+    k = rng.integers(0, 100000, size=(count, 3)) * 2 + 1
+    return [
+        {'tvl': float(a * 50), 'volatility': a / 1000 if b % 3 else float(b / 1000), 'liquidity': float(c * 25),
+         'user_count': int(a % 500)}
+        for a, b, c in k.tolist()
+    ]
+
+
+def test_score_vaults_matches_scalar_formula():
+    rng = np.random.default_rng(0)
+    vaults = _random_vaults(rng, 20000)
+    records, errors = risk_engine.score_vaults(vaults)
+    assert errors == {}
+    assert records == [scalar_risk_score(vault) for vault in vaults]
+
+
+def test_half_way_ties_round_like_builtin_round():
+    rng = np.random.default_rng(1)
+    vaults = _tie_vaults(rng, 20000)
+    records, _ = risk_engine.score_vaults(vaults)
+    assert records == [scalar_risk_score(vault) for vault in vaults]
+
+
+def test_round2_matches_round_on_ties():
+    values = (np.arange(-100000, 100000) * 2 + 1) / 2000  # Every x.xx5 in [-100, 100]
+    assert risk_engine.round2(values).tolist() == [round(value, 2) for value in values.tolist()]
+
+
+def test_numeric_strings_score_like_floats():
+    vault = {'tvl': '250000', 'volatility': '12.5', 'liquidity': '10000', 'user_count': 42}
+    records, errors = risk_engine.score_vaults([vault])
+    assert errors == {}
+    assert records[0] == scalar_risk_score(vault)
+
+
+def test_invalid_rows_are_reported_without_failing_the_batch():
+    vaults = [{'tvl': 1e6}, {'tvl': 'lots'}, {'volatility': float('nan')}]
+    records, errors = risk_engine.score_vaults(vaults)
+    assert set(errors) == {1, 2}
+    assert records[0] == scalar_risk_score(vaults[0])
@@ -0,0 +1,80 @@
+"""services.streaming_inference against the full-window forward pass"""
+import numpy as np
+import pytest
+import torch
+
+from services.feature_store import FeatureStore
+from services.pytorch_predictor import YieldPredictionModel
+from services.streaming_inference import StreamingInference
+
+VAULTS, WINDOW, FEATURES = 64, 10, 10
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return YieldPredictionModel().eval()
+
+
+def _run(streaming, steps, seed=0):
+    store = FeatureStore(max_vaults=VAULTS, window=WINDOW, num_features=FEATURES, min_history=1)
+    addresses = [f'0x{i:040x}' for i in range(VAULTS)]
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0.3, 0.2, (VAULTS, FEATURES)).astype(np.float32)
+    for _ in range(steps):
+        rows = (base + rng.normal(0, 0.05, (VAULTS, FEATURES))).astype(np.float32)
+        store.ingest_batch(addresses, rows)
+        with torch.no_grad():
+            streaming.observe(addresses, rows, [store.history_length(a) for a in addresses], store.recent)
+    return store, addresses
+
+
+def _errors(model, streaming, store, addresses):
+    with torch.no_grad():
+        full = model(torch.from_numpy(np.stack([store.recent(a) for a in addresses]))).reshape(-1).numpy()
+    streamed = np.array([streaming.latest(a, store.history_length(a)) for a in addresses])
+    return np.abs(streamed - full)
+
+
+def test_state_is_exact_after_a_rebuild(model):
+    streaming = StreamingInference(model, WINDOW, VAULTS, verify_every=0, refresh_every=5)
+    store, addresses = _run(streaming, 13)  # Rebuilt at observations 7 and 13
+    assert streaming.refreshes == VAULTS * 2
+    assert _errors(model, streaming, store, addresses).max() < 1e-5
+
+
+def test_one_step_updates_stay_close_to_the_full_window(model):
+    streaming = StreamingInference(model, WINDOW, VAULTS, verify_every=0, refresh_every=0)
+    store, addresses = _run(streaming, 40)
+    assert streaming.bootstraps == VAULTS  # Every later observation was a single step
+    assert _errors(model, streaming, store, addresses).max() < 5e-3
+
+
+def test_drifted_states_fall_back_to_the_full_window(model):
+    streaming = StreamingInference(model, WINDOW, VAULTS, tolerance=0.0, verify_every=1, refresh_every=0)
+    store, addresses = _run(streaming, 3)
+    assert streaming.verify_failures > 0
+    # The last dropped state waits for its next observation to be rebuilt
+    assert any(streaming.latest(a, store.history_length(a)) is None for a in addresses)
+
+    report = StreamingInference(model, WINDOW, VAULTS, verify_every=0)
+    store, addresses = _run(report, 3)
+    check = report.verify(addresses[0], store.recent)
+    assert check['abs_diff'] == pytest.approx(abs(check['streaming_output'] - check['full_window_output']))
+
+
+def test_compiled_backend_suspends_streaming(monkeypatch):
+    import config
+    from services.pytorch_predictor import PyTorchPredictor
+
+    monkeypatch.setattr(config, 'BATCH_ENABLED', False)
+    monkeypatch.setattr(config, 'INFERENCE_BACKEND', 'int8')
+    predictor = PyTorchPredictor()
+    assert predictor.backend_name == 'int8'
+    assert 'int8' in predictor.streaming.stats()['suspended']
+
+    address = '0x' + '12' * 20
+    vault = {'address': address, 'tvl': 2e6, 'current_apy': 5.0, 'volatility': 15, 'user_count': 300}
+    predictor.ingest_observations([vault] * predictor.feature_store.min_history)
+    assert predictor.streaming.stats()['vaults'] == 0
+    assert predictor._streaming_output(address) is None
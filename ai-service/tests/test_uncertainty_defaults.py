@@ -0,0 +1,13 @@
+"""Monte Carlo dropout is opt-in: off by default, on per request"""
+from services.pytorch_predictor import get_predictor
+
+VAULT = {'address': '0xmc', 'tvl': 100000, 'current_apy': 5.5, 'asset_symbol': 'ETH'}
+
+
+def test_predictions_are_not_sampled_by_default():
+    assert 'uncertainty' not in get_predictor().predict_apy(dict(VAULT))
+
+
+def test_samples_override_turns_sampling_on():
+    uncertainty = get_predictor().predict_apy(dict(VAULT), samples=8).get('uncertainty')
+    assert uncertainty is not None and uncertainty['method'] == 'mc_dropout'
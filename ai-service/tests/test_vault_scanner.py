@@ -0,0 +1,43 @@
+"""services.vault_scanner: scans wait for a busy pool instead of stopping halfway"""
+import asyncio
+
+import pytest
+
+from services import vault_scanner as scanner_module
+from services.inference_executor import InferenceExecutor
+from services.vault_scanner import VaultScanner
+
+
+def _vaults(count):
+    return [{'address': f'0xs{i}', 'tvl': 1e6, 'current_apy': 5.0 + i} for i in range(count)]
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # One slot and a 50ms no-deadline timeout, like a saturated service
+    executor = InferenceExecutor(mode='thread', workers=1, queue_size=0, queue_timeout_ms=50)
+    monkeypatch.setattr(scanner_module, 'inference_executor', executor)
+    yield executor
+    executor.shutdown()
+
+
+async def _scan_while_busy(scanner, executor, busy_seconds):
+    await executor.admission.acquire()  # An interactive call holding the pool
+    asyncio.get_running_loop().call_later(busy_seconds, executor.admission.release, busy_seconds)
+    return await scanner.scan()
+
+
+def test_scan_completes_while_the_pool_is_busy(executor):
+    scanner = VaultScanner(interval_seconds=10, batch_size=2)
+    scanner.register(_vaults(5))
+    result = asyncio.run(_scan_while_busy(scanner, executor, 0.3))
+    assert result['deferred'] == 0 and result['errors'] == 0
+    assert len(scanner.decisions()) == 5
+
+
+def test_vaults_left_at_the_deadline_are_deferred(executor):
+    scanner = VaultScanner(interval_seconds=0.2, batch_size=2)
+    scanner.register(_vaults(5))
+    result = asyncio.run(_scan_while_busy(scanner, executor, 1.0))
+    assert result['deferred'] == 5
+    assert scanner.stats()['deferred_vaults'] == 5 and scanner.decisions() == []
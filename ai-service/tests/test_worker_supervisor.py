@@ -0,0 +1,24 @@
+"""Multi-worker mode refuses the per-process vault scanner"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import config
+from services.worker_supervisor import WorkerSupervisor
+
+
+def test_run_rejects_the_scanner(monkeypatch):
+    monkeypatch.setattr(config, 'EXECUTOR_MODE', 'thread')
+    monkeypatch.setattr(config, 'SCANNER_ENABLED', True)
+    with pytest.raises(RuntimeError, match='AI_SCANNER_ENABLED=false'):
+        WorkerSupervisor(app=None, workers=2).run()
+
+
+def test_scanner_routes_answer_503_when_disabled(monkeypatch):
+    from routes import ai_routes
+
+    monkeypatch.setattr(config, 'SCANNER_ENABLED', False)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(ai_routes.scanner_stats())
+    assert error.value.status_code == 503